@@ -0,0 +1,108 @@
+"""Messages/sec for per-row commits vs. batched Repository writes on file-backed SQLite.
+
+Usage: python -m benchmarks.bench_repository_writes [--messages 2000] [--batch 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+import tempfile
+import time
+import uuid
+
+from email_ingestion.db import models as _models  # noqa: F401 - ensure tables are registered
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import Base, make_engine, make_session_factory
+from email_ingestion.pipeline.writes import BatchedWriter, MessageWrites
+
+
+def _message(run_id: str, index: int, attachments: int = 3) -> MessageWrites:
+    email_id = uuid.uuid4().hex
+    writes = MessageWrites(email_id=email_id, received_time=datetime.utcnow())
+    writes.upsert_email(
+        {
+            "email_id": email_id,
+            "source_system": "outlook",
+            "subject": f"message {index}",
+            "body_text_raw": "body " * 200,
+            "processing_state": "ingested",
+        }
+    )
+    for n in range(attachments):
+        attachment_id = uuid.uuid4().hex
+        writes.upsert_attachment(
+            {
+                "attachment_id": attachment_id,
+                "email_id": email_id,
+                "filename": f"file{n}.pdf",
+                "ext": "pdf",
+                "sha256": uuid.uuid4().hex * 2,
+                "size_bytes": 1024,
+                "is_inline": False,
+            }
+        )
+        writes.add_artifact(
+            {
+                "artifact_id": uuid.uuid4().hex,
+                "email_id": email_id,
+                "attachment_id": attachment_id,
+                "head_name": "pdf",
+                "artifact_type": "text",
+                "text": "extracted " * 100,
+            }
+        )
+    for head in ["email_body"] + ["pdf"] * attachments:
+        writes.add_processing_event(
+            {
+                "event_id": uuid.uuid4().hex,
+                "run_id": run_id,
+                "email_id": email_id,
+                "head_name": head,
+                "status": "success",
+                "created_at": datetime.utcnow(),
+            }
+        )
+    return writes
+
+
+def _run(db_path: Path, messages: int, batch: int | None) -> float:
+    engine = make_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session_factory = make_session_factory(engine=engine)
+    with session_factory() as session:
+        repo = Repository(session)
+        run = repo.start_run()
+        pending = [_message(run.run_id, i) for i in range(messages)]
+        started = time.perf_counter()
+        if batch is None:
+            # Previous behaviour: one commit per Repository call.
+            for writes in pending:
+                for method, payload in writes.operations:
+                    getattr(repo, method)(payload)
+        else:
+            writer = BatchedWriter(repo, max_messages=batch, max_seconds=3600)
+            for writes in pending:
+                writer.add(writes)
+            writer.flush()
+        elapsed = time.perf_counter() - started
+    engine.dispose()
+    return messages / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        before = _run(Path(tmp) / "per_call.db", args.messages, None)
+        after = _run(Path(tmp) / "batched.db", args.messages, args.batch)
+    print(f"per-call commits : {before:10.1f} messages/sec")
+    print(f"batched ({args.batch:>4})   : {after:10.1f} messages/sec")
+    print(f"speedup          : {after / before:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,32 +3,96 @@
 from __future__ import annotations
 
 import argparse
+from dataclasses import replace
+from datetime import datetime, timedelta
 import time
 
 from email_ingestion.config import load_config, AppConfig
-from email_ingestion.pipeline.orchestrator import run_ingestion
+from email_ingestion.outlook.events import OutlookItemAddEvents
+from email_ingestion.outlook.fetcher import FETCH_MODES
+from email_ingestion.pipeline.backfill import run_backfill
+from email_ingestion.pipeline.daemon import IngestionDaemon
+from email_ingestion.pipeline.orchestrator import run_ingestion, run_jobs
+from email_ingestion.db.session import make_session_factory
+from email_ingestion.sources.base import SOURCE_KINDS
+from email_ingestion.storage.cas import make_storage
+from email_ingestion.storage.gc import collect_garbage
+from email_ingestion.storage.migrate import migrate_blob_layout
+from email_ingestion.sources.jobs import SourceSpec, load_job_file
+from email_ingestion.util.json import json_dumps_safe
 from email_ingestion.util.logging import configure_logging
 from email_ingestion.util.time import parse_datetime
 from email_ingestion.output.text_dump import dump_email_texts
 
 
 def _build_config(base: AppConfig, args: argparse.Namespace) -> AppConfig:
-    return AppConfig(
-        db_url=args.db_url or base.db_url,
-        storage_root=args.storage_root or base.storage_root,
+    return replace(
+        base,
+        db_url=getattr(args, "db_url", None) or base.db_url,
+        storage_root=getattr(args, "storage_root", None) or base.storage_root,
         log_level=args.log_level or base.log_level,
-        log_file=base.log_file,
-        checkpoint_name=base.checkpoint_name,
+        pipeline_workers=getattr(args, "workers", None) or base.pipeline_workers,
+        head_processes=(
+            args.head_processes
+            if getattr(args, "head_processes", None) is not None
+            else base.head_processes
+        ),
+        head_pass_paths=getattr(args, "head_pass_paths", False) or base.head_pass_paths,
+        head_isolate=getattr(args, "head_isolate", False) or base.head_isolate,
+        reconcile_seconds=getattr(args, "reconcile_seconds", None) or base.reconcile_seconds,
     )
 
 
+def _single_spec(config: AppConfig, args: argparse.Namespace, since: datetime | None) -> SourceSpec:
+    return SourceSpec(
+        name=config.checkpoint_name,
+        source=args.source,
+        mailbox=args.mailbox,
+        folder=args.folder,
+        path=args.path,
+        fetch_mode=args.fetch_mode,
+        since=since,
+        limit=args.limit,
+    )
+
+
+def _run_job(config: AppConfig, args: argparse.Namespace) -> None:
+    specs = load_job_file(args.job)
+    first = True
+    while True:
+        result = run_jobs(
+            config,
+            specs,
+            use_checkpoint=args.since_checkpoint or not first,
+            reprocess=args.reprocess,
+        )
+        if not args.poll_seconds:
+            errors = {name: summary["error"] for name, summary in result["sources"].items() if summary["error"]}
+            if errors:
+                raise SystemExit("Sources failed: " + "; ".join(f"{name}: {error}" for name, error in errors.items()))
+            return
+        if first:
+            # Per-source ``since`` only applies to the first iteration, like --since.
+            specs = [replace(spec, since=None) for spec in specs]
+        first = False
+        time.sleep(args.poll_seconds)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(prog="email-ingest")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     run_parser = subparsers.add_parser("run", help="Run ingestion")
-    run_parser.add_argument("--mailbox", required=True, help="Shared mailbox name")
-    run_parser.add_argument("--folder", required=True, help="Folder path, e.g. Inbox/Subfolder")
+    run_parser.add_argument(
+        "--source",
+        choices=SOURCE_KINDS,
+        default="outlook",
+        help="outlook: live mailbox via COM; files: .eml/.msg/mbox exports under --path",
+    )
+    run_parser.add_argument("--mailbox", help="Shared mailbox name (outlook source)")
+    run_parser.add_argument("--folder", help="Folder path, e.g. Inbox/Subfolder (outlook source)")
+    run_parser.add_argument("--path", help="File or directory of exports (files source)")
+    run_parser.add_argument("--job", help="JSON job file listing several sources (replaces --source/--mailbox/--folder)")
     run_parser.add_argument("--since-checkpoint", action="store_true", help="Use stored checkpoint")
     run_parser.add_argument("--since", help="Override start datetime (ISO)")
     run_parser.add_argument("--limit", type=int, help="Max messages to process")
@@ -36,6 +100,93 @@ def main() -> None:
     run_parser.add_argument("--storage-root", help="Storage root override")
     run_parser.add_argument("--log-level", help="Log level override")
     run_parser.add_argument("--poll-seconds", type=int, help="Poll interval in seconds")
+    run_parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay running with warm connections; --poll-seconds is the starting interval and adapts to mail volume",
+    )
+    run_parser.add_argument(
+        "--events",
+        action="store_true",
+        help="With --daemon, ingest Outlook items as soon as ItemAdd fires and poll only to reconcile",
+    )
+    run_parser.add_argument(
+        "--reconcile-seconds",
+        type=float,
+        help="With --events, seconds between reconciliation polls",
+    )
+    run_parser.add_argument(
+        "--fetch-mode",
+        choices=FETCH_MODES,
+        default="items",
+        help="items: convert each item; table: prefetch metadata via GetTable and load bodies lazily",
+    )
+    run_parser.add_argument("--workers", type=int, help="Processing worker threads")
+    run_parser.add_argument(
+        "--head-processes",
+        type=int,
+        help="Processes for CPU-bound attachment heads (0 runs them inline)",
+    )
+    run_parser.add_argument(
+        "--head-pass-paths",
+        action="store_true",
+        help="Send stored attachments to head processes by CAS path instead of bytes",
+    )
+    run_parser.add_argument(
+        "--head-isolate",
+        action="store_true",
+        help="Without head processes, still run heads with a time or memory limit in killable workers",
+    )
+    run_parser.add_argument(
+        "--reprocess",
+        action="store_true",
+        help="Re-ingest messages that are already in the database",
+    )
+
+    backfill_parser = subparsers.add_parser("backfill", help="Ingest a mailbox's history in parallel date partitions")
+    backfill_parser.add_argument("--source", choices=SOURCE_KINDS, default="outlook", help="Source kind")
+    backfill_parser.add_argument("--mailbox", help="Shared mailbox name (outlook source)")
+    backfill_parser.add_argument("--folder", help="Folder path, e.g. Inbox/Subfolder (outlook source)")
+    backfill_parser.add_argument("--path", help="File or directory of exports (files source)")
+    backfill_parser.add_argument("--since", required=True, help="Start of the history to ingest (ISO)")
+    backfill_parser.add_argument("--until", help="End of the range (ISO, default now)")
+    backfill_parser.add_argument("--partition-days", type=float, default=30, help="Days per partition")
+    backfill_parser.add_argument("--parallel", type=int, default=4, help="Partitions fetched concurrently")
+    backfill_parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="items", help="See run --fetch-mode")
+    backfill_parser.add_argument("--workers", type=int, help="Processing worker threads")
+    backfill_parser.add_argument("--reprocess", action="store_true", help="Re-ingest messages already in the database")
+    backfill_parser.add_argument("--db-url", help="Database URL override")
+    backfill_parser.add_argument("--storage-root", help="Storage root override")
+    backfill_parser.add_argument("--log-level", help="Log level override")
+
+    migrate_parser = subparsers.add_parser(
+        "migrate-storage", help="Collapse extension-suffixed blobs into the sha256-only storage layout"
+    )
+    migrate_parser.add_argument("--workers", type=int, default=8, help="Fan-out directories processed concurrently")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    migrate_parser.add_argument("--db-url", help="Database URL override")
+    migrate_parser.add_argument("--storage-root", help="Storage root override")
+    migrate_parser.add_argument("--log-level", help="Log level override")
+
+    compact_parser = subparsers.add_parser(
+        "compact-storage", help="Rewrite blob pack files without their dead entries (stop ingestion first)"
+    )
+    compact_parser.add_argument(
+        "--min-dead-ratio", type=float, default=0.2, help="Only rewrite packs with at least this share of dead bytes"
+    )
+    compact_parser.add_argument("--storage-root", help="Storage root override")
+    compact_parser.add_argument("--log-level", help="Log level override")
+
+    gc_parser = subparsers.add_parser("gc", help="Report or delete stored blobs no attachment refers to")
+    gc_parser.add_argument("--delete", action="store_true", help="Delete unreferenced blobs instead of reporting them")
+    gc_parser.add_argument(
+        "--grace-hours", type=float, default=24, help="Leave blobs modified within this many hours alone"
+    )
+    gc_parser.add_argument("--workers", type=int, default=8, help="Fan-out directories swept concurrently")
+    gc_parser.add_argument("--memory-mb", type=int, default=64, help="Memory budget for the set of referenced blobs")
+    gc_parser.add_argument("--db-url", help="Database URL override")
+    gc_parser.add_argument("--storage-root", help="Storage root override")
+    gc_parser.add_argument("--log-level", help="Log level override")
 
     export_parser = subparsers.add_parser("export", help="Export text dumps")
     export_parser.add_argument("--output-dir", required=True, help="Directory for output text files")
@@ -50,7 +201,37 @@ def main() -> None:
     configure_logging(config.log_level, config.log_file)
 
     if args.command == "run":
+        if not args.job:
+            if args.source == "outlook" and not (args.mailbox and args.folder):
+                parser.error("--mailbox and --folder are required for the outlook source")
+            if args.source == "files" and not args.path:
+                parser.error("--path is required for the files source")
+        if args.events and not args.daemon:
+            parser.error("--events requires --daemon")
         since_dt = parse_datetime(args.since)
+        if args.daemon:
+            specs = load_job_file(args.job) if args.job else [_single_spec(config, args, since_dt)]
+            events = {}
+            if args.events:
+                events = {
+                    spec.name: OutlookItemAddEvents(spec.mailbox, spec.folder)
+                    for spec in specs
+                    if spec.source == "outlook"
+                }
+            daemon = IngestionDaemon(
+                config,
+                specs,
+                poll_seconds=args.poll_seconds or 300,
+                use_checkpoint=args.since_checkpoint,
+                reprocess=args.reprocess,
+                events=events,
+            )
+            daemon.install_signal_handlers()
+            daemon.run()
+            return
+        if args.job:
+            _run_job(config, args)
+            return
         if args.poll_seconds:
             first = True
             while True:
@@ -61,6 +242,10 @@ def main() -> None:
                     since=since_dt if first else None,
                     limit=args.limit,
                     use_checkpoint=args.since_checkpoint or not first,
+                    fetch_mode=args.fetch_mode,
+                    reprocess=args.reprocess,
+                    source=args.source,
+                    source_path=args.path,
                 )
                 first = False
                 time.sleep(args.poll_seconds)
@@ -72,7 +257,60 @@ def main() -> None:
                 since=since_dt,
                 limit=args.limit,
                 use_checkpoint=args.since_checkpoint,
+                fetch_mode=args.fetch_mode,
+                reprocess=args.reprocess,
+                source=args.source,
+                source_path=args.path,
+            )
+    elif args.command == "backfill":
+        if args.source == "outlook" and not (args.mailbox and args.folder):
+            parser.error("--mailbox and --folder are required for the outlook source")
+        if args.source == "files" and not args.path:
+            parser.error("--path is required for the files source")
+        spec = SourceSpec(
+            name=config.checkpoint_name,
+            source=args.source,
+            mailbox=args.mailbox,
+            folder=args.folder,
+            path=args.path,
+            fetch_mode=args.fetch_mode,
+        )
+        run_backfill(
+            config,
+            spec,
+            since=parse_datetime(args.since),
+            until=parse_datetime(args.until),
+            partition_days=args.partition_days,
+            parallel=args.parallel,
+            reprocess=args.reprocess,
+        )
+    elif args.command == "migrate-storage":
+        migrate_blob_layout(
+            make_storage(config),
+            make_session_factory(config.db_url),
+            workers=args.workers,
+            dry_run=args.dry_run,
+        )
+    elif args.command == "compact-storage":
+        storage = make_storage(config)
+        try:
+            storage.packs.compact(min_dead_ratio=args.min_dead_ratio)
+        finally:
+            storage.close()
+    elif args.command == "gc":
+        storage = make_storage(config)
+        try:
+            result = collect_garbage(
+                storage,
+                make_session_factory(config.db_url),
+                grace=timedelta(hours=args.grace_hours),
+                delete=args.delete,
+                workers=args.workers,
+                memory_bytes=args.memory_mb * 1024 * 1024,
             )
+        finally:
+            storage.close()
+        print(json_dumps_safe(result, indent=2))
     elif args.command == "export":
         config = _build_config(config, args)
         configure_logging(config.log_level, config.log_file)
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 
 
@@ -13,6 +13,41 @@ class AppConfig:
     log_level: str = "INFO"
     log_file: str = "email_ingest.log"
     checkpoint_name: str = "outlook_default"
+    attachment_spool_bytes: int = 8 * 1024 * 1024
+    message_memory_budget: int = 64 * 1024 * 1024
+    pipeline_workers: int = 4
+    pipeline_queue_size: int = 16
+    head_processes: int = 0
+    head_pass_paths: bool = False
+    head_isolate: bool = False
+    head_timeout_seconds: float | None = 300.0
+    head_memory_limit_mb: int | None = None
+    head_timeouts: dict[str, float] = field(default_factory=dict)
+    head_memory_limits_mb: dict[str, int] = field(default_factory=dict)
+    db_batch_messages: int = 100
+    db_batch_seconds: float = 5.0
+    head_cache_max_bytes: int = 512 * 1024 * 1024
+    poll_min_seconds: float = 30.0
+    poll_max_seconds: float = 900.0
+    reconcile_seconds: float = 3600.0
+    com_window_items: int = 500
+    namespace_recycle_items: int = 20000
+    address_cache_size: int = 10000
+    address_cache_ttl_hours: float = 168.0
+    cas_fsync: str = "file"
+    pack_threshold_bytes: int = 0
+    cas_compression: str = "none"
+
+
+def _parse_head_map(value: str | None, cast) -> dict:
+    """Parse ``"pdf=60,pptx=30"`` style per-head overrides."""
+    result = {}
+    for part in (value or "").split(","):
+        if "=" not in part:
+            continue
+        name, raw = part.split("=", 1)
+        result[name.strip()] = cast(raw.strip())
+    return result
 
 
 def load_config() -> AppConfig:
@@ -21,10 +56,58 @@ def load_config() -> AppConfig:
     log_level = os.getenv("EMAIL_INGEST_LOG_LEVEL", "INFO")
     log_file = os.getenv("EMAIL_INGEST_LOG_FILE", "email_ingest.log")
     checkpoint_name = os.getenv("EMAIL_INGEST_CHECKPOINT", "outlook_default")
+    attachment_spool_bytes = int(os.getenv("EMAIL_INGEST_ATTACHMENT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+    message_memory_budget = int(os.getenv("EMAIL_INGEST_MESSAGE_MEMORY_BUDGET", str(64 * 1024 * 1024)))
+    pipeline_workers = int(os.getenv("EMAIL_INGEST_WORKERS", "4"))
+    pipeline_queue_size = int(os.getenv("EMAIL_INGEST_QUEUE_SIZE", "16"))
+    head_processes = int(os.getenv("EMAIL_INGEST_HEAD_PROCESSES", "0"))
+    head_pass_paths = os.getenv("EMAIL_INGEST_HEAD_PASS_PATHS", "0").lower() in {"1", "true", "yes"}
+    head_isolate = os.getenv("EMAIL_INGEST_HEAD_ISOLATE", "0").lower() in {"1", "true", "yes"}
+    head_timeout_seconds = float(os.getenv("EMAIL_INGEST_HEAD_TIMEOUT_SECONDS", "300")) or None
+    head_memory_limit_mb = int(os.getenv("EMAIL_INGEST_HEAD_MEMORY_MB", "0")) or None
+    head_timeouts = _parse_head_map(os.getenv("EMAIL_INGEST_HEAD_TIMEOUTS"), float)
+    head_memory_limits_mb = _parse_head_map(os.getenv("EMAIL_INGEST_HEAD_MEMORY_LIMITS"), int)
+    db_batch_messages = int(os.getenv("EMAIL_INGEST_DB_BATCH_MESSAGES", "100"))
+    db_batch_seconds = float(os.getenv("EMAIL_INGEST_DB_BATCH_SECONDS", "5"))
+    head_cache_max_bytes = int(os.getenv("EMAIL_INGEST_HEAD_CACHE_BYTES", str(512 * 1024 * 1024)))
+    poll_min_seconds = float(os.getenv("EMAIL_INGEST_POLL_MIN_SECONDS", "30"))
+    poll_max_seconds = float(os.getenv("EMAIL_INGEST_POLL_MAX_SECONDS", "900"))
+    reconcile_seconds = float(os.getenv("EMAIL_INGEST_RECONCILE_SECONDS", "3600"))
+    com_window_items = int(os.getenv("EMAIL_INGEST_COM_WINDOW_ITEMS", "500"))
+    namespace_recycle_items = int(os.getenv("EMAIL_INGEST_NAMESPACE_RECYCLE_ITEMS", "20000"))
+    address_cache_size = int(os.getenv("EMAIL_INGEST_ADDRESS_CACHE_SIZE", "10000"))
+    address_cache_ttl_hours = float(os.getenv("EMAIL_INGEST_ADDRESS_CACHE_TTL_HOURS", "168"))
+    cas_fsync = os.getenv("EMAIL_INGEST_CAS_FSYNC", "file").lower()
+    pack_threshold_bytes = int(os.getenv("EMAIL_INGEST_PACK_THRESHOLD_BYTES", "0"))
+    cas_compression = os.getenv("EMAIL_INGEST_CAS_COMPRESSION", "none").lower()
     return AppConfig(
         db_url=db_url,
         storage_root=storage_root,
         log_level=log_level,
         log_file=log_file,
         checkpoint_name=checkpoint_name,
+        attachment_spool_bytes=attachment_spool_bytes,
+        message_memory_budget=message_memory_budget,
+        pipeline_workers=pipeline_workers,
+        pipeline_queue_size=pipeline_queue_size,
+        head_processes=head_processes,
+        head_pass_paths=head_pass_paths,
+        head_isolate=head_isolate,
+        head_timeout_seconds=head_timeout_seconds,
+        head_memory_limit_mb=head_memory_limit_mb,
+        head_timeouts=head_timeouts,
+        head_memory_limits_mb=head_memory_limits_mb,
+        db_batch_messages=db_batch_messages,
+        db_batch_seconds=db_batch_seconds,
+        head_cache_max_bytes=head_cache_max_bytes,
+        poll_min_seconds=poll_min_seconds,
+        poll_max_seconds=poll_max_seconds,
+        reconcile_seconds=reconcile_seconds,
+        com_window_items=com_window_items,
+        namespace_recycle_items=namespace_recycle_items,
+        address_cache_size=address_cache_size,
+        address_cache_ttl_hours=address_cache_ttl_hours,
+        cas_fsync=cas_fsync,
+        pack_threshold_bytes=pack_threshold_bytes,
+        cas_compression=cas_compression,
     )
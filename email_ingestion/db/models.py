@@ -133,3 +133,67 @@ class Checkpoint(Base):
 
     name: Mapped[str] = mapped_column(String(64), primary_key=True)
     value: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class HeadResultCacheEntry(Base):
+    __tablename__ = "head_result_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(160), primary_key=True)
+    head_name: Mapped[str] = mapped_column(String(64))
+    head_version: Mapped[str] = mapped_column(String(32))
+    sha256: Mapped[str] = mapped_column(String(64), index=True)
+    artifacts: Mapped[list] = mapped_column(JSON)
+    metrics: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class EmailIdentity(Base):
+    """Location-independent keys (Message-ID, content fingerprint) of an ingested email."""
+
+    __tablename__ = "email_identities"
+
+    identity_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32))
+    email_id: Mapped[str] = mapped_column(ForeignKey("emails.email_id"), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class EmailAlias(Base):
+    """Another Outlook location (after a move or copy) of an already ingested email."""
+
+    __tablename__ = "email_aliases"
+
+    alias_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    email_id: Mapped[str] = mapped_column(ForeignKey("emails.email_id"), index=True)
+    outlook_entry_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    outlook_store_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    matched_by: Mapped[str] = mapped_column(String(32))
+    run_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    linked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AddressCacheEntry(Base):
+    """Exchange X.500 address resolved to its primary SMTP address."""
+
+    __tablename__ = "address_cache"
+
+    address: Mapped[str] = mapped_column(String(1024), primary_key=True)
+    smtp_address: Mapped[str] = mapped_column(Text)
+    resolved_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class BackfillPartition(Base):
+    """One date range of a historical backfill and how far it got."""
+
+    __tablename__ = "backfill_partitions"
+
+    partition_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    backfill_id: Mapped[str] = mapped_column(String(64), index=True)
+    source_name: Mapped[str] = mapped_column(String(256))
+    range_start: Mapped[datetime] = mapped_column(DateTime)
+    range_end: Mapped[datetime] = mapped_column(DateTime)
+    state: Mapped[str] = mapped_column(String(16), default="pending")
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -4,10 +4,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import socket
 import uuid
+from typing import Iterator
 
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, delete, func, select, update
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
@@ -18,9 +20,63 @@ from email_ingestion.db.models import (
     ExtractedArtifact,
     ProcessingEvent,
     Checkpoint,
+    HeadResultCacheEntry,
+    EmailIdentity,
+    EmailAlias,
+    AddressCacheEntry,
+    BackfillPartition,
 )
 
 
+_UPSERT_TARGETS = {
+    "emails": (Email, Email.email_id, True),
+    "attachments": (Attachment, Attachment.attachment_id, True),
+    "extracted_artifacts": (ExtractedArtifact, ExtractedArtifact.artifact_id, False),
+    "processing_events": (ProcessingEvent, ProcessingEvent.event_id, True),
+    "head_result_cache": (HeadResultCacheEntry, HeadResultCacheEntry.cache_key, True),
+    # The first email to claim an identity keeps it.
+    "email_identities": (EmailIdentity, EmailIdentity.identity_key, False),
+    "email_aliases": (EmailAlias, EmailAlias.alias_id, True),
+    "address_cache": (AddressCacheEntry, AddressCacheEntry.address, True),
+    "backfill_partitions": (BackfillPartition, BackfillPartition.partition_id, True),
+}
+_WRITE_ORDER = (
+    "emails",
+    "attachments",
+    "email_identities",
+    "email_aliases",
+    "extracted_artifacts",
+    "processing_events",
+    "head_result_cache",
+    "head_result_cache_touches",
+    "address_cache",
+    "backfill_partitions",
+)
+_TOUCH_HEAD_RESULT = (
+    update(HeadResultCacheEntry)
+    .where(HeadResultCacheEntry.cache_key == bindparam("touch_key"))
+    .values(last_used_at=bindparam("touch_at"))
+)
+
+
+@lru_cache(maxsize=None)
+def _upsert_statement(table: str, columns: frozenset):
+    """Insert-or-update statement for rows carrying exactly ``columns``; built once and reused."""
+    model, key, update_existing = _UPSERT_TARGETS[table]
+    stmt = sqlite_insert(model)
+    if not update_existing:
+        return stmt.on_conflict_do_nothing(index_elements=[key])
+    set_ = {name: stmt.excluded[name] for name in sorted(columns) if name != key.key}
+    return stmt.on_conflict_do_update(index_elements=[key], set_=set_)
+
+
+def _artifact_row(payload: dict) -> dict:
+    if "metadata" in payload and "artifact_metadata" not in payload:
+        payload = dict(payload)
+        payload["artifact_metadata"] = payload.pop("metadata")
+    return payload
+
+
 @dataclass(frozen=True)
 class RunHandle:
     run_id: str
@@ -30,12 +86,13 @@ class Repository:
     def __init__(self, session: Session) -> None:
         self.session = session
 
-    def start_run(self) -> RunHandle:
+    def start_run(self, stats: dict | None = None) -> RunHandle:
         run_id = uuid.uuid4().hex
         run = IngestionRun(
             run_id=run_id,
             started_at=datetime.utcnow(),
             host=socket.gethostname(),
+            stats=stats,
         )
         self.session.add(run)
         self.session.commit()
@@ -50,42 +107,188 @@ class Repository:
         self.session.execute(stmt)
         self.session.commit()
 
-    def upsert_email(self, payload: dict) -> str:
-        stmt = sqlite_insert(Email).values(**payload)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=[Email.email_id],
-            set_=payload,
+    def record_progress(self, run_id: str, stats: dict, checkpoints: dict[str, str] | None = None) -> None:
+        """Persist in-flight run state and any advanced checkpoints in one transaction."""
+        self.session.execute(update(IngestionRun).where(IngestionRun.run_id == run_id).values(stats=stats))
+        for name, value in (checkpoints or {}).items():
+            self._write_checkpoint(name, value)
+        self.session.commit()
+
+    def find_interrupted_run(self, checkpoint_name: str, exclude_run_id: str | None = None) -> tuple[str, dict] | None:
+        """Most recent unfinished run with a not-yet-resumed source on ``checkpoint_name``.
+
+        Returns the run id and that source's entry from ``stats["sources"]``.
+        """
+        stmt = (
+            select(IngestionRun.run_id, IngestionRun.stats)
+            .where(IngestionRun.finished_at.is_(None))
+            .order_by(IngestionRun.started_at.desc())
+            .limit(50)
         )
-        self.session.execute(stmt)
+        for run_id, stats in self.session.execute(stmt).all():
+            if run_id == exclude_run_id or not stats:
+                continue
+            for source_stats in (stats.get("sources") or {}).values():
+                if source_stats.get("checkpoint_name") == checkpoint_name and not source_stats.get("resumed_by"):
+                    return run_id, source_stats
+        return None
+
+    def mark_source_resumed(self, run_id: str, checkpoint_name: str, resumed_by: str) -> None:
+        run = self.session.get(IngestionRun, run_id)
+        if run is None or not run.stats:
+            return
+        stats = dict(run.stats)
+        sources = {name: dict(entry) for name, entry in (stats.get("sources") or {}).items()}
+        for entry in sources.values():
+            if entry.get("checkpoint_name") == checkpoint_name:
+                entry["state"] = "interrupted"
+                entry["resumed_by"] = resumed_by
+        stats["sources"] = sources
+        if all(entry.get("resumed_by") for entry in sources.values()):
+            stats["state"] = "interrupted"
+        self.record_progress(run_id, stats)
+
+    def upsert_email(self, payload: dict) -> str:
+        self.write_rows({"emails": [payload]})
         self.session.commit()
         return payload["email_id"]
 
-    def upsert_attachment(self, payload: dict) -> str:
-        stmt = sqlite_insert(Attachment).values(**payload)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=[Attachment.attachment_id],
-            set_=payload,
+    def count_emails(self) -> int:
+        return self.session.execute(select(func.count()).select_from(Email)).scalar_one()
+
+    def iter_email_ids(self, batch_size: int = 10000) -> Iterator[str]:
+        stmt = select(Email.email_id).execution_options(yield_per=batch_size)
+        for email_id in self.session.execute(stmt).scalars():
+            yield email_id
+
+    def email_exists(self, email_id: str) -> bool:
+        stmt = select(Email.email_id).where(Email.email_id == email_id)
+        return self.session.execute(stmt).first() is not None
+
+    def count_aliases(self) -> int:
+        return self.session.execute(select(func.count()).select_from(EmailAlias)).scalar_one()
+
+    def iter_alias_ids(self, batch_size: int = 10000) -> Iterator[str]:
+        stmt = select(EmailAlias.alias_id).execution_options(yield_per=batch_size)
+        yield from self.session.execute(stmt).scalars()
+
+    def is_known(self, email_id: str) -> bool:
+        """True if ``email_id`` was ingested, either directly or as a moved/copied alias."""
+        if self.email_exists(email_id):
+            return True
+        stmt = select(EmailAlias.alias_id).where(EmailAlias.alias_id == email_id)
+        return self.session.execute(stmt).first() is not None
+
+    def find_identity(self, identity_keys: list[str]) -> tuple[str, str] | None:
+        """``(email_id, kind)`` of the first email holding any of ``identity_keys``."""
+        if not identity_keys:
+            return None
+        stmt = (
+            select(EmailIdentity.email_id, EmailIdentity.kind)
+            .where(EmailIdentity.identity_key.in_(identity_keys))
+            .order_by(EmailIdentity.created_at)
+            .limit(1)
         )
-        self.session.execute(stmt)
+        row = self.session.execute(stmt).first()
+        return (row[0], row[1]) if row else None
+
+    def upsert_attachment(self, payload: dict) -> str:
+        self.write_rows({"attachments": [payload]})
         self.session.commit()
         return payload["attachment_id"]
 
+    def count_attachments(self) -> int:
+        return self.session.execute(select(func.count()).select_from(Attachment)).scalar_one()
+
+    def iter_attachment_sha256s(self, batch_size: int = 10000) -> Iterator[str]:
+        """Every attachment's sha256, with repeats, streamed in batches."""
+        stmt = select(Attachment.sha256).execution_options(yield_per=batch_size)
+        yield from self.session.execute(stmt).scalars()
+
+    def attachment_paths_after(self, after: str, limit: int = 10000) -> list[tuple[str, str, str | None]]:
+        """``(attachment_id, sha256, saved_path)`` for the next ``limit`` attachments by id."""
+        stmt = (
+            select(Attachment.attachment_id, Attachment.sha256, Attachment.saved_path)
+            .where(Attachment.attachment_id > after)
+            .order_by(Attachment.attachment_id)
+            .limit(limit)
+        )
+        return [tuple(row) for row in self.session.execute(stmt)]
+
+    def set_saved_paths(self, paths: dict[str, str]) -> None:
+        """Point attachments at new blob paths, keyed by attachment id; the caller commits."""
+        if paths:
+            stmt = (
+                update(Attachment.__table__)
+                .where(Attachment.__table__.c.attachment_id == bindparam("key"))
+                .values(saved_path=bindparam("path"))
+            )
+            self.session.connection().execute(stmt, [{"key": key, "path": path} for key, path in paths.items()])
+
     def add_artifact(self, payload: dict) -> None:
-        if "metadata" in payload and "artifact_metadata" not in payload:
-            payload["artifact_metadata"] = payload.pop("metadata")
-        stmt = sqlite_insert(ExtractedArtifact).values(**payload)
-        stmt = stmt.on_conflict_do_nothing(index_elements=[ExtractedArtifact.artifact_id])
-        self.session.execute(stmt)
+        self.write_rows({"extracted_artifacts": [payload]})
         self.session.commit()
 
     def add_processing_event(self, payload: dict) -> None:
-        stmt = sqlite_insert(ProcessingEvent).values(**payload)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=[ProcessingEvent.event_id],
-            set_=payload,
+        self.write_rows({"processing_events": [payload]})
+        self.session.commit()
+
+    def write_rows(self, rows_by_table: dict[str, list[dict]]) -> None:
+        """Upsert rows for several tables with one executemany per table, without committing.
+
+        Tables are written parents-first so foreign keys resolve within a batch.
+        """
+        for table in _WRITE_ORDER:
+            rows = rows_by_table.get(table)
+            if not rows:
+                continue
+            if table == "head_result_cache_touches":
+                self.session.connection().execute(
+                    _TOUCH_HEAD_RESULT,
+                    [{"touch_key": row["cache_key"], "touch_at": row["last_used_at"]} for row in rows],
+                )
+                continue
+            if table == "extracted_artifacts":
+                rows = [_artifact_row(row) for row in rows]
+            by_columns: dict[frozenset, list[dict]] = {}
+            for row in rows:
+                by_columns.setdefault(frozenset(row), []).append(row)
+            for columns, group in by_columns.items():
+                self.session.execute(_upsert_statement(table, columns), group)
+
+    def cache_head_result(self, payload: dict) -> None:
+        self.write_rows({"head_result_cache": [payload]})
+        self.session.commit()
+
+    def touch_head_result(self, payload: dict) -> None:
+        self.write_rows({"head_result_cache_touches": [payload]})
+        self.session.commit()
+
+    def get_address(self, address: str) -> AddressCacheEntry | None:
+        return self.session.get(AddressCacheEntry, address)
+
+    def get_head_result(self, cache_key: str) -> HeadResultCacheEntry | None:
+        return self.session.get(HeadResultCacheEntry, cache_key)
+
+    def evict_head_results(self, max_bytes: int) -> int:
+        """Delete least recently used cache entries until the cache fits ``max_bytes``."""
+        total = self.session.execute(select(func.coalesce(func.sum(HeadResultCacheEntry.size_bytes), 0))).scalar_one()
+        if total <= max_bytes:
+            return 0
+        stmt = select(HeadResultCacheEntry.cache_key, HeadResultCacheEntry.size_bytes).order_by(
+            HeadResultCacheEntry.last_used_at
         )
-        self.session.execute(stmt)
+        victims = []
+        for cache_key, size_bytes in self.session.execute(stmt):
+            if total <= max_bytes:
+                break
+            victims.append(cache_key)
+            total -= size_bytes or 0
+        for start in range(0, len(victims), 500):
+            chunk = victims[start : start + 500]
+            self.session.execute(delete(HeadResultCacheEntry).where(HeadResultCacheEntry.cache_key.in_(chunk)))
         self.session.commit()
+        return len(victims)
 
     def get_checkpoint(self, name: str) -> str | None:
         stmt = select(Checkpoint).where(Checkpoint.name == name)
@@ -93,10 +296,31 @@ class Repository:
         return result.value if result else None
 
     def set_checkpoint(self, name: str, value: str) -> None:
+        self._write_checkpoint(name, value)
+        self.session.commit()
+
+    def delete_checkpoints(self, names: list[str]) -> None:
+        if names:
+            self.session.execute(delete(Checkpoint).where(Checkpoint.name.in_(names)))
+            self.session.commit()
+
+    def get_backfill_partitions(self, backfill_id: str) -> list[BackfillPartition]:
+        """Partitions of one backfill, newest range first."""
+        stmt = (
+            select(BackfillPartition)
+            .where(BackfillPartition.backfill_id == backfill_id)
+            .order_by(BackfillPartition.range_start.desc())
+        )
+        return list(self.session.execute(stmt).scalars())
+
+    def save_backfill_partitions(self, rows: list[dict]) -> None:
+        self.write_rows({"backfill_partitions": rows})
+        self.session.commit()
+
+    def _write_checkpoint(self, name: str, value: str) -> None:
         stmt = sqlite_insert(Checkpoint).values(name=name, value=value)
         stmt = stmt.on_conflict_do_update(
             index_elements=[Checkpoint.name],
             set_={"value": value},
         )
         self.session.execute(stmt)
-        self.session.commit()
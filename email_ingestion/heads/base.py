@@ -3,7 +3,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Iterable, Protocol
+import io
+from typing import BinaryIO, Iterable, Protocol
+
+from email_ingestion.normalize.context import MessageContext
+from email_ingestion.storage.compression import open_blob
 
 
 @dataclass
@@ -19,6 +23,30 @@ class HeadInput:
     attachment_bytes: bytes | None = None
     attachment_content_id: str | None = None
     received_at: object | None = None
+    attachment_path: str | None = None
+    # Derived data shared with the orchestrator and the message's other heads.
+    context: MessageContext | None = None
+
+    @property
+    def has_attachment(self) -> bool:
+        return bool(self.attachment_bytes) or bool(self.attachment_path)
+
+    def open_attachment(self) -> BinaryIO:
+        """Open the attachment as a seekable binary stream.
+
+        Large attachments are handed over as a storage path rather than bytes so
+        heads can stream them without holding the whole payload in memory.
+        """
+        if self.attachment_bytes is not None:
+            return io.BytesIO(self.attachment_bytes)
+        if self.attachment_path:
+            # Stored blobs may be compressed on disk.
+            return open_blob(self.attachment_path)
+        raise ValueError("HeadInput has no attachment payload")
+
+    def read_attachment(self) -> bytes:
+        with self.open_attachment() as handle:
+            return handle.read()
 
 
 @dataclass
@@ -39,6 +67,13 @@ class HeadResult:
 class Head(Protocol):
     name: str
     supported_extensions: set[str] | None
+    # Bump when output changes so cached results for older versions are ignored.
+    version: str
+    # CPU-heavy heads may be dispatched to a process pool by the orchestrator.
+    cpu_bound: bool
+    # Results may be reused for other attachments with the same bytes; only
+    # for heads whose output ignores filename, content id and message fields.
+    cacheable: bool
 
     def process(self, head_input: HeadInput) -> HeadResult:
         ...
@@ -9,6 +9,9 @@ from email_ingestion.normalize.calendar import parse_ics, merge_calendar_fields,
 class CalendarInviteHead:
     name = "calendar_invite"
     supported_extensions = {"ics"}
+    version = "1"
+    cpu_bound = False
+    cacheable = True
 
     def process(self, head_input: HeadInput) -> HeadResult:
         details = CalendarDetails(
@@ -19,8 +22,11 @@ class CalendarInviteHead:
             organizer=None,
             attendees=None,
         )
-        if head_input.attachment_bytes and head_input.attachment_ext == "ics":
-            details = parse_ics(head_input.attachment_bytes)
+        if head_input.has_attachment and head_input.attachment_ext == "ics":
+            if head_input.context is not None and head_input.attachment_id:
+                details = head_input.context.calendar(head_input.attachment_id, head_input.read_attachment)
+            else:
+                details = parse_ics(head_input.read_attachment())
 
         fallback = {
             "start": None,
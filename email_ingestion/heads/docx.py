@@ -2,23 +2,25 @@
 
 from __future__ import annotations
 
-import io
-
 from email_ingestion.heads.base import HeadInput, HeadResult, Artifact
 
 
 class DocxHead:
     name = "docx"
     supported_extensions = {"docx"}
+    version = "1"
+    cpu_bound = True
+    cacheable = True
 
     def process(self, head_input: HeadInput) -> HeadResult:
-        if not head_input.attachment_bytes:
+        if not head_input.has_attachment:
             return HeadResult()
         try:
             from docx import Document  # type: ignore
         except Exception as exc:  # pragma: no cover - import guard
             raise RuntimeError("Missing dependency: python-docx") from exc
-        doc = Document(io.BytesIO(head_input.attachment_bytes))
+        with head_input.open_attachment() as stream:
+            doc = Document(stream)
         paragraphs = [para.text for para in doc.paragraphs if para.text]
         table_text = []
         for table in doc.tables:
@@ -9,12 +9,19 @@ from email_ingestion.normalize.email import html_to_text, extract_links
 class EmailBodyHead:
     name = "email_body"
     supported_extensions = None
+    version = "1"
+    cpu_bound = False
+    cacheable = False
 
     def process(self, head_input: HeadInput) -> HeadResult:
-        normalized_text = head_input.body_text
-        if head_input.body_html:
-            normalized_text = html_to_text(head_input.body_html) or normalized_text
-        links = extract_links(head_input.body_text, head_input.body_html)
+        if head_input.context is not None:
+            normalized_text = head_input.context.normalized_text
+            links = head_input.context.links
+        else:
+            normalized_text = head_input.body_text
+            if head_input.body_html:
+                normalized_text = html_to_text(head_input.body_html) or normalized_text
+            links = extract_links(head_input.body_text, head_input.body_html)
         artifacts = [
             Artifact(artifact_type="text", text=normalized_text),
             Artifact(artifact_type="link", payload={"links": links}),
@@ -8,6 +8,9 @@ from email_ingestion.heads.base import HeadInput, HeadResult, Artifact
 class ImageHead:
     name = "image"
     supported_extensions = {"png", "jpg", "jpeg", "gif", "tif", "tiff", "bmp"}
+    version = "1"
+    cpu_bound = False
+    cacheable = False
 
     def process(self, head_input: HeadInput) -> HeadResult:
         metadata = {
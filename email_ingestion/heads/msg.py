@@ -2,17 +2,22 @@
 
 from __future__ import annotations
 
+import shutil
 import tempfile
 import os
 
 from datetime import date, datetime
 
 from email_ingestion.heads.base import HeadInput, HeadResult, Artifact
+from email_ingestion.storage.compression import is_encoded
 
 
 class MsgHead:
     name = "msg"
     supported_extensions = {"msg"}
+    version = "1"
+    cpu_bound = True
+    cacheable = True
 
     def _safe_get(self, msg, attr: str):
         try:
@@ -21,20 +26,27 @@ class MsgHead:
             return None
 
     def process(self, head_input: HeadInput) -> HeadResult:
-        if not head_input.attachment_bytes:
+        if not head_input.has_attachment:
             return HeadResult()
         try:
             import extract_msg  # type: ignore
         except Exception as exc:  # pragma: no cover - import guard
             raise RuntimeError("Missing dependency: extract-msg") from exc
-        handle = tempfile.NamedTemporaryFile(delete=False, suffix=".msg")
+        handle = None
         msg = None
         payload = {}
         body = None
         try:
-            handle.write(head_input.attachment_bytes)
-            handle.close()
-            msg = extract_msg.Message(handle.name)
+            path = head_input.attachment_path
+            if path and head_input.attachment_bytes is None and not is_encoded(path):
+                msg_path = path
+            else:
+                handle = tempfile.NamedTemporaryFile(delete=False, suffix=".msg")
+                with head_input.open_attachment() as stream:
+                    shutil.copyfileobj(stream, handle)
+                handle.close()
+                msg_path = handle.name
+            msg = extract_msg.Message(msg_path)
             if hasattr(msg, "process"):
                 msg.process()
             date_value = self._safe_get(msg, "date")
@@ -54,9 +66,10 @@ class MsgHead:
                     msg.close()
             except Exception:
                 pass
-            try:
-                os.unlink(handle.name)
-            except Exception:
-                pass
+            if handle is not None:
+                try:
+                    os.unlink(handle.name)
+                except Exception:
+                    pass
         artifacts = [Artifact(artifact_type="msg_embedded", payload=payload, text=body)]
         return HeadResult(artifacts=artifacts)
@@ -2,23 +2,25 @@
 
 from __future__ import annotations
 
-import io
-
 from email_ingestion.heads.base import HeadInput, HeadResult, Artifact
 
 
 class PptxHead:
     name = "pptx"
     supported_extensions = {"pptx"}
+    version = "1"
+    cpu_bound = True
+    cacheable = True
 
     def process(self, head_input: HeadInput) -> HeadResult:
-        if not head_input.attachment_bytes:
+        if not head_input.has_attachment:
             return HeadResult()
         try:
             from pptx import Presentation  # type: ignore
         except Exception as exc:  # pragma: no cover - import guard
             raise RuntimeError("Missing dependency: python-pptx") from exc
-        pres = Presentation(io.BytesIO(head_input.attachment_bytes))
+        with head_input.open_attachment() as stream:
+            pres = Presentation(stream)
         chunks = []
         for slide in pres.slides:
             for shape in slide.shapes:
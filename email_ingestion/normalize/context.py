@@ -0,0 +1,81 @@
+"""Per-message derived data shared by the orchestrator and heads."""
+
+from __future__ import annotations
+
+from collections import Counter
+import threading
+from typing import Callable
+
+from email_ingestion.normalize.calendar import CalendarDetails, parse_ics
+from email_ingestion.normalize.email import extract_links, html_to_text
+
+
+class ParseCounter:
+    """Thread-safe tally of expensive parses, reported in the run stats."""
+
+    def __init__(self) -> None:
+        self._counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+_MISSING = object()
+
+
+class MessageContext:
+    """Memoizes body normalization, link extraction and ``.ics`` parsing for one message.
+
+    Each value is computed on first use and reused by every later caller, so a
+    message's HTML is parsed once no matter how many heads look at it.
+    """
+
+    def __init__(
+        self,
+        body_text: str | None,
+        body_html: str | None,
+        counter: ParseCounter | None = None,
+    ) -> None:
+        self.body_text = body_text
+        self.body_html = body_html
+        self.counter = counter
+        self._values: dict[str, object] = {}
+
+    def _memo(self, key: str, compute: Callable[[], object]):
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            if self.counter:
+                self.counter.record(key.split(":", 1)[0])
+            try:
+                value = compute()
+            except Exception as exc:
+                value = exc
+            self._values[key] = value
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    @property
+    def normalized_text(self) -> str | None:
+        html_text = self._memo("html_to_text", lambda: html_to_text(self.body_html)) if self.body_html else None
+        return html_text or self.body_text
+
+    @property
+    def links(self) -> list[str]:
+        return self._memo("extract_links", lambda: extract_links(self.body_text, self.body_html))
+
+    def calendar(self, key: str, read: Callable[[], bytes]) -> CalendarDetails:
+        """Parsed ``.ics`` attachment identified by ``key``; ``read`` supplies its bytes."""
+        return self._memo(f"parse_ics:{key}", lambda: parse_ics(read()))
+
+    def __getstate__(self) -> dict:
+        # Pickled into head worker processes: keep the memoized values, drop the lock-holding counter.
+        state = dict(self.__dict__)
+        state["counter"] = None
+        return state
@@ -0,0 +1,125 @@
+"""Exchange address resolution with an in-process LRU over a persistent cache."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+import time
+from typing import Callable
+
+from email_ingestion.db.repo import Repository
+
+
+PR_SMTP_ADDRESS = "http://schemas.microsoft.com/mapi/proptag/0x39FE001F"
+PR_SENDER_SMTP_ADDRESS = "http://schemas.microsoft.com/mapi/proptag/0x5D01001F"
+
+
+def is_smtp_address(address: str | None) -> bool:
+    """False for Exchange X.500 DNs (``/o=.../cn=...``) and anything without an ``@``."""
+    return bool(address) and "@" in address and not address.startswith("/")
+
+
+class AddressResolver:
+    """Map Exchange X.500 DNs to primary SMTP addresses.
+
+    Lookups go through an LRU of ``max_entries`` DNs, then the ``address_cache``
+    table (entries older than ``ttl`` are looked up again), and only then to
+    the caller's ``lookup``: the slow cross-process Exchange call. An address
+    that cannot be resolved is returned as given, and is not looked up again
+    for ``failure_ttl`` so a run does not retry it per item; failures are
+    never cached beyond that. New resolutions are written by :meth:`flush` on
+    the DB writer thread. Safe to share between fetch threads.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_entries: int = 10000,
+        ttl: timedelta = timedelta(days=7),
+        failure_ttl: timedelta = timedelta(minutes=5),
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._lru: OrderedDict[str, str] = OrderedDict()
+        # Unresolvable address -> time.monotonic() after which it is looked up again.
+        self._failed: dict[str, float] = {}
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "db_hits": 0, "lookups": 0, "failures": 0, "negative_hits": 0}
+
+    def resolve(self, address: str | None, lookup: Callable[[], str | None]) -> str | None:
+        """SMTP address for ``address``; SMTP and unresolvable addresses are returned unchanged."""
+        if not address or is_smtp_address(address):
+            return address
+        key = address.strip().lower()
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._lru[key]
+            retry_at = self._failed.get(key)
+            if retry_at is not None:
+                if time.monotonic() < retry_at:
+                    # Not a resolution, so kept out of hit_rate.
+                    self._stats["negative_hits"] += 1
+                    return address
+                del self._failed[key]
+        smtp = self._from_db(key)
+        if smtp is not None:
+            self._count("db_hits")
+        else:
+            self._count("lookups")
+            try:
+                smtp = lookup() or None
+            except Exception:
+                smtp = None
+            if smtp is None:
+                with self._lock:
+                    self._stats["failures"] += 1
+                    self._failed[key] = time.monotonic() + self.failure_ttl.total_seconds()
+                    if len(self._failed) > self.max_entries:
+                        del self._failed[next(iter(self._failed))]
+                return address
+            with self._lock:
+                self._pending[key] = {"address": key, "smtp_address": smtp, "resolved_at": datetime.utcnow()}
+        self._remember(key, smtp)
+        return smtp
+
+    def flush(self, repo: Repository) -> None:
+        """Write resolutions made since the last flush; the caller commits."""
+        with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+        if rows:
+            repo.write_rows({"address_cache": rows})
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["memory_hits"] + stats["db_hits"] + stats["lookups"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / total, 4) if total else None
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def _from_db(self, key: str) -> str | None:
+        with self.session_factory() as session:
+            entry = Repository(session).get_address(key)
+            if entry is None or entry.resolved_at < datetime.utcnow() - self.ttl:
+                return None
+            return entry.smtp_address
+
+    def _remember(self, key: str, smtp: str) -> None:
+        with self._lock:
+            self._lru[key] = smtp
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
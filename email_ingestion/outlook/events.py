@@ -0,0 +1,88 @@
+"""New-item notifications from an Outlook folder."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Protocol
+
+from email_ingestion.outlook.mapi import com_apartment, get_namespace, resolve_shared_folder
+
+
+logger = logging.getLogger(__name__)
+
+NewItemCallback = Callable[[str, str], None]
+
+
+class NewItemEvents(Protocol):
+    """Pushes ``(entry_id, store_id)`` of items added to one folder.
+
+    Delivery is best effort: events can be dropped while Outlook is busy,
+    offline or restarting, so consumers still reconcile by polling.
+    """
+
+    def start(self, callback: NewItemCallback) -> None:
+        ...
+
+    def stop(self) -> None:
+        ...
+
+
+class OutlookItemAddEvents:
+    """Subscribe to ``Items.ItemAdd`` of a shared folder.
+
+    COM events are only delivered to the apartment that subscribed and only
+    while it pumps messages, so the subscription lives on its own thread. The
+    ``Items`` collection is kept referenced for as long as the subscription
+    should stay alive; Outlook silently drops events for collected proxies.
+    """
+
+    def __init__(self, mailbox: str, folder_path: str, pump_seconds: float = 0.1) -> None:
+        self.mailbox = mailbox
+        self.folder_path = folder_path
+        self.pump_seconds = pump_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, callback: NewItemCallback) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._main, args=(callback,), name=f"ingest-events-{self.folder_path}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _main(self, callback: NewItemCallback) -> None:
+        try:
+            import pythoncom  # type: ignore
+            import win32com.client  # type: ignore
+        except Exception:  # pragma: no cover - platform specific
+            logger.error("pywin32 is required for Outlook item events; relying on polling")
+            return
+
+        class _Handler:
+            def OnItemAdd(self, item) -> None:  # noqa: N802 - COM event name
+                try:
+                    callback(item.EntryID, item.Parent.StoreID)
+                except Exception:
+                    logger.exception("Failed to read new Outlook item")
+
+        with com_apartment():
+            try:
+                folder = resolve_shared_folder(get_namespace(), self.mailbox, self.folder_path)
+                items = folder.Items
+                subscription = win32com.client.WithEvents(items, _Handler)
+            except Exception:
+                logger.exception("Cannot subscribe to %s/%s; relying on polling", self.mailbox, self.folder_path)
+                return
+            logger.info("Listening for new items in %s/%s", self.mailbox, self.folder_path)
+            while not self._stop.is_set():
+                pythoncom.PumpWaitingMessages()
+                time.sleep(self.pump_seconds)
+            del subscription, items
@@ -7,9 +7,13 @@ from datetime import datetime
 import logging
 import tempfile
 import os
-from typing import Iterator
+import time
+from typing import Callable, Iterator, Sequence
 
-from email_ingestion.outlook.mapi import get_namespace, resolve_shared_folder
+from email_ingestion.outlook.addresses import PR_SENDER_SMTP_ADDRESS, PR_SMTP_ADDRESS, AddressResolver
+from email_ingestion.outlook.mapi import get_namespace, resolve_shared_folder, received_time_filter
+from email_ingestion.storage.cas import ContentAddressedStorage, StoredFile
+from email_ingestion.util.time import as_wall_clock
 
 
 logger = logging.getLogger(__name__)
@@ -17,15 +21,58 @@ logger = logging.getLogger(__name__)
 
 CONTENT_ID_PROP = "http://schemas.microsoft.com/mapi/proptag/0x3712001F"
 ATTACH_FLAGS_PROP = "http://schemas.microsoft.com/mapi/proptag/0x7FFD0003"
+ATTACH_DATA_BIN_PROP = "http://schemas.microsoft.com/mapi/proptag/0x37010102"
+INTERNET_MESSAGE_ID_PROP = "http://schemas.microsoft.com/mapi/proptag/0x1035001F"
+TRANSPORT_HEADERS_PROP = "http://schemas.microsoft.com/mapi/proptag/0x007D001F"
+
+# PropertyAccessor cannot return large binary properties (it fails with an
+# out-of-memory error), so bigger attachments go through SaveAsFile.
+PROPERTY_READ_MAX_BYTES = 64 * 1024
+
+FETCH_MODES = ("items", "table")
+
+# Columns pulled in a single Folder.GetTable pass; bodies and attachments are
+# not available through a Table and are loaded per item on demand.
+TABLE_COLUMNS = (
+    "EntryID",
+    "ReceivedTime",
+    "SentOn",
+    "Subject",
+    "SenderName",
+    "SenderEmailAddress",
+    "To",
+    "CC",
+    "BCC",
+    "MessageClass",
+    "Size",
+)
+OL_USER_ITEMS = 0
+# Recipient.Type: olTo/olCC/olBCC on mail items; olOrganizer/olRequired/
+# olOptional/olResource on meeting items, where 3 is a room, not a blind copy.
+RECIPIENT_FIELDS = {1: "to", 2: "cc", 3: "bcc"}
+MEETING_RECIPIENT_FIELDS = {1: "to", 2: "cc"}
+
+# Items walked per Items collection, and per Outlook namespace, in items mode.
+WINDOW_ITEMS = 500
+RECYCLE_ITEMS = 20000
+LATENCY_TRACE_ITEMS = 1000
 
 
 @dataclass
 class OutlookAttachment:
     filename: str
-    data: bytes
+    data: bytes | None
     size: int | None
     content_id: str | None
     is_inline: bool
+    stored: StoredFile | None = None
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        if self.stored is not None:
+            return self.stored.read_bytes()
+        return b""
 
 
 @dataclass
@@ -52,6 +99,75 @@ class OutlookMessage:
     meeting_organizer: str | None
     meeting_recipients: list[str] | None
     attachments: list[OutlookAttachment] = field(default_factory=list)
+    size: int | None = None
+    source_system: str = "outlook"
+    internet_message_id: str | None = None
+    raw_headers: str | None = None
+    # email_id of an existing email this item is a moved or copied version of.
+    duplicate_of: str | None = None
+    loader: Callable[["OutlookMessage"], None] | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def details_loaded(self) -> bool:
+        return self.loader is None
+
+    def load_details(self) -> None:
+        """Pull bodies, meeting fields and attachments if they were deferred."""
+        if self.loader is None:
+            return
+        loader, self.loader = self.loader, None
+        loader(self)
+
+
+class OutlookSession:
+    """Outlook namespace and resolved folders kept warm across fetches.
+
+    Must only be used from the COM thread that first touched it (see
+    :class:`~email_ingestion.outlook.mapi.ComThread`).
+    """
+
+    def __init__(self) -> None:
+        self._namespace = None
+        self._folders: dict[tuple[str, str], object] = {}
+
+    def namespace(self):
+        if self._namespace is None:
+            self._namespace = get_namespace()
+        return self._namespace
+
+    def folder(self, mailbox: str, folder_path: str):
+        key = (mailbox, folder_path)
+        if key not in self._folders:
+            self._folders[key] = resolve_shared_folder(self.namespace(), mailbox, folder_path)
+        return self._folders[key]
+
+    def reset(self) -> None:
+        """Drop cached COM objects, e.g. after Outlook restarted."""
+        self._namespace = None
+        self._folders.clear()
+
+
+class LatencyTrace:
+    """Mean fetch time per block of ``every`` items.
+
+    Only time spent inside the fetcher counts, not time the consumer holds
+    the generator, so a rising trace means Outlook itself is slowing down.
+    """
+
+    def __init__(self, every: int = LATENCY_TRACE_ITEMS) -> None:
+        self.every = every
+        self.blocks: list[float] = []
+        self._count = 0
+        self._elapsed = 0.0
+
+    def add(self, seconds: float) -> None:
+        self._count += 1
+        self._elapsed += seconds
+        if self._count % self.every == 0:
+            per_item_ms = round(self._elapsed * 1000 / self.every, 3)
+            self.blocks.append(per_item_ms)
+            self._elapsed = 0.0
+            logger.info("Outlook items %s-%s: %.1f ms/item", self._count - self.every + 1, self._count, per_item_ms)
 
 
 class OutlookFetcher:
@@ -61,58 +177,287 @@ class OutlookFetcher:
         folder_path: str,
         since: datetime | None = None,
         limit: int | None = None,
+        fetch_mode: str = "items",
+        skip_entry: Callable[[str, str], bool] | None = None,
+        storage: ContentAddressedStorage | None = None,
+        property_read_max_bytes: int = PROPERTY_READ_MAX_BYTES,
+        spool_threshold: int | None = None,
+        memory_budget: int | None = None,
+        ascending: bool = False,
+        session: OutlookSession | None = None,
+        entry_ids: Sequence[tuple[str, str]] | None = None,
+        window_items: int = WINDOW_ITEMS,
+        recycle_items: int = RECYCLE_ITEMS,
+        resolve_message_id: Callable[[str | None], str | None] | None = None,
+        addresses: AddressResolver | None = None,
+        until: datetime | None = None,
     ) -> None:
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{fetch_mode}'. Expected one of {FETCH_MODES}")
         self.mailbox = mailbox
         self.folder_path = folder_path
         self.since = since
+        self.until = until
         self.limit = limit
+        self.fetch_mode = fetch_mode
+        self.skip_entry = skip_entry
+        self.storage = storage
+        self.property_read_max_bytes = property_read_max_bytes
+        self.spool_threshold = spool_threshold
+        self.memory_budget = memory_budget
+        self.ascending = ascending
+        self.session = session
+        self.entry_ids = list(entry_ids or [])
+        self.window_items = window_items
+        self.recycle_items = recycle_items
+        self.resolve_message_id = resolve_message_id
+        self.addresses = addresses
+        self.trace = LatencyTrace()
+        self.stats = {
+            "skipped_known": 0,
+            "moved_known": 0,
+            "namespace_recycles": 0,
+            "item_latency_ms": self.trace.blocks,
+        }
+
+    @property
+    def ordered(self) -> bool:
+        return self.ascending and not self.entry_ids
+
+    @property
+    def checkpoints(self) -> bool:
+        # Pushed entry IDs say nothing about older items that may have been missed.
+        return not self.entry_ids
 
     def iter_messages(self) -> Iterator[OutlookMessage]:
-        namespace = get_namespace()
-        folder = resolve_shared_folder(namespace, self.mailbox, self.folder_path)
-        items = folder.Items
-        items.Sort("[ReceivedTime]", True)
+        if self.session is not None:
+            namespace = self.session.namespace()
+            folder = self.session.folder(self.mailbox, self.folder_path)
+        else:
+            namespace = get_namespace()
+            folder = resolve_shared_folder(namespace, self.mailbox, self.folder_path)
+        if self.entry_ids:
+            yield from self._iter_entries(namespace)
+            return
+        if self.fetch_mode == "table":
+            yield from self._iter_table(namespace, folder)
+            return
+        yield from self._iter_items(folder)
+
+    def _iter_items(self, folder) -> Iterator[OutlookMessage]:
+        """Walk ``folder`` with GetFirst/GetNext in windows of ``window_items``.
+
+        Each window opens a fresh restricted ``Items`` collection starting at
+        the received time where the previous one stopped, so Outlook can drop
+        the proxies it keeps per collection instead of accumulating them over
+        a 100k-item scan. Every ``recycle_items`` the namespace and folder are
+        re-created as well.
+        """
+        since = as_wall_clock(self.since)
+        until = as_wall_clock(self.until)
+        boundary: datetime | None = None
+        boundary_ids: set[str] = set()
         count = 0
-        for item in items:
+        walked = 0
+        while True:
+            items = self._restricted_items(folder, boundary)
+            items.Sort("[ReceivedTime]", not self.ascending)
+            window = 0
+            tail_time: datetime | None = None
+            tail_ids: set[str] = set()
+            started = time.perf_counter()
+            item = items.GetFirst()
+            while item is not None:
+                received = as_wall_clock(getattr(item, "ReceivedTime", None))
+                entry_id = getattr(item, "EntryID", None)
+                if since is not None and received is not None and received < since and not self.ascending:
+                    # Items are sorted newest-first, so nothing after this qualifies.
+                    return
+                if until is not None and received is not None and received > until and self.ascending:
+                    return
+                if not self._before_boundary(received, entry_id, since, until, boundary, boundary_ids):
+                    window += 1
+                    if received is not None:
+                        if received != tail_time:
+                            tail_time, tail_ids = received, set()
+                        tail_ids.add(entry_id)
+                    message = None
+                    if not self._should_skip(entry_id, getattr(item, "StoreID", None)):
+                        try:
+                            message = self._convert_item(item)
+                        except Exception:
+                            logger.exception("Failed to convert Outlook item")
+                    self.trace.add(time.perf_counter() - started)
+                    if message is not None:
+                        yield message
+                        count += 1
+                        if self.limit and count >= self.limit:
+                            return
+                    if self.window_items and window >= self.window_items and tail_time is not None:
+                        break
+                started = time.perf_counter()
+                item = items.GetNext()
+            if item is None:
+                return
+            # Release this window's collection and item before opening the next.
+            item = items = None
+            if tail_time == boundary:
+                tail_ids |= boundary_ids
+            boundary, boundary_ids = tail_time, tail_ids
+            walked += window
+            if self.recycle_items and walked >= self.recycle_items:
+                walked = 0
+                folder = self._recycle_folder()
+
+    def _before_boundary(
+        self,
+        received: datetime | None,
+        entry_id: str | None,
+        since: datetime | None,
+        until: datetime | None,
+        boundary: datetime | None,
+        boundary_ids: set[str],
+    ) -> bool:
+        """True for items already walked in an earlier window, or outside ``since``/``until``."""
+        if entry_id in boundary_ids:
+            return True
+        if received is None:
+            return False
+        if self.ascending:
+            lower = max(since, boundary) if since and boundary else since or boundary
+            return lower is not None and received < lower
+        upper = min(until, boundary) if until and boundary else until or boundary
+        return upper is not None and received > upper
+
+    def _recycle_folder(self):
+        logger.info("Recycling Outlook namespace for %s/%s", self.mailbox, self.folder_path)
+        self.stats["namespace_recycles"] += 1
+        if self.session is not None:
+            self.session.reset()
+            return self.session.folder(self.mailbox, self.folder_path)
+        return resolve_shared_folder(get_namespace(), self.mailbox, self.folder_path)
+
+    def _iter_entries(self, namespace) -> Iterator[OutlookMessage]:
+        for entry_id, store_id in self.entry_ids:
+            if self._should_skip(entry_id, store_id):
+                continue
             try:
+                item = namespace.GetItemFromID(entry_id, store_id)
                 message = self._convert_item(item)
             except Exception:
-                logger.exception("Failed to convert Outlook item")
-                continue
-            if self.since and message.received_time and message.received_time < self.since:
+                logger.exception("Failed to load Outlook item %s", entry_id)
                 continue
             yield message
+
+    def _should_skip(self, entry_id: str | None, store_id: str | None) -> bool:
+        if self.skip_entry is None or not entry_id:
+            return False
+        if self.skip_entry(entry_id, store_id or ""):
+            self.stats["skipped_known"] += 1
+            return True
+        return False
+
+    def _restricted_items(self, folder, boundary: datetime | None = None):
+        items = folder.Items
+        since, until = self.since, self.until
+        if boundary is not None:
+            if self.ascending:
+                since = boundary
+            else:
+                until = min(as_wall_clock(until), boundary) if until is not None else boundary
+        restriction = received_time_filter(since, until)
+        if not restriction:
+            return items
+        try:
+            return items.Restrict(restriction)
+        except Exception:
+            logger.warning("Items.Restrict failed for %r; scanning unrestricted", restriction, exc_info=True)
+            return items
+
+    def _iter_table(self, namespace, folder) -> Iterator[OutlookMessage]:
+        table = folder.GetTable(received_time_filter(self.since, self.until) or "", OL_USER_ITEMS)
+        table.Columns.RemoveAll()
+        for column in TABLE_COLUMNS:
+            table.Columns.Add(column)
+        try:
+            table.Columns.Add(INTERNET_MESSAGE_ID_PROP)
+        except Exception:
+            logger.debug("Message-ID column unavailable for %s", self.folder_path)
+        table.Sort("[ReceivedTime]", not self.ascending)
+        store_id = getattr(folder, "StoreID", None) or ""
+        since = as_wall_clock(self.since)
+        until = as_wall_clock(self.until)
+        count = 0
+        while not table.EndOfTable:
+            row = table.GetNextRow()
+            if row is None:
+                break
+            try:
+                values = {column: row.Item(column) for column in TABLE_COLUMNS}
+            except Exception:
+                logger.exception("Failed to read Outlook table row")
+                continue
+            received = as_wall_clock(values["ReceivedTime"])
+            if since is not None and received is not None and received < since:
+                if self.ascending:
+                    continue
+                break
+            if until is not None and received is not None and received > until:
+                if self.ascending:
+                    break
+                continue
+            if self._should_skip(values.get("EntryID"), store_id):
+                continue
+            try:
+                values["internet_message_id"] = row.Item(INTERNET_MESSAGE_ID_PROP)
+            except Exception:
+                values["internet_message_id"] = None
+            yield self._message_from_row(namespace, store_id, values)
             count += 1
             if self.limit and count >= self.limit:
                 break
 
+    def _message_from_row(self, namespace, store_id: str, values: dict) -> OutlookMessage:
+        message_class = values.get("MessageClass")
+
+        def load(message: OutlookMessage) -> None:
+            item = namespace.GetItemFromID(message.entry_id, message.store_id or None)
+            self._apply_item_details(message, item)
+
+        message = OutlookMessage(
+            entry_id=values.get("EntryID") or "",
+            store_id=store_id,
+            received_time=values.get("ReceivedTime"),
+            sent_time=values.get("SentOn"),
+            subject=values.get("Subject"),
+            sender_name=values.get("SenderName"),
+            sender_email=values.get("SenderEmailAddress"),
+            to=values.get("To"),
+            cc=values.get("CC"),
+            bcc=values.get("BCC"),
+            conversation_id=None,
+            body_text=None,
+            body_html=None,
+            message_class=message_class,
+            is_meeting=bool(message_class and message_class.startswith("IPM.Schedule")),
+            meeting_start=None,
+            meeting_end=None,
+            meeting_timezone=None,
+            meeting_location=None,
+            meeting_organizer=None,
+            meeting_recipients=None,
+            size=values.get("Size"),
+            internet_message_id=values.get("internet_message_id"),
+            loader=load,
+        )
+        self._resolve_duplicate(message)
+        return message
+
     def _convert_item(self, item) -> OutlookMessage:
-        entry_id = getattr(item, "EntryID", None)
-        store_id = getattr(item, "StoreID", None)
         message_class = getattr(item, "MessageClass", None)
-        is_meeting = message_class and message_class.startswith("IPM.Schedule")
-        meeting_start = getattr(item, "Start", None) if is_meeting else None
-        meeting_end = getattr(item, "End", None) if is_meeting else None
-        meeting_timezone = None
-        if is_meeting:
-            try:
-                tz = getattr(item, "StartTimeZone", None)
-                if tz is not None:
-                    meeting_timezone = getattr(tz, "ID", None) or getattr(tz, "Name", None)
-            except Exception:
-                meeting_timezone = None
-        meeting_location = getattr(item, "Location", None) if is_meeting else None
-        meeting_organizer = getattr(item, "Organizer", None) if is_meeting else None
-        meeting_recipients = None
-        try:
-            if is_meeting and getattr(item, "Recipients", None):
-                meeting_recipients = [recip.Address for recip in item.Recipients]
-        except Exception:
-            meeting_recipients = None
-        attachments = self._extract_attachments(item)
-        return OutlookMessage(
-            entry_id=entry_id or "",
-            store_id=store_id or "",
+        message = OutlookMessage(
+            entry_id=getattr(item, "EntryID", None) or "",
+            store_id=getattr(item, "StoreID", None) or "",
             received_time=getattr(item, "ReceivedTime", None),
             sent_time=getattr(item, "SentOn", None),
             subject=getattr(item, "Subject", None),
@@ -121,38 +466,129 @@ class OutlookFetcher:
             to=getattr(item, "To", None),
             cc=getattr(item, "CC", None),
             bcc=getattr(item, "BCC", None),
-            conversation_id=getattr(item, "ConversationID", None),
-            body_text=getattr(item, "Body", None),
-            body_html=getattr(item, "HTMLBody", None),
+            conversation_id=None,
+            body_text=None,
+            body_html=None,
             message_class=message_class,
-            is_meeting=bool(is_meeting),
-            meeting_start=meeting_start,
-            meeting_end=meeting_end,
-            meeting_timezone=meeting_timezone,
-            meeting_location=meeting_location,
-            meeting_organizer=meeting_organizer,
-            meeting_recipients=meeting_recipients,
-            attachments=attachments,
+            is_meeting=bool(message_class and message_class.startswith("IPM.Schedule")),
+            meeting_start=None,
+            meeting_end=None,
+            meeting_timezone=None,
+            meeting_location=None,
+            meeting_organizer=None,
+            meeting_recipients=None,
+            size=getattr(item, "Size", None),
+            internet_message_id=_item_property(item, INTERNET_MESSAGE_ID_PROP),
         )
+        if not self._resolve_duplicate(message):
+            self._apply_item_details(message, item)
+        return message
+
+    def _resolve_duplicate(self, message: OutlookMessage) -> bool:
+        """Mark a moved or copied item so its bodies and attachments are never read."""
+        if self.resolve_message_id is None or not message.internet_message_id:
+            return False
+        existing = self.resolve_message_id(message.internet_message_id)
+        if existing is None:
+            return False
+        message.duplicate_of = existing
+        message.loader = None
+        self.stats["moved_known"] += 1
+        return True
+
+    def _apply_item_details(self, message: OutlookMessage, item) -> None:
+        is_meeting = message.is_meeting
+        message.conversation_id = getattr(item, "ConversationID", None)
+        message.body_text = getattr(item, "Body", None)
+        message.body_html = getattr(item, "HTMLBody", None)
+        message.raw_headers = _item_property(item, TRANSPORT_HEADERS_PROP)
+        recipients = self._resolve_addresses(message, item) if self.addresses is not None else None
+        if is_meeting:
+            message.meeting_start = getattr(item, "Start", None)
+            message.meeting_end = getattr(item, "End", None)
+            try:
+                tz = getattr(item, "StartTimeZone", None)
+                if tz is not None:
+                    message.meeting_timezone = getattr(tz, "ID", None) or getattr(tz, "Name", None)
+            except Exception:
+                message.meeting_timezone = None
+            message.meeting_location = getattr(item, "Location", None)
+            message.meeting_organizer = getattr(item, "Organizer", None)
+            if recipients is not None:
+                message.meeting_recipients = recipients
+            else:
+                try:
+                    if getattr(item, "Recipients", None):
+                        message.meeting_recipients = [recip.Address for recip in item.Recipients]
+                except Exception:
+                    message.meeting_recipients = None
+        message.attachments = self._extract_attachments(item)
+
+    def _resolve_addresses(self, message: OutlookMessage, item) -> list[str] | None:
+        """Replace Exchange DNs with SMTP addresses; returns every recipient's address.
+
+        Addresses that cannot be resolved keep their DN. To/CC/BCC are rebuilt
+        from ``item.Recipients`` because the item's ``To``/``CC``/``BCC``
+        properties only carry display names; on meetings, organizer and
+        resource (room) recipients are only returned, not filed under a field.
+        """
+        addresses = self.addresses
+        if message.is_meeting:
+            field_names, default_field = MEETING_RECIPIENT_FIELDS, None
+        else:
+            field_names, default_field = RECIPIENT_FIELDS, "to"
+        message.sender_email = addresses.resolve(message.sender_email, lambda: _sender_smtp(item))
+        try:
+            recipients = item.Recipients
+        except Exception:
+            return None
+        if not recipients:
+            return None
+        fields: dict[str, list[str]] = {}
+        resolved = []
+        for recipient in recipients:
+            try:
+                address = addresses.resolve(getattr(recipient, "Address", None), lambda: _recipient_smtp(recipient))
+                if address:
+                    resolved.append(address)
+                    field_name = field_names.get(getattr(recipient, "Type", 1), default_field)
+                    if field_name:
+                        fields.setdefault(field_name, []).append(address)
+            except Exception:
+                logger.debug("Failed to resolve recipient", exc_info=True)
+            finally:
+                recipient = None
+        recipients = None
+        for field_name, values in fields.items():
+            setattr(message, field_name, "; ".join(values))
+        return resolved
 
     def _extract_attachments(self, item) -> list[OutlookAttachment]:
         results: list[OutlookAttachment] = []
-        if not getattr(item, "Attachments", None):
+        # Each ``item.Attachments`` access creates a new proxy; take one and drop it when done.
+        attachments = getattr(item, "Attachments", None)
+        if not attachments:
             return results
-        for attachment in item.Attachments:
+        resident = 0
+        for attachment in attachments:
             try:
-                data = self._read_attachment_bytes(attachment)
                 filename = getattr(attachment, "FileName", "attachment")
                 size = getattr(attachment, "Size", None)
+                try:
+                    accessor = attachment.PropertyAccessor
+                except Exception:
+                    accessor = None
+                in_memory = self._may_hold_in_memory(size, resident)
+                data, stored = self._read_attachment_payload(attachment, accessor, filename, size, in_memory)
+                if data is not None:
+                    resident += len(data)
                 content_id = None
                 is_inline = False
                 try:
-                    accessor = attachment.PropertyAccessor
                     content_id = accessor.GetProperty(CONTENT_ID_PROP)
                 except Exception:
                     content_id = None
                 try:
-                    accessor = attachment.PropertyAccessor
                     flags = accessor.GetProperty(ATTACH_FLAGS_PROP)
                     is_inline = bool(flags and int(flags) & 0x4)
                 except Exception:
@@ -164,13 +600,64 @@ class OutlookFetcher:
                         size=size,
                         content_id=content_id,
                         is_inline=is_inline,
+                        stored=stored,
                     )
                 )
             except Exception:
                 logger.exception("Failed to read attachment")
-                continue
+            finally:
+                attachment = accessor = None
+        attachments = None
         return results
 
+    def _read_attachment_payload(
+        self,
+        attachment,
+        accessor,
+        filename: str | None,
+        size: int | None,
+        in_memory: bool = True,
+    ) -> tuple[bytes | None, StoredFile | None]:
+        if (
+            in_memory
+            and accessor is not None
+            and size is not None
+            and size <= self.property_read_max_bytes
+        ):
+            try:
+                value = accessor.GetProperty(ATTACH_DATA_BIN_PROP)
+                if value is not None:
+                    return bytes(value), None
+            except Exception:
+                logger.debug("PR_ATTACH_DATA_BIN unavailable for %s; saving to file", filename)
+        if self.storage is not None:
+            return None, self._save_attachment_to_storage(attachment)
+        return self._read_attachment_bytes(attachment), None
+
+    def _may_hold_in_memory(self, size: int | None, resident: int) -> bool:
+        """Whether an attachment fits the spool threshold and the message's memory budget."""
+        if self.storage is None:
+            return True
+        if size is None:
+            return False
+        if self.spool_threshold is not None and size > self.spool_threshold:
+            return False
+        if self.memory_budget is not None and resident + size > self.memory_budget:
+            return False
+        return True
+
+    def _save_attachment_to_storage(self, attachment) -> StoredFile:
+        staged = self.storage.staging_path()
+        try:
+            attachment.SaveAsFile(str(staged))
+            return self.storage.store_file(staged)
+        except Exception:
+            try:
+                staged.unlink()
+            except FileNotFoundError:
+                pass
+            raise
+
     def _read_attachment_bytes(self, attachment) -> bytes:
         handle = None
         try:
@@ -185,3 +672,27 @@ class OutlookFetcher:
                     os.unlink(handle.name)
                 except Exception:
                     logger.debug("Failed to delete temp attachment file")
+
+
+def _item_property(item, prop: str):
+    """Read one MAPI property, or None when the item (or store) does not expose it."""
+    try:
+        return item.PropertyAccessor.GetProperty(prop)
+    except Exception:
+        return None
+
+
+def _sender_smtp(item) -> str | None:
+    smtp = _item_property(item, PR_SENDER_SMTP_ADDRESS)
+    if smtp:
+        return smtp
+    user = item.Sender.GetExchangeUser()
+    return user.PrimarySmtpAddress if user is not None else None
+
+
+def _recipient_smtp(recipient) -> str | None:
+    smtp = _item_property(recipient, PR_SMTP_ADDRESS)
+    if smtp:
+        return smtp
+    user = recipient.AddressEntry.GetExchangeUser()
+    return user.PrimarySmtpAddress if user is not None else None
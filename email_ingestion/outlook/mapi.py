@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import logging
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from email_ingestion.util.time import as_wall_clock
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def get_namespace():
     try:
@@ -17,6 +25,90 @@ def get_namespace():
     return outlook.GetNamespace("MAPI")
 
 
+@contextmanager
+def com_apartment() -> Iterator[None]:
+    """Initialize COM for the current thread (no-op where pywin32 is unavailable)."""
+    try:
+        import pythoncom  # type: ignore
+    except Exception:
+        yield
+        return
+    pythoncom.CoInitialize()
+    try:
+        yield
+    finally:
+        pythoncom.CoUninitialize()
+
+
+class ComThread:
+    """Long-lived thread with COM initialized once.
+
+    COM objects belong to the apartment that created them, so anything cached
+    across runs (namespace, resolved folders) must be created and used on this
+    thread. :meth:`iterate` runs a generator here and streams its items back to
+    the calling thread.
+    """
+
+    def __init__(self, name: str = "ingest-com", queue_size: int = 16) -> None:
+        self.queue_size = queue_size
+        self._tasks: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._main, name=name, daemon=True)
+        self._thread.start()
+
+    def _main(self) -> None:
+        with com_apartment():
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    return
+                task()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run ``fn`` on the COM thread and return its result."""
+        (result,) = list(self.iterate(lambda: [fn()]))
+        return result
+
+    def iterate(self, produce: Callable[[], Iterable[T]]) -> Iterator[T]:
+        results: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        cancelled = threading.Event()
+
+        def put(message) -> None:
+            while not cancelled.is_set():
+                try:
+                    results.put(message, timeout=0.2)
+                    return
+                except queue.Full:
+                    continue
+
+        def task() -> None:
+            try:
+                for item in produce():
+                    if cancelled.is_set():
+                        return
+                    put(("item", item))
+            except BaseException as exc:
+                put(("error", exc))
+                return
+            put(("done", None))
+
+        self._tasks.put(task)
+        try:
+            while True:
+                kind, value = results.get()
+                if kind == "item":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            cancelled.set()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._tasks.put(None)
+        self._thread.join(timeout=timeout)
+
+
 def _list_folder_names(folder) -> list[str]:
     try:
         return [f.Name for f in folder.Folders]
@@ -47,3 +139,24 @@ def resolve_shared_folder(namespace, mailbox: str, folder_path: str):
                 ) from exc
             current_path = f"{current_path}/{part}"
     return folder
+
+
+def format_restrict_datetime(value: datetime) -> str:
+    """Format a datetime for an Items.Restrict filter.
+
+    Restrict compares against local time with minute precision, so seconds are
+    truncated; callers still apply the exact comparison client-side.
+    """
+    local = as_wall_clock(value)
+    return local.strftime("%m/%d/%Y %I:%M %p")
+
+
+def received_time_filter(since: datetime | None, until: datetime | None = None) -> str | None:
+    """Restrict clause for ``since <= ReceivedTime <= until``, widened to whole minutes."""
+    clauses = []
+    if since is not None:
+        clauses.append(f"[ReceivedTime] >= '{format_restrict_datetime(since)}'")
+    if until is not None:
+        # Seconds are truncated, so bound by the start of the following minute.
+        clauses.append(f"[ReceivedTime] < '{format_restrict_datetime(as_wall_clock(until) + timedelta(minutes=1))}'")
+    return " AND ".join(clauses) or None
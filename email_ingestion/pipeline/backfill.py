@@ -0,0 +1,179 @@
+"""Date-partitioned historical backfill."""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import replace
+from datetime import datetime, timedelta
+import logging
+
+from email_ingestion.config import AppConfig
+from email_ingestion.db.models import BackfillPartition
+from email_ingestion.db.repo import Repository
+from email_ingestion.pipeline.orchestrator import run_jobs
+from email_ingestion.pipeline.runtime import IngestionRuntime
+from email_ingestion.sources.jobs import SourceSpec
+from email_ingestion.util.hashing import sha256_str
+from email_ingestion.util.time import as_wall_clock, is_later
+
+
+logger = logging.getLogger(__name__)
+
+
+def plan_partitions(since: datetime, until: datetime, days: float) -> list[tuple[datetime, datetime]]:
+    """Split ``[since, until)`` into consecutive ranges of ``days``, newest first."""
+    step = timedelta(days=days)
+    if step <= timedelta(0):
+        raise ValueError("Partition size must be positive")
+    ranges = []
+    start = since
+    while start < until:
+        end = min(start + step, until)
+        ranges.append((start, end))
+        start = end
+    return ranges[::-1]
+
+
+def backfill_id(spec: SourceSpec, since: datetime, until: datetime | None) -> str:
+    """Stable id for a backfill request, so re-running the same command resumes it."""
+    return sha256_str(f"{spec.checkpoint_key}:{since.isoformat()}:{until.isoformat() if until else ''}")
+
+
+def run_backfill(
+    config: AppConfig,
+    spec: SourceSpec,
+    since: datetime,
+    until: datetime | None = None,
+    partition_days: float = 30,
+    parallel: int = 4,
+    reprocess: bool = False,
+    runtime: IngestionRuntime | None = None,
+) -> dict:
+    """Ingest ``spec`` between ``since`` and ``until`` (default: now) in date partitions.
+
+    Up to ``parallel`` partitions run at once, each through its own
+    :func:`run_jobs` call on the shared ``runtime`` with a restricted date
+    range and its own checkpoint, so an interrupted partition restarts where
+    it stopped. The next partition starts as soon as any running one
+    finishes, so a slow day does not hold up the rest. Partition state lives
+    in ``backfill_partitions``; running the same command again only picks up
+    unfinished partitions. When every partition is done, ``spec``'s regular
+    checkpoint is moved to the end of the range so incremental runs continue
+    from there.
+    """
+    if runtime is None:
+        with IngestionRuntime(config) as transient:
+            return run_backfill(config, spec, since, until, partition_days, parallel, reprocess, runtime=transient)
+    since = as_wall_clock(since)
+    until = as_wall_clock(until)
+    ident = backfill_id(spec, since, until)
+
+    with runtime.session_factory() as session:
+        repo = Repository(session)
+        partitions = repo.get_backfill_partitions(ident)
+        if partitions:
+            logger.info(
+                "Resuming backfill %s: %s of %s partitions left",
+                ident[:16],
+                sum(1 for partition in partitions if partition.state != "done"),
+                len(partitions),
+            )
+        else:
+            now = datetime.utcnow()
+            repo.save_backfill_partitions(
+                [
+                    {
+                        "partition_id": f"backfill:{ident[:16]}:{start:%Y%m%d%H%M}",
+                        "backfill_id": ident,
+                        "source_name": spec.name,
+                        "range_start": start,
+                        "range_end": end,
+                        "state": "pending",
+                        "processed": 0,
+                        "updated_at": now,
+                    }
+                    for start, end in plan_partitions(since, until or datetime.now(), partition_days)
+                ]
+            )
+            partitions = repo.get_backfill_partitions(ident)
+
+        # Newest first; a partition starts as soon as a slot frees up rather than per wave.
+        queue = [partition for partition in partitions if partition.state != "done"][::-1]
+        parallel = max(parallel, 1)
+        running: dict[Future, BackfillPartition] = {}
+        failure: Exception | None = None
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="ingest-backfill") as pool:
+            while True:
+                while queue and len(running) < parallel and failure is None and not runtime.stopping:
+                    partition = queue.pop()
+                    future = pool.submit(
+                        run_jobs,
+                        config,
+                        [_partition_spec(repo, spec, partition)],
+                        use_checkpoint=True,
+                        reprocess=reprocess,
+                        runtime=runtime,
+                    )
+                    running[future] = partition
+                    partition.state = "running"
+                    partition.updated_at = datetime.utcnow()
+                    session.commit()
+                    logger.info("Backfilling %s..%s", partition.range_start.date(), partition.range_end.date())
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    partition = running.pop(future)
+                    partition.updated_at = datetime.utcnow()
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        # Let the partitions already running finish, start no more, then re-raise.
+                        partition.state = "failed"
+                        failure = failure or exc
+                        continue
+                    summary = result["sources"][partition.partition_id]
+                    partition.processed += summary["processed"]
+                    if summary["error"]:
+                        partition.state = "failed"
+                    else:
+                        partition.state = "stopped" if runtime.stopping else "done"
+                session.commit()
+        if failure is not None:
+            raise failure
+
+        done = [partition for partition in partitions if partition.state == "done"]
+        checkpoint = repo.get_checkpoint(spec.checkpoint_key)
+        if len(done) == len(partitions) and partitions:
+            end = max(partition.range_end for partition in partitions)
+            if not checkpoint or is_later(end, datetime.fromisoformat(checkpoint)):
+                checkpoint = end.isoformat()
+                repo.set_checkpoint(spec.checkpoint_key, checkpoint)
+            repo.delete_checkpoints([partition.partition_id for partition in partitions])
+            runtime.checkpoints.pop(spec.checkpoint_key, None)
+            logger.info("Backfill %s complete; %s continues from %s", ident[:16], spec.checkpoint_key, checkpoint)
+        return {
+            "backfill_id": ident,
+            "partitions": len(partitions),
+            "completed": len(done),
+            "processed": sum(partition.processed for partition in partitions),
+            "checkpoint": checkpoint,
+        }
+
+
+def _partition_spec(repo: Repository, spec: SourceSpec, partition: BackfillPartition) -> SourceSpec:
+    # An interrupted partition resumes from its own checkpoint.
+    resume = repo.get_checkpoint(partition.partition_id)
+    start = partition.range_start
+    if resume and is_later(datetime.fromisoformat(resume), start):
+        start = datetime.fromisoformat(resume)
+    return replace(
+        spec,
+        name=partition.partition_id,
+        checkpoint_name=partition.partition_id,
+        since=start,
+        # Ranges are half-open; ``until`` is inclusive.
+        until=partition.range_end - timedelta(microseconds=1),
+        limit=None,
+        max_in_flight=None,
+    )
@@ -0,0 +1,204 @@
+"""Long-running polling daemon."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import replace
+import logging
+import queue
+import signal
+import threading
+import time
+
+from email_ingestion.config import AppConfig
+from email_ingestion.outlook.events import NewItemCallback, NewItemEvents
+from email_ingestion.pipeline.orchestrator import run_jobs
+from email_ingestion.pipeline.runtime import IngestionRuntime
+from email_ingestion.sources.jobs import SourceSpec
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveInterval:
+    """Poll interval that halves while mail is arriving and doubles while idle."""
+
+    def __init__(self, initial: float, minimum: float, maximum: float) -> None:
+        self.minimum = max(minimum, 0.0)
+        self.maximum = max(maximum, self.minimum)
+        self.current = min(max(initial, self.minimum), self.maximum)
+
+    def update(self, new_items: int) -> float:
+        if new_items > 0:
+            self.current = max(self.current / 2, self.minimum)
+        else:
+            self.current = min(self.current * 2, self.maximum)
+        return self.current
+
+
+class IngestionDaemon:
+    """Poll ``specs`` until stopped, keeping an :class:`IngestionRuntime` warm.
+
+    SIGTERM/SIGINT (and SIGBREAK on Windows) request a graceful stop: the
+    current run stops fetching, writes what is in flight, checkpoints and the
+    daemon exits.
+
+    With ``events`` (new-item notifications keyed by source name) pushed
+    entry IDs are ingested as soon as they arrive, and the full folder poll
+    only runs every ``reconcile_seconds`` to pick up whatever events missed.
+    """
+
+    def __init__(
+        self,
+        config: AppConfig,
+        specs: list[SourceSpec],
+        poll_seconds: float,
+        use_checkpoint: bool = True,
+        reprocess: bool = False,
+        events: dict[str, NewItemEvents] | None = None,
+        reconcile_seconds: float | None = None,
+    ) -> None:
+        self.config = config
+        self.specs = specs
+        self.use_checkpoint = use_checkpoint
+        self.reprocess = reprocess
+        self.events = events or {}
+        unknown = set(self.events) - {spec.name for spec in specs if spec.source == "outlook"}
+        if unknown:
+            raise ValueError(f"Item events for unknown Outlook sources: {sorted(unknown)}")
+        self.reconcile_seconds = config.reconcile_seconds if reconcile_seconds is None else reconcile_seconds
+        self.interval = AdaptiveInterval(
+            poll_seconds, config.poll_min_seconds, max(config.poll_max_seconds, poll_seconds)
+        )
+        self.runtime: IngestionRuntime | None = None
+        self.iterations = 0
+        self.events_received = 0
+        # Seconds from notification to commit for recent events.
+        self.event_latencies: deque[float] = deque(maxlen=1000)
+        self._stop = threading.Event()
+        self._pending: queue.Queue = queue.Queue()
+
+    def stop(self, *_signal_args) -> None:
+        logger.info("Stop requested; finishing in-flight messages")
+        self._stop.set()
+        self._pending.put(None)
+        if self.runtime is not None:
+            self.runtime.stop_event.set()
+
+    def install_signal_handlers(self) -> None:
+        for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                signal.signal(signum, self.stop)
+
+    def _notify(self, source_name: str) -> NewItemCallback:
+        def on_new_item(entry_id: str, store_id: str) -> None:
+            self._pending.put((source_name, entry_id, store_id, time.monotonic()))
+
+        return on_new_item
+
+    def run(self) -> None:
+        with IngestionRuntime(self.config, keep_com=True) as runtime:
+            self.runtime = runtime
+            if self._stop.is_set():
+                runtime.stop_event.set()
+            for name, events in self.events.items():
+                events.start(self._notify(name))
+            try:
+                self._loop(runtime)
+            finally:
+                for events in self.events.values():
+                    events.stop()
+        self.runtime = None
+
+    def _loop(self, runtime: IngestionRuntime) -> None:
+        next_poll = time.monotonic()
+        while not self._stop.is_set():
+            remaining = next_poll - time.monotonic()
+            if remaining <= 0:
+                new_items = self._poll(runtime)
+                if self.events:
+                    wait = self.reconcile_seconds
+                else:
+                    wait = self.interval.update(new_items)
+                logger.info("Processed %s new messages; next poll in %.0fs", new_items, wait)
+                next_poll = time.monotonic() + wait
+                continue
+            batch = self._next_events(remaining)
+            if batch and not self._ingest_events(runtime, batch):
+                # Whatever this batch held is still in the folder; reconcile now.
+                next_poll = time.monotonic()
+
+    def _poll(self, runtime: IngestionRuntime) -> int:
+        try:
+            result = run_jobs(
+                self.config,
+                self.specs,
+                use_checkpoint=self.use_checkpoint or self.iterations > 0,
+                reprocess=self.reprocess,
+                runtime=runtime,
+            )
+            new_items = result["processed"]
+            self._reset_failed(runtime, self.specs, result)
+        except Exception:
+            logger.exception("Ingestion iteration failed; re-resolving Outlook folders")
+            self._reset(runtime, self.specs)
+            # Re-read checkpoints so the next run resumes the interrupted one.
+            runtime.checkpoints.clear()
+            new_items = 0
+        if self.iterations == 0:
+            # Per-source ``since`` only applies to the first iteration, like --since.
+            self.specs = [replace(spec, since=None) for spec in self.specs]
+        self.iterations += 1
+        return new_items
+
+    def _next_events(self, timeout: float) -> list[tuple[str, str, str, float]]:
+        """Block up to ``timeout`` for one event, then drain whatever else has queued."""
+        try:
+            event = self._pending.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        batch = []
+        while event is not None:
+            batch.append(event)
+            try:
+                event = self._pending.get_nowait()
+            except queue.Empty:
+                break
+        return batch
+
+    def _ingest_events(self, runtime: IngestionRuntime, batch: list[tuple[str, str, str, float]]) -> bool:
+        entries: dict[str, dict[tuple[str, str], None]] = {}
+        for source_name, entry_id, store_id, _ in batch:
+            entries.setdefault(source_name, {})[(entry_id, store_id)] = None
+        specs = [
+            replace(spec, entry_ids=tuple(entries[spec.name]), since=None, limit=None)
+            for spec in self.specs
+            if spec.name in entries
+        ]
+        self.events_received += len(batch)
+        try:
+            result = run_jobs(self.config, specs, use_checkpoint=True, reprocess=self.reprocess, runtime=runtime)
+        except Exception:
+            logger.exception("Ingesting %s pushed items failed", len(batch))
+            self._reset(runtime, specs)
+            return False
+        if self._reset_failed(runtime, specs, result):
+            return False
+        done = time.monotonic()
+        self.event_latencies.extend(done - received for *_, received in batch)
+        logger.info("Ingested %s pushed items in %.2fs", len(batch), done - min(event[3] for event in batch))
+        return True
+
+    def _reset_failed(self, runtime: IngestionRuntime, specs: list[SourceSpec], result: dict) -> bool:
+        """Re-resolve the folders of sources that failed in ``result``; True if any did."""
+        failed = [spec for spec in specs if result["sources"][spec.name]["error"]]
+        for spec in failed:
+            # Re-read its checkpoint so the next run resumes where it stopped.
+            runtime.checkpoints.pop(spec.checkpoint_key, None)
+        self._reset(runtime, failed)
+        return bool(failed)
+
+    def _reset(self, runtime: IngestionRuntime, specs: list[SourceSpec]) -> None:
+        for spec in specs:
+            runtime.reset_com(spec.name)
@@ -0,0 +1,71 @@
+"""Index of already-ingested email IDs used to skip items before conversion."""
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import Callable
+import logging
+
+from email_ingestion.db.repo import Repository
+from email_ingestion.util.bloom import BloomFilter
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BLOOM_THRESHOLD = 1_000_000
+
+
+class KnownEmailIndex:
+    """Membership test for ``email_id`` values already present in ``emails`` or ``email_aliases``.
+
+    Small mailboxes use an exact set. Above ``bloom_threshold`` rows the IDs are
+    folded into a Bloom filter and positives are confirmed with ``confirm`` so a
+    false positive never causes a new message to be skipped.
+    """
+
+    def __init__(
+        self,
+        ids: set[str] | None = None,
+        bloom: BloomFilter | None = None,
+        confirm: Callable[[str], bool] | None = None,
+    ) -> None:
+        self._ids = ids if ids is not None else set()
+        self._bloom = bloom
+        self._confirm = confirm
+        self.confirmations = 0
+
+    @classmethod
+    def load(
+        cls,
+        repo: Repository,
+        bloom_threshold: int = DEFAULT_BLOOM_THRESHOLD,
+        confirm: Callable[[str], bool] | None = None,
+    ) -> "KnownEmailIndex":
+        total = repo.count_emails() + repo.count_aliases()
+        if total <= bloom_threshold:
+            index = cls(ids=set(chain(repo.iter_email_ids(), repo.iter_alias_ids())))
+        else:
+            bloom = BloomFilter(capacity=int(total * 1.2))
+            bloom.update(chain(repo.iter_email_ids(), repo.iter_alias_ids()))
+            index = cls(bloom=bloom, confirm=confirm or repo.is_known)
+        logger.info(
+            "Loaded %s known email IDs (%s)",
+            total,
+            "bloom filter" if index._bloom is not None else "exact set",
+        )
+        return index
+
+    def add(self, email_id: str) -> None:
+        # IDs seen during this run are kept exactly so they never need a DB check.
+        self._ids.add(email_id)
+
+    def __contains__(self, email_id: str) -> bool:
+        if email_id in self._ids:
+            return True
+        if self._bloom is None or email_id not in self._bloom:
+            return False
+        self.confirmations += 1
+        if self._confirm is None:
+            return True
+        return self._confirm(email_id)
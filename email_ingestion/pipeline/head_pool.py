@@ -0,0 +1,316 @@
+"""Killable worker processes for CPU-bound heads, with per-head budgets."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from email_ingestion.heads.base import HeadInput, HeadResult
+
+
+logger = logging.getLogger(__name__)
+
+
+class HeadBudgetExceeded(RuntimeError):
+    """A head was stopped or not started because of a limit; recorded as ``status``."""
+
+    status = "skipped"
+
+
+class HeadTimeout(HeadBudgetExceeded):
+    status = "timeout"
+
+
+class HeadMemoryExceeded(HeadBudgetExceeded):
+    status = "skipped"
+
+
+class CircuitOpen(HeadBudgetExceeded):
+    status = "skipped"
+
+
+@dataclass(frozen=True)
+class HeadLimits:
+    timeout_seconds: float | None = None
+    memory_limit_mb: int | None = None
+
+
+def _apply_memory_limit(limit_mb: int | None) -> None:
+    if not limit_mb:
+        return
+    limit = int(limit_mb) * 1024 * 1024
+    try:
+        import resource  # POSIX
+
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        return
+    except ImportError:
+        pass
+    try:  # pragma: no cover - platform specific
+        import win32api  # type: ignore
+        import win32job  # type: ignore
+
+        job = win32job.CreateJobObject(None, "")
+        info = win32job.QueryInformationJobObject(job, win32job.JobObjectExtendedLimitInformation)
+        info["ProcessMemoryLimit"] = limit
+        info["BasicLimitInformation"]["LimitFlags"] |= win32job.JOB_OBJECT_LIMIT_PROCESS_MEMORY
+        win32job.SetInformationJobObject(job, win32job.JobObjectExtendedLimitInformation, info)
+        win32job.AssignProcessToJobObject(job, win32api.GetCurrentProcess())
+    except Exception:  # pragma: no cover - platform specific
+        logger.warning("Head memory limit unsupported on this platform")
+
+
+def _worker_main(conn, memory_limit_mb: int | None) -> None:
+    _apply_memory_limit(memory_limit_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        head, head_input = task
+        started = time.perf_counter()
+        try:
+            result = head.process(head_input)
+        except MemoryError:
+            conn.send(("memory", "memory_limit_exceeded"))
+            return
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+            continue
+        metrics = dict(result.metrics or {})
+        metrics["worker_pid"] = os.getpid()
+        metrics["worker_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        result.metrics = metrics
+        conn.send(("ok", result))
+
+
+class _HeadWorker:
+    def __init__(self, ctx, memory_limit_mb: int | None) -> None:
+        self.memory_limit_mb = memory_limit_mb
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, head, head_input: HeadInput, timeout: float | None) -> HeadResult:
+        self.conn.send((head, head_input))
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise HeadTimeout(f"{head.name} exceeded {timeout}s")
+        try:
+            status, payload = self.conn.recv()
+        except EOFError:
+            exitcode = self.process.exitcode
+            self.kill()
+            if self.memory_limit_mb:
+                raise HeadMemoryExceeded(f"{head.name} worker died (exit code {exitcode})")
+            raise RuntimeError(f"{head.name} worker died (exit code {exitcode})")
+        if status == "ok":
+            return payload
+        if status == "memory":
+            self.kill()
+            raise HeadMemoryExceeded(f"{head.name} exceeded {self.memory_limit_mb} MB")
+        raise RuntimeError(payload)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class CircuitBreaker:
+    """Per (head, input class) breaker with exponential back-off.
+
+    After ``threshold`` consecutive failures on similar inputs the circuit opens
+    for ``cooldown_seconds``; each further trip doubles the cooldown up to
+    ``max_cooldown_seconds``. Once the cooldown elapses exactly one trial call
+    is let through, and every other caller is refused until it finishes: a
+    success closes the circuit again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 3,
+        cooldown_seconds: float = 60.0,
+        max_cooldown_seconds: float = 3600.0,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self._state: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(head, head_input: HeadInput) -> tuple:
+        size = None
+        if head_input.attachment_bytes is not None:
+            size = len(head_input.attachment_bytes)
+        elif head_input.attachment_path:
+            try:
+                size = os.path.getsize(head_input.attachment_path)
+            except OSError:
+                size = None
+        # Bucket by order of magnitude so one huge deck does not trip small ones.
+        bucket = size.bit_length() // 4 if size else None
+        return (head.name, head_input.attachment_ext, bucket)
+
+    def allow(self, key: tuple) -> bool:
+        with self._lock:
+            state = self._state.get(key)
+            if not state or state["open_until"] is None:
+                return True
+            if state["probing"] or time.monotonic() < state["open_until"]:
+                return False
+            state["probing"] = True
+            return True
+
+    def record_success(self, key: tuple) -> None:
+        with self._lock:
+            self._state.pop(key, None)
+
+    def record_failure(self, key: tuple) -> None:
+        with self._lock:
+            state = self._state.setdefault(key, {"failures": 0, "trips": 0, "open_until": None, "probing": False})
+            state["probing"] = False
+            state["failures"] += 1
+            if state["failures"] >= self.threshold:
+                cooldown = min(self.cooldown_seconds * (2 ** state["trips"]), self.max_cooldown_seconds)
+                state["trips"] += 1
+                state["failures"] = self.threshold - 1  # a failed trial call re-opens immediately
+                state["open_until"] = time.monotonic() + cooldown
+                logger.warning("Circuit open for %s for %.0fs", key, cooldown)
+
+
+class HeadExecutor:
+    """Run heads inline, or in killable worker processes when they are ``cpu_bound``.
+
+    Pooled heads are bounded by their :class:`HeadLimits`: a head that runs past
+    its timeout has its worker killed and replaced, and the memory ceiling is
+    applied to the worker process itself. Limits can only be enforced out of
+    process: with ``processes=0`` every head runs inline and unbounded unless
+    ``isolate`` is set, in which case limited heads that are CPU-bound or have
+    limits of their own run in workers started as needed, up to one per CPU.
+    With ``pass_paths`` an attachment that
+    already lives in CAS is sent as its path only, so the bytes are never
+    pickled across processes.
+    """
+
+    def __init__(
+        self,
+        processes: int = 0,
+        pass_paths: bool = False,
+        default_limits: HeadLimits | None = None,
+        head_limits: dict[str, HeadLimits] | None = None,
+        breaker: CircuitBreaker | None = None,
+        isolate: bool = False,
+    ) -> None:
+        self.processes = processes
+        self._capacity = processes if processes > 0 else (os.cpu_count() or 1)
+        self.pass_paths = pass_paths
+        self.isolate = isolate
+        self.default_limits = default_limits or HeadLimits()
+        self.head_limits = head_limits or {}
+        if not processes and not isolate and (self.head_limits or self.default_limits.memory_limit_mb):
+            logger.warning("Head limits are only enforced with head processes or head isolation enabled")
+        self.breaker = breaker or CircuitBreaker()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue[_HeadWorker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = 0
+
+    def limits_for(self, head_name: str) -> HeadLimits:
+        override = self.head_limits.get(head_name)
+        if override is None:
+            return self.default_limits
+        return HeadLimits(
+            timeout_seconds=override.timeout_seconds or self.default_limits.timeout_seconds,
+            memory_limit_mb=override.memory_limit_mb or self.default_limits.memory_limit_mb,
+        )
+
+    def run(self, head, head_input: HeadInput) -> HeadResult:
+        key = self.breaker.key_for(head, head_input)
+        if not self.breaker.allow(key):
+            raise CircuitOpen(f"circuit_open for {head.name}")
+        limits = self.limits_for(head.name)
+        try:
+            if self._isolated(head, limits):
+                result = self._run_pooled(head, head_input, limits)
+            else:
+                result = head.process(head_input)
+        except Exception:
+            self.breaker.record_failure(key)
+            raise
+        self.breaker.record_success(key)
+        return result
+
+    def _isolated(self, head, limits: HeadLimits) -> bool:
+        cpu_bound = getattr(head, "cpu_bound", False)
+        if self.processes > 0 and cpu_bound:
+            return True
+        if not self.isolate:
+            return False
+        limited = limits.timeout_seconds or limits.memory_limit_mb
+        return bool(limited) and (cpu_bound or head.name in self.head_limits)
+
+    def _run_pooled(self, head, head_input: HeadInput, limits: HeadLimits) -> HeadResult:
+        if self.pass_paths and head_input.attachment_path:
+            head_input = replace(head_input, attachment_bytes=None)
+        worker = self._acquire(limits.memory_limit_mb)
+        try:
+            return worker.call(head, head_input, limits.timeout_seconds)
+        finally:
+            self._release(worker)
+
+    def _acquire(self, memory_limit_mb: int | None) -> _HeadWorker:
+        with self._lock:
+            spawn = self._started < self._capacity and (self.processes > 0 or self._idle.empty())
+            if spawn:
+                self._started += 1
+        if spawn:
+            return _HeadWorker(self._ctx, memory_limit_mb)
+        while True:
+            worker = self._idle.get()
+            if worker.alive and worker.memory_limit_mb == memory_limit_mb:
+                return worker
+            # Replace dead workers, or ones started with a different memory ceiling.
+            worker.stop()
+            return _HeadWorker(self._ctx, memory_limit_mb)
+
+    def _release(self, worker: _HeadWorker) -> None:
+        self._idle.put(worker)
+
+    def close(self) -> None:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.stop()
+
+    def __enter__(self) -> "HeadExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
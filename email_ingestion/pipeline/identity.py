@@ -0,0 +1,85 @@
+"""Location-independent email identity, used to recognize moved and copied mail."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import re
+from typing import Callable
+
+from email_ingestion.db.repo import Repository
+from email_ingestion.util.hashing import sha256_str
+
+
+MESSAGE_ID = "message_id"
+FINGERPRINT = "fingerprint"
+
+_MESSAGE_ID_HEADER = re.compile(r"^message-id:[ \t]*(.+(?:\r?\n[ \t].*)*)", re.IGNORECASE | re.MULTILINE)
+
+
+def normalize_message_id(value: str | None) -> str | None:
+    if not value:
+        return None
+    value = " ".join(str(value).split()).strip("<> ")
+    return value or None
+
+
+def message_id_from_headers(raw_headers: str | None) -> str | None:
+    if not raw_headers:
+        return None
+    match = _MESSAGE_ID_HEADER.search(raw_headers)
+    return normalize_message_id(match.group(1)) if match else None
+
+
+def content_fingerprint(
+    sender_email: str | None,
+    subject: str | None,
+    sent_time: datetime | None,
+    normalized_text: str | None,
+) -> str | None:
+    """Hash of what a move or copy cannot change; None when too little is known to be unique."""
+    if sent_time is None or not (normalized_text or subject):
+        return None
+    parts = [
+        (sender_email or "").strip().lower(),
+        " ".join((subject or "").split()),
+        sent_time.replace(microsecond=0, tzinfo=None).isoformat(),
+        normalized_text or "",
+    ]
+    return sha256_str("\x1f".join(parts))
+
+
+def identity_key(kind: str, value: str) -> str:
+    return sha256_str(f"{kind}:{value}")
+
+
+def identity_keys(message_id: str | None, fingerprint: str | None) -> list[tuple[str, str]]:
+    """``(kind, key)`` pairs, strongest first."""
+    keys = []
+    if message_id:
+        keys.append((MESSAGE_ID, identity_key(MESSAGE_ID, message_id)))
+    if fingerprint:
+        keys.append((FINGERPRINT, identity_key(FINGERPRINT, fingerprint)))
+    return keys
+
+
+class IdentityResolver:
+    """Find the existing email a newly seen item duplicates.
+
+    Lookups use their own session so they are safe from the fetch thread and
+    the workers. Identities are only visible once the writer has committed
+    them, so a copy never links to an email that failed to write.
+    """
+
+    def __init__(self, session_factory: Callable) -> None:
+        self.session_factory = session_factory
+
+    def lookup(self, keys: list[tuple[str, str]]) -> tuple[str, str] | None:
+        """``(email_id, kind)`` of the existing email matching any of ``keys``."""
+        if not keys:
+            return None
+        with self.session_factory() as session:
+            return Repository(session).find_identity([key for _, key in keys])
+
+    def lookup_message_id(self, message_id: str | None) -> str | None:
+        match = self.lookup(identity_keys(normalize_message_id(message_id), None))
+        return match[0] if match else None
@@ -4,27 +4,47 @@ from __future__ import annotations
 
 from datetime import datetime
 import logging
+import threading
+from typing import Callable, Iterator
 import uuid
+
 from email_ingestion.config import AppConfig
 from email_ingestion.db.repo import Repository
-from email_ingestion.db.session import Base, make_engine, make_session_factory
-from email_ingestion.db import models as _models  # noqa: F401 - ensure tables are registered
 from email_ingestion.heads.base import HeadInput, Artifact
 from email_ingestion.heads.email_body import EmailBodyHead
-from email_ingestion.heads.calendar_invite import CalendarInviteHead
-from email_ingestion.normalize.calendar import parse_ics, merge_calendar_fields, CalendarDetails
+from email_ingestion.normalize.calendar import merge_calendar_fields, CalendarDetails
+from email_ingestion.normalize.context import MessageContext, ParseCounter
 from email_ingestion.normalize.email import (
     normalize_recipients,
     normalize_recipient_list,
     normalize_single_address,
-    html_to_text,
-    extract_links,
 )
-from email_ingestion.outlook.fetcher import OutlookFetcher, OutlookMessage, OutlookAttachment
+from email_ingestion.outlook.addresses import AddressResolver
+from email_ingestion.outlook.fetcher import OutlookFetcher, OutlookMessage, OutlookAttachment, OutlookSession
+from email_ingestion.outlook.mapi import ComThread, com_apartment
+from email_ingestion.pipeline.head_pool import HeadBudgetExceeded, HeadExecutor
+from email_ingestion.pipeline.identity import (
+    MESSAGE_ID,
+    IdentityResolver,
+    content_fingerprint,
+    identity_keys,
+    message_id_from_headers,
+    normalize_message_id,
+)
+from email_ingestion.pipeline.progress import ProgressTracker
+from email_ingestion.pipeline.result_cache import HeadResultCache
+from email_ingestion.pipeline.runtime import IngestionRuntime
 from email_ingestion.pipeline.router import route_by_extension
+from email_ingestion.pipeline.stages import StagedPipeline
+from email_ingestion.pipeline.writes import BatchedWriter, MessageWrites
+from email_ingestion.sources.base import MessageSource
+from email_ingestion.sources.files import FileMessageSource
+from email_ingestion.sources.jobs import SourceSpec
 from email_ingestion.storage.cas import ContentAddressedStorage
+from email_ingestion.util.files import safe_extension
 from email_ingestion.util.hashing import sha256_str
 from email_ingestion.util.json import json_dumps_safe, make_json_safe
+from email_ingestion.util.time import is_later
 
 
 logger = logging.getLogger(__name__)
@@ -56,12 +76,6 @@ def make_artifact_id(
     )
 
 
-def _safe_extension(filename: str | None) -> str | None:
-    if not filename or "." not in filename:
-        return None
-    return filename.rsplit(".", 1)[-1].lower()
-
-
 def _calendar_from_message(message: OutlookMessage) -> CalendarDetails:
     return CalendarDetails(
         start=message.meeting_start,
@@ -73,182 +87,628 @@ def _calendar_from_message(message: OutlookMessage) -> CalendarDetails:
     )
 
 
+def _process_message(
+    message: OutlookMessage,
+    run_id: str,
+    config: AppConfig,
+    storage: ContentAddressedStorage,
+    email_body_head: EmailBodyHead,
+    executor: HeadExecutor | None = None,
+    counter: ParseCounter | None = None,
+    cache: HeadResultCache | None = None,
+    identities: IdentityResolver | None = None,
+) -> MessageWrites:
+    """Normalize, store and run heads for one message, deferring all DB writes.
+
+    A message whose Message-ID or content fingerprint belongs to an email
+    ingested under another EntryID (moved or copied) is only linked to it.
+    """
+    writes = MessageWrites(received_time=message.received_time)
+    try:
+        email_id = make_email_id(message.entry_id, message.store_id)
+        if message.duplicate_of is not None:
+            return _link_alias(writes, run_id, message, email_id, message.duplicate_of, MESSAGE_ID)
+        context = MessageContext(message.body_text, message.body_html, counter)
+        keys = identity_keys(
+            normalize_message_id(message.internet_message_id) or message_id_from_headers(message.raw_headers),
+            content_fingerprint(message.sender_email, message.subject, message.sent_time, context.normalized_text),
+        )
+        match = identities.lookup(keys) if identities is not None else None
+        if match is not None and match[0] != email_id:
+            return _link_alias(writes, run_id, message, email_id, *match)
+        to_list = normalize_recipients(message.to)
+        cc_list = normalize_recipients(message.cc)
+        bcc_list = normalize_recipients(message.bcc)
+
+        attachment_records: list[tuple[OutlookAttachment, dict]] = []
+        resident = 0
+        for attachment in message.attachments:
+            ext = safe_extension(attachment.filename)
+            stored = attachment.stored or storage.store_bytes(attachment.data)
+            attachment.stored = stored
+            if stored.path is None and attachment.data is None:
+                # Packed blobs are small and have no path to hand to heads.
+                attachment.data = stored.read_bytes()
+            if attachment.data is not None:
+                if stored.path is not None and (
+                    len(attachment.data) > config.attachment_spool_bytes
+                    or resident + len(attachment.data) > config.message_memory_budget
+                ):
+                    # Over budget: heads read the stored copy instead.
+                    attachment.data = None
+                else:
+                    resident += len(attachment.data)
+            attachment_id = make_attachment_id(
+                email_id=email_id,
+                sha256=stored.sha256,
+                content_id=attachment.content_id,
+                filename=attachment.filename,
+            )
+            payload = {
+                "attachment_id": attachment_id,
+                "email_id": email_id,
+                "filename": attachment.filename,
+                "ext": ext,
+                "mime": None,
+                "sha256": stored.sha256,
+                "size_bytes": stored.size_bytes,
+                "saved_path": str(stored.path) if stored.path else None,
+                "is_inline": attachment.is_inline,
+                "content_id": attachment.content_id,
+            }
+            attachment_records.append((attachment, payload))
+
+        calendar_details = CalendarDetails(
+            start=None,
+            end=None,
+            timezone=None,
+            location=None,
+            organizer=None,
+            attendees=None,
+        )
+        for attachment, payload in attachment_records:
+            if payload["ext"] == "ics":
+                try:
+                    calendar_details = context.calendar(payload["attachment_id"], attachment.read_bytes)
+                except Exception:
+                    logger.exception("Failed to parse .ics attachment")
+                break
+        calendar_details = merge_calendar_fields(calendar_details, _calendar_from_message(message).__dict__)
+
+        email_payload = {
+            "email_id": email_id,
+            "source_system": message.source_system,
+            "outlook_entry_id": message.entry_id,
+            "outlook_store_id": message.store_id,
+            "received_at": message.received_time,
+            "sent_at": message.sent_time,
+            "subject": message.subject,
+            "sender_name": message.sender_name,
+            "sender_email": message.sender_email,
+            "to_recipients": to_list,
+            "cc_recipients": cc_list,
+            "bcc_recipients": bcc_list,
+            "conversation_id": message.conversation_id,
+            "body_text_raw": message.body_text,
+            "body_text_normalized": context.normalized_text,
+            "body_html": message.body_html,
+            "link_list": context.links,
+            "is_calendar": bool(message.is_meeting or calendar_details.start or calendar_details.end),
+            "calendar_start": calendar_details.start,
+            "calendar_end": calendar_details.end,
+            "calendar_timezone": calendar_details.timezone,
+            "calendar_location": calendar_details.location,
+            "organizer": calendar_details.organizer,
+            "attendees": calendar_details.attendees,
+            "raw_headers": message.raw_headers,
+            "processing_state": "ingested",
+        }
+        writes.upsert_email(email_payload)
+        for kind, key in keys:
+            writes.add_identity(
+                {"identity_key": key, "kind": kind, "email_id": email_id, "created_at": datetime.utcnow()}
+            )
+        for _, payload in attachment_records:
+            writes.upsert_attachment(payload)
+
+        # Email body head
+        head_input = HeadInput(
+            email_id=email_id,
+            subject=message.subject,
+            body_text=message.body_text,
+            body_html=message.body_html,
+            is_calendar=message.is_meeting,
+            received_at=message.received_time,
+            context=context,
+        )
+        _run_head(writes, run_id, email_id, None, email_body_head, head_input)
+
+        # Calendar artifact for meeting items
+        if message.is_meeting:
+            _store_calendar_artifact(writes, run_id, email_id, calendar_details)
+
+        # Attachment heads
+        for attachment, payload in attachment_records:
+            ext = payload.get("ext")
+            head = route_by_extension(ext)
+            if not head:
+                continue
+            head_input = HeadInput(
+                email_id=email_id,
+                subject=message.subject,
+                body_text=message.body_text,
+                body_html=message.body_html,
+                is_calendar=message.is_meeting,
+                attachment_id=payload["attachment_id"],
+                attachment_name=payload["filename"],
+                attachment_ext=ext,
+                attachment_bytes=attachment.data,
+                attachment_path=str(attachment.stored.path) if attachment.stored.path else None,
+                attachment_content_id=attachment.content_id,
+                received_at=message.received_time,
+                context=context,
+            )
+            _run_head(
+                writes,
+                run_id,
+                email_id,
+                payload["attachment_id"],
+                head,
+                head_input,
+                executor,
+                cache=cache,
+                sha256=payload["sha256"],
+            )
+
+        writes.email_id = email_id
+    except Exception:
+        logger.exception("Failed to process message")
+        writes = MessageWrites(ok=False)
+        _add_event(
+            writes,
+            run_id,
+            email_id=None,
+            attachment_id=None,
+            head_name="message",
+            status="error",
+            error_message="message_processing_failed",
+        )
+    return writes
+
+
+def _link_alias(
+    writes: MessageWrites,
+    run_id: str,
+    message: OutlookMessage,
+    alias_id: str,
+    email_id: str,
+    matched_by: str,
+) -> MessageWrites:
+    writes.link_alias(
+        {
+            "alias_id": alias_id,
+            "email_id": email_id,
+            "outlook_entry_id": message.entry_id,
+            "outlook_store_id": message.store_id,
+            "matched_by": matched_by,
+            "run_id": run_id,
+            "linked_at": datetime.utcnow(),
+        }
+    )
+    _add_event(
+        writes,
+        run_id,
+        email_id,
+        None,
+        "identity",
+        "linked",
+        None,
+        metrics={"alias_id": alias_id, "matched_by": matched_by},
+    )
+    writes.email_id = alias_id
+    writes.linked = True
+    return writes
+
+
+class _SourceRun:
+    """Per-source state for one run: fetcher, watermarks, checkpoint and fairness slots."""
+
+    def __init__(
+        self,
+        spec: SourceSpec,
+        fetcher: MessageSource,
+        since: datetime | None,
+        checkpoint: datetime | None,
+        resumed_from: str | None,
+        max_in_flight: int | None,
+    ) -> None:
+        self.spec = spec
+        self.fetcher = fetcher
+        self.since = since
+        self.last_checkpoint = checkpoint
+        self.resumed_from = resumed_from
+        self.progress = ProgressTracker(since)
+        self.processed = 0
+        self.linked = 0
+        self.slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.com_thread: ComThread | None = None
+        # Set when fetching from this source failed; the other sources carry on.
+        self.error: Exception | None = None
+
+    def acquire_slot(self, pipeline: StagedPipeline) -> bool:
+        if self.slots is None:
+            return True
+        while not self.slots.acquire(timeout=0.2):
+            if pipeline.stopping:
+                return False
+        return True
+
+    def release_slot(self) -> None:
+        if self.slots is not None:
+            self.slots.release()
+
+    def checkpoint_candidate(self) -> datetime | None:
+        if not self.fetcher.checkpoints:
+            return None
+        ordered = self.fetcher.ordered
+        value = self.progress.low_watermark if ordered else self.progress.high_watermark
+        if value is None or not is_later(value, self.last_checkpoint):
+            return None
+        return value
+
+    def state(self, state: str) -> dict:
+        spec = self.spec
+        progress = self.progress
+        ordered = self.fetcher.ordered
+        return {
+            "state": "failed" if self.error else state,
+            "error": f"{type(self.error).__name__}: {self.error}" if self.error else None,
+            # Runs over pushed entry IDs are never resumed from, so they claim no checkpoint.
+            "checkpoint_name": spec.checkpoint_key if self.fetcher.checkpoints else None,
+            "source": spec.source,
+            "source_path": spec.path,
+            "mailbox": spec.mailbox,
+            "folder": spec.folder,
+            "order": "ascending" if ordered else "descending",
+            "since": self.since.isoformat() if self.since else None,
+            "low_watermark": progress.low_watermark.isoformat() if progress.low_watermark else None,
+            "high_watermark": progress.high_watermark.isoformat() if progress.high_watermark else None,
+            # Only an oldest-first run has a durable prefix to restart from.
+            "resume_from": progress.low_watermark.isoformat() if ordered and progress.low_watermark else None,
+            "processed": self.processed,
+            "linked": self.linked,
+            "skipped_known": self.fetcher.stats["skipped_known"],
+            "in_flight": progress.in_flight,
+            "messages_fetched": progress.registered,
+            # Mean ms/item per 1000 Outlook items walked; absent for file sources.
+            "item_latency_ms": self.fetcher.stats.get("item_latency_ms"),
+            "resumed_from": self.resumed_from,
+            "resumed_by": None,
+        }
+
+
 def run_ingestion(
     config: AppConfig,
-    mailbox: str,
-    folder: str,
+    mailbox: str | None,
+    folder: str | None,
     since: datetime | None,
     limit: int | None,
     use_checkpoint: bool,
+    fetch_mode: str = "items",
+    reprocess: bool = False,
+    source: str = "outlook",
+    source_path: str | None = None,
 ) -> dict:
-    storage = ContentAddressedStorage(config.storage_root)
-    storage.ensure_root()
+    spec = SourceSpec(
+        name=config.checkpoint_name,
+        source=source,
+        mailbox=mailbox,
+        folder=folder,
+        path=source_path,
+        fetch_mode=fetch_mode,
+        since=since,
+        limit=limit,
+    )
+    spec.validate()
+    result = run_jobs(config, [spec], use_checkpoint=use_checkpoint, reprocess=reprocess)
+    summary = result["sources"][spec.name]
+    if summary["exception"] is not None:
+        raise summary["exception"]
+    return {
+        "processed": summary["processed"],
+        "linked": summary["linked"],
+        "skipped_known": summary["skipped_known"],
+        "checkpoint": summary["checkpoint"],
+        "pipeline": result["pipeline"],
+    }
 
-    engine = make_engine(config.db_url)
-    Base.metadata.create_all(engine, checkfirst=True)
-    session_factory = make_session_factory(engine=engine)
 
-    with session_factory() as session:
+def run_jobs(
+    config: AppConfig,
+    specs: list[SourceSpec],
+    use_checkpoint: bool,
+    reprocess: bool = False,
+    runtime: IngestionRuntime | None = None,
+) -> dict:
+    """Ingest several sources in one run.
+
+    Each source is fetched on its own COM-initialized thread and keeps its own
+    checkpoint; all of them share the processing workers and the DB writer.
+    A source that fails is logged and reported under ``sources[name]["error"]``
+    while the others run to completion and are checkpointed; the run then
+    finishes as ``completed_with_errors``.
+    Pass a long-lived ``runtime`` to reuse connections, heads and COM state
+    across runs; setting its ``stop_event`` ends the run early after in-flight
+    messages are written.
+    """
+    if runtime is None:
+        with IngestionRuntime(config) as transient:
+            return run_jobs(config, specs, use_checkpoint, reprocess, runtime=transient)
+    storage = runtime.storage
+
+    with runtime.session_factory() as session:
         repo = Repository(session)
         run = repo.start_run()
-        checkpoint_value = repo.get_checkpoint(config.checkpoint_name) if use_checkpoint else None
-        checkpoint_dt = None
-        if checkpoint_value:
-            checkpoint_dt = datetime.fromisoformat(checkpoint_value)
-        effective_since = since or checkpoint_dt
-
-        fetcher = OutlookFetcher(
-            mailbox=mailbox,
-            folder_path=folder,
-            since=effective_since,
-            limit=limit,
-        )
-
-        email_body_head = EmailBodyHead()
-        calendar_head = CalendarInviteHead()
-        processed = 0
-        max_received = effective_since
 
-        for message in fetcher.iter_messages():
-            try:
-                email_id = make_email_id(message.entry_id, message.store_id)
-                normalized_text = html_to_text(message.body_html) or message.body_text
-                links = extract_links(message.body_text, message.body_html)
-                to_list = normalize_recipients(message.to)
-                cc_list = normalize_recipients(message.cc)
-                bcc_list = normalize_recipients(message.bcc)
-
-                calendar_details = CalendarDetails(
-                    start=None,
-                    end=None,
-                    timezone=None,
-                    location=None,
-                    organizer=None,
-                    attendees=None,
-                )
-                for attachment in message.attachments:
-                    ext = _safe_extension(attachment.filename)
-                    if ext == "ics":
-                        try:
-                            calendar_details = parse_ics(attachment.data)
-                        except Exception:
-                            logger.exception("Failed to parse .ics attachment")
-                        break
-                calendar_details = merge_calendar_fields(calendar_details, _calendar_from_message(message).__dict__)
-
-                email_payload = {
-                    "email_id": email_id,
-                    "source_system": "outlook",
-                    "outlook_entry_id": message.entry_id,
-                    "outlook_store_id": message.store_id,
-                    "received_at": message.received_time,
-                    "sent_at": message.sent_time,
-                    "subject": message.subject,
-                    "sender_name": message.sender_name,
-                    "sender_email": message.sender_email,
-                    "to_recipients": to_list,
-                    "cc_recipients": cc_list,
-                    "bcc_recipients": bcc_list,
-                    "conversation_id": message.conversation_id,
-                    "body_text_raw": message.body_text,
-                    "body_text_normalized": normalized_text,
-                    "body_html": message.body_html,
-                    "link_list": links,
-                    "is_calendar": bool(message.is_meeting or calendar_details.start or calendar_details.end),
-                    "calendar_start": calendar_details.start,
-                    "calendar_end": calendar_details.end,
-                    "calendar_timezone": calendar_details.timezone,
-                    "calendar_location": calendar_details.location,
-                    "organizer": calendar_details.organizer,
-                    "attendees": calendar_details.attendees,
-                    "processing_state": "ingested",
-                }
-                repo.upsert_email(email_payload)
-
-                attachment_records: list[tuple[OutlookAttachment, dict]] = []
-                for attachment in message.attachments:
-                    ext = _safe_extension(attachment.filename)
-                    stored = storage.store_bytes(attachment.data, ext=ext)
-                    attachment_id = make_attachment_id(
-                        email_id=email_id,
-                        sha256=stored.sha256,
-                        content_id=attachment.content_id,
-                        filename=attachment.filename,
-                    )
-                    payload = {
-                        "attachment_id": attachment_id,
-                        "email_id": email_id,
-                        "filename": attachment.filename,
-                        "ext": ext,
-                        "mime": None,
-                        "sha256": stored.sha256,
-                        "size_bytes": stored.size_bytes,
-                        "saved_path": str(stored.path),
-                        "is_inline": attachment.is_inline,
-                        "content_id": attachment.content_id,
-                    }
-                    repo.upsert_attachment(payload)
-                    attachment_records.append((attachment, payload))
-
-                # Email body head
-                head_input = HeadInput(
-                    email_id=email_id,
-                    subject=message.subject,
-                    body_text=message.body_text,
-                    body_html=message.body_html,
-                    is_calendar=message.is_meeting,
-                    received_at=message.received_time,
-                )
-                _run_head(repo, run.run_id, email_id, None, email_body_head, head_input)
-
-                # Calendar artifact for meeting items
-                if message.is_meeting:
-                    _store_calendar_artifact(repo, run.run_id, email_id, calendar_details)
+        known_ids = None if reprocess else runtime.known_ids(repo)
+
+        def is_known(entry_id: str, store_id: str) -> bool:
+            return make_email_id(entry_id, store_id) in known_ids
+
+        skip_entry = None if known_ids is None else is_known
+        identities = None if reprocess else IdentityResolver(runtime.session_factory)
+        runtime.addresses.reset_stats()
+        sources: dict[str, _SourceRun] = {}
+        for spec in specs:
+            checkpoint_dt, resumed_from = _starting_point(repo, run.run_id, spec, use_checkpoint, runtime)
+            effective_since = spec.since or checkpoint_dt
+            com = runtime.com_session(spec.name) if spec.source == "outlook" else None
+            fetcher = _make_source(
+                config,
+                spec,
+                effective_since,
+                skip_entry,
+                storage,
+                com[1] if com else None,
+                identities,
+                runtime.addresses,
+            )
+            # With several sources, default each one's share to one queue's worth of messages.
+            max_in_flight = spec.max_in_flight or (config.pipeline_queue_size if len(specs) > 1 else None)
+            sources[spec.name] = _SourceRun(spec, fetcher, effective_since, checkpoint_dt, resumed_from, max_in_flight)
+            sources[spec.name].com_thread = com[0] if com else None
+
+        email_body_head = runtime.email_body_head
+        parse_counter = ParseCounter()
+        result_cache = (
+            HeadResultCache(runtime.session_factory, config.head_cache_max_bytes) if config.head_cache_max_bytes else None
+        )
 
-                # Attachment heads
-                for attachment, payload in attachment_records:
-                    ext = payload.get("ext")
-                    head = route_by_extension(ext)
-                    if not head:
+        def run_state(state: str, source_state: str | None = None) -> dict:
+            return {
+                "state": state,
+                "sources": {name: source_run.state(source_state or state) for name, source_run in sources.items()},
+                "processed": sum(source_run.processed for source_run in sources.values()),
+                "linked": sum(source_run.linked for source_run in sources.values()),
+                "messages_fetched": sum(source_run.progress.registered for source_run in sources.values()),
+                "parses": parse_counter.as_dict(),
+                "head_cache": result_cache.stats() if result_cache else None,
+                "addresses": runtime.addresses.stats(),
+                "heartbeat_at": datetime.utcnow().isoformat(),
+            }
+
+        def persist_progress() -> None:
+            if result_cache:
+                result_cache.evict(repo)
+            runtime.addresses.flush(repo)
+            checkpoints = {}
+            for source_run in sources.values():
+                # Unordered sources can only checkpoint once every item is durable.
+                candidate = source_run.checkpoint_candidate() if source_run.fetcher.ordered else None
+                if candidate:
+                    checkpoints[source_run.spec.checkpoint_key] = candidate.isoformat()
+                    source_run.last_checkpoint = candidate
+            repo.record_progress(run.run_id, run_state("running"), checkpoints)
+
+        def producer_for(source_run: _SourceRun) -> Callable[[], Iterator[tuple[_SourceRun, int, OutlookMessage]]]:
+            def fetch() -> Iterator[OutlookMessage]:
+                # Runs on the source's COM thread: deferred bodies/attachments must be loaded here.
+                for message in source_run.fetcher.iter_messages():
+                    try:
+                        message.load_details()
+                    except Exception:
+                        logger.exception("Failed to load Outlook item %s", message.entry_id)
                         continue
-                    head_input = HeadInput(
-                        email_id=email_id,
-                        subject=message.subject,
-                        body_text=message.body_text,
-                        body_html=message.body_html,
-                        is_calendar=message.is_meeting,
-                        attachment_id=payload["attachment_id"],
-                        attachment_name=payload["filename"],
-                        attachment_ext=ext,
-                        attachment_bytes=attachment.data,
-                        attachment_content_id=attachment.content_id,
-                        received_at=message.received_time,
-                    )
-                    _run_head(repo, run.run_id, email_id, payload["attachment_id"], head, head_input)
-
-                processed += 1
-                if message.received_time and (not max_received or message.received_time > max_received):
-                    max_received = message.received_time
-            except Exception:
-                logger.exception("Failed to process message")
-                _add_event(
-                    repo,
+                    yield message
+
+            def produce() -> Iterator[tuple[_SourceRun, int, OutlookMessage]]:
+                messages = source_run.com_thread.iterate(fetch) if source_run.com_thread else fetch()
+                try:
+                    for message in messages:
+                        if runtime.stopping or not source_run.acquire_slot(pipeline):
+                            return
+                        yield source_run, source_run.progress.register(message.received_time), message
+                except Exception as exc:
+                    logger.exception("Source %s failed", source_run.spec.name)
+                    source_run.error = exc
+
+            return produce
+
+        def process(item: tuple[_SourceRun, int, OutlookMessage]) -> MessageWrites:
+            source_run, sequence, message = item
+            try:
+                writes = _process_message(
+                    message,
                     run.run_id,
-                    email_id=None,
-                    attachment_id=None,
-                    head_name="message",
-                    status="error",
-                    error_message="message_processing_failed",
+                    config,
+                    storage,
+                    email_body_head,
+                    executor,
+                    parse_counter,
+                    result_cache,
+                    identities,
                 )
+            finally:
+                source_run.release_slot()
+            writes.source = source_run.spec.name
+            writes.sequence = sequence
+            return writes
+
+        def committed(writes: MessageWrites) -> None:
+            if result_cache:
+                result_cache.settle(writes)
+            source_run = sources[writes.source]
+            source_run.progress.complete(writes.sequence)
+            if not writes.ok:
+                return
+            if writes.linked:
+                source_run.linked += 1
+            else:
+                source_run.processed += 1
+            if known_ids is not None:
+                known_ids.add(writes.email_id)
+
+        def failed(writes: MessageWrites, exc: Exception) -> None:
+            if result_cache:
+                result_cache.settle(writes)
+            sources[writes.source].progress.complete(writes.sequence)
+            _add_event(repo, run.run_id, None, None, "message", "error", "message_persist_failed")
+
+        writer = BatchedWriter(
+            repo,
+            max_messages=config.db_batch_messages,
+            max_seconds=config.db_batch_seconds,
+            on_committed=committed,
+            on_failed=failed,
+            on_flushed=persist_progress,
+        )
+
+        repo.record_progress(run.run_id, run_state("running"))
+        pipeline = StagedPipeline(
+            workers=config.pipeline_workers,
+            queue_size=config.pipeline_queue_size,
+            producer_context=com_apartment,
+        )
+        executor = runtime.head_executor
+        try:
+            report = pipeline.run(
+                [producer_for(source_run) for source_run in sources.values()],
+                process,
+                writer.add,
+                idle=writer.tick,
+            )
+        finally:
+            writer.flush()
+
+        stopped = runtime.stopping
+        checkpoints = {}
+        for source_run in sources.values():
+            # A stopped or failed run left older items unfetched in unordered sources.
+            if (stopped or source_run.error) and not source_run.fetcher.ordered:
                 continue
+            final_checkpoint = source_run.checkpoint_candidate()
+            if final_checkpoint:
+                checkpoints[source_run.spec.checkpoint_key] = final_checkpoint.isoformat()
+                source_run.last_checkpoint = final_checkpoint
+        for source_run in sources.values():
+            if source_run.fetcher.checkpoints:
+                runtime.checkpoints[source_run.spec.checkpoint_key] = source_run.last_checkpoint
+        report["db_commits"] = writer.commits
+        runtime.addresses.flush(repo)
+        if stopped:
+            final_state = "stopped"
+        elif any(source_run.error for source_run in sources.values()):
+            final_state = "completed_with_errors"
+        else:
+            final_state = "completed"
+        stats = run_state(final_state, "stopped" if stopped else "completed")
+        stats["pipeline"] = report
+        repo.record_progress(run.run_id, stats, checkpoints)
+        repo.finish_run(run.run_id, stats=stats)
+        return {
+            "processed": stats["processed"],
+            "sources": {
+                name: {
+                    "processed": source_run.processed,
+                    "linked": source_run.linked,
+                    "skipped_known": source_run.fetcher.stats["skipped_known"],
+                    "checkpoint": source_run.last_checkpoint.isoformat() if source_run.last_checkpoint else None,
+                    "error": stats["sources"][name]["error"],
+                    "exception": source_run.error,
+                }
+                for name, source_run in sources.items()
+            },
+            "pipeline": report,
+        }
+
 
-        if max_received:
-            repo.set_checkpoint(config.checkpoint_name, max_received.isoformat())
-        repo.finish_run(run.run_id, stats={"processed": processed})
-        return {"processed": processed, "checkpoint": max_received.isoformat() if max_received else None}
+def _starting_point(
+    repo: Repository, run_id: str, spec: SourceSpec, use_checkpoint: bool, runtime: IngestionRuntime
+) -> tuple[datetime | None, str | None]:
+    """Stored checkpoint for ``spec``, advanced to an interrupted run's durable watermark."""
+    if not use_checkpoint or spec.entry_ids:
+        return None, None
+    if spec.checkpoint_key in runtime.checkpoints:
+        # This process wrote it last; nothing else can have moved it.
+        return runtime.checkpoints[spec.checkpoint_key], None
+    checkpoint_value = repo.get_checkpoint(spec.checkpoint_key)
+    checkpoint_dt = datetime.fromisoformat(checkpoint_value) if checkpoint_value else None
+    interrupted = repo.find_interrupted_run(spec.checkpoint_key, exclude_run_id=run_id)
+    if not interrupted:
+        return checkpoint_dt, None
+    resumed_from, source_stats = interrupted
+    low = source_stats.get("resume_from")
+    if low and is_later(datetime.fromisoformat(low), checkpoint_dt):
+        checkpoint_dt = datetime.fromisoformat(low)
+    logger.info("Resuming %s from interrupted run %s at %s", spec.name, resumed_from, checkpoint_dt)
+    repo.mark_source_resumed(resumed_from, spec.checkpoint_key, run_id)
+    return checkpoint_dt, resumed_from
+
+
+def _make_source(
+    config: AppConfig,
+    spec: SourceSpec,
+    since: datetime | None,
+    skip_entry: Callable[[str, str], bool] | None,
+    storage: ContentAddressedStorage,
+    session: OutlookSession | None = None,
+    identities: IdentityResolver | None = None,
+    addresses: AddressResolver | None = None,
+) -> MessageSource:
+    if spec.source == "files":
+        return FileMessageSource(
+            spec.path,
+            since=since,
+            limit=spec.limit,
+            skip_entry=skip_entry,
+            walk_workers=config.pipeline_workers,
+            until=spec.until,
+        )
+    # Oldest-first traversal lets the checkpoint advance safely mid-run. A bare
+    # ``limit`` keeps its "newest N" meaning, so that case stays newest-first
+    # and only checkpoints once the run completes.
+    return OutlookFetcher(
+        mailbox=spec.mailbox,
+        folder_path=spec.folder,
+        since=since,
+        limit=spec.limit,
+        fetch_mode=spec.fetch_mode,
+        skip_entry=skip_entry,
+        storage=storage,
+        spool_threshold=config.attachment_spool_bytes,
+        memory_budget=config.message_memory_budget,
+        ascending=spec.limit is None or since is not None,
+        session=session,
+        entry_ids=spec.entry_ids,
+        window_items=config.com_window_items,
+        recycle_items=config.namespace_recycle_items,
+        resolve_message_id=identities.lookup_message_id if identities is not None else None,
+        addresses=addresses,
+        until=spec.until,
+    )
 
 
-def _store_calendar_artifact(repo: Repository, run_id: str, email_id: str, details: CalendarDetails) -> None:
+def _store_calendar_artifact(repo: Repository | MessageWrites, run_id: str, email_id: str, details: CalendarDetails) -> None:
     payload = {
         "start": details.start.isoformat() if details.start else None,
         "end": details.end.isoformat() if details.end else None,
@@ -276,9 +736,25 @@ def _store_calendar_artifact(repo: Repository, run_id: str, email_id: str, detai
     _add_event(repo, run_id, email_id, None, "calendar_meeting", "success", None)
 
 
-def _run_head(repo: Repository, run_id: str, email_id: str, attachment_id: str | None, head, head_input: HeadInput) -> None:
+def _run_head(
+    repo: Repository | MessageWrites,
+    run_id: str,
+    email_id: str,
+    attachment_id: str | None,
+    head,
+    head_input: HeadInput,
+    executor: HeadExecutor | None = None,
+    cache: HeadResultCache | None = None,
+    sha256: str | None = None,
+) -> None:
     try:
-        result = head.process(head_input)
+        if not (cache and sha256 and cache.serves(head)):
+            cache = None
+        result = cache.lookup(head, sha256, repo) if cache else None
+        if result is None:
+            result = executor.run(head, head_input) if executor else head.process(head_input)
+            if cache:
+                cache.store(head, sha256, result, repo)
         for artifact in result.artifacts:
             safe_payload = make_json_safe(artifact.payload) if artifact.payload is not None else None
             safe_metadata = make_json_safe(artifact.metadata) if artifact.metadata is not None else None
@@ -306,6 +782,17 @@ def _run_head(repo: Repository, run_id: str, email_id: str, attachment_id: str |
             error_message=None,
             metrics=result.metrics,
         )
+    except HeadBudgetExceeded as exc:
+        logger.warning("Head %s stopped: %s", head.name, exc)
+        _add_event(
+            repo,
+            run_id,
+            email_id,
+            attachment_id,
+            head.name,
+            status=exc.status,
+            error_message=str(exc),
+        )
     except Exception as exc:
         logger.exception("Head failed: %s", head.name)
         _add_event(
@@ -320,7 +807,7 @@ def _run_head(repo: Repository, run_id: str, email_id: str, attachment_id: str |
 
 
 def _add_event(
-    repo: Repository,
+    repo: Repository | MessageWrites,
     run_id: str,
     email_id: str | None,
     attachment_id: str | None,
@@ -0,0 +1,60 @@
+"""Run progress tracking for resumable, checkpointed ingestion."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import threading
+
+from email_ingestion.util.time import is_later
+
+
+class ProgressTracker:
+    """Low/high ReceivedTime watermarks over messages that finish out of order.
+
+    Messages are registered in fetch order (ascending ReceivedTime) and
+    completed in whatever order the workers and writer finish them. The low
+    watermark only advances over a contiguous prefix of completed messages, so
+    everything at or before it is durable and a resumed run can restart there.
+    """
+
+    def __init__(self, start: datetime | None = None) -> None:
+        self.low_watermark = start
+        self.high_watermark = start
+        self.completed = 0
+        self._received: dict[int, datetime | None] = {}
+        self._done: set[int] = set()
+        self._next_sequence = 0
+        self._contiguous = 0
+        self._lock = threading.Lock()
+
+    def register(self, received: datetime | None) -> int:
+        with self._lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            self._received[sequence] = received
+            return sequence
+
+    def complete(self, sequence: int) -> None:
+        with self._lock:
+            self._done.add(sequence)
+            self.completed += 1
+            received = self._received.get(sequence)
+            if received is not None and is_later(received, self.high_watermark):
+                self.high_watermark = received
+            while self._contiguous in self._done:
+                self._done.discard(self._contiguous)
+                received = self._received.pop(self._contiguous)
+                if received is not None and is_later(received, self.low_watermark):
+                    self.low_watermark = received
+                self._contiguous += 1
+
+    @property
+    def registered(self) -> int:
+        with self._lock:
+            return self._next_sequence
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._next_sequence - self._contiguous
+
@@ -0,0 +1,107 @@
+"""Persistent head result cache keyed by attachment content."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from datetime import datetime
+import threading
+from typing import Callable
+
+from email_ingestion.db.repo import Repository
+from email_ingestion.heads.base import Artifact, HeadResult
+from email_ingestion.pipeline.writes import MessageWrites
+from email_ingestion.util.json import json_dumps_safe, make_json_safe
+
+
+def cache_key(head, sha256: str) -> str:
+    return f"{head.name}:{getattr(head, 'version', '0')}:{sha256}"
+
+
+class HeadResultCache:
+    """Reuse a head's artifacts for attachment bytes it has already processed.
+
+    Entries are keyed by (head name, head version, attachment sha256); bumping a
+    head's ``version`` invalidates its old entries. Lookups use their own
+    session so they are safe from worker threads; new entries and last-used
+    updates are recorded on the message's :class:`MessageWrites` and committed
+    by the writer. Results produced earlier in the same run are served from
+    memory until :meth:`settle` sees the message that wrote them committed.
+    :meth:`evict` trims the table back to ``max_bytes`` by least recent use.
+    Only heads that declare ``cacheable = True`` are cached: their output must
+    depend on the attachment bytes alone.
+    """
+
+    def __init__(self, session_factory: Callable, max_bytes: int) -> None:
+        self.session_factory = session_factory
+        self.max_bytes = max_bytes
+        self._recent: dict[str, dict] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @staticmethod
+    def serves(head) -> bool:
+        return getattr(head, "cacheable", False)
+
+    def lookup(self, head, sha256: str, writes: Repository | MessageWrites) -> HeadResult | None:
+        key = cache_key(head, sha256)
+        with self._lock:
+            row = self._recent.get(key)
+        if row is None:
+            with self.session_factory() as session:
+                entry = Repository(session).get_head_result(key)
+                if entry is not None:
+                    row = {"artifacts": entry.artifacts, "metrics": entry.metrics}
+        self._count(head.name, "hits" if row is not None else "misses")
+        if row is None:
+            return None
+        writes.touch_head_result({"cache_key": key, "last_used_at": datetime.utcnow()})
+        metrics = dict(row["metrics"] or {})
+        metrics["cache_hit"] = True
+        return HeadResult(artifacts=[Artifact(**artifact) for artifact in row["artifacts"]], metrics=metrics)
+
+    def store(self, head, sha256: str, result: HeadResult, writes: Repository | MessageWrites) -> None:
+        key = cache_key(head, sha256)
+        artifacts = [make_json_safe(asdict(artifact)) for artifact in result.artifacts]
+        metrics = make_json_safe(result.metrics) if result.metrics is not None else None
+        now = datetime.utcnow()
+        row = {
+            "cache_key": key,
+            "head_name": head.name,
+            "head_version": str(getattr(head, "version", "0")),
+            "sha256": sha256,
+            "artifacts": artifacts,
+            "metrics": metrics,
+            "size_bytes": len(json_dumps_safe(artifacts)),
+            "created_at": now,
+            "last_used_at": now,
+        }
+        with self._lock:
+            self._recent[key] = row
+            self._dirty = True
+        writes.cache_head_result(row)
+
+    def settle(self, writes: MessageWrites) -> None:
+        """Forget the in-memory entries ``writes`` stored, once the writer has committed or dropped it."""
+        keys = [payload["cache_key"] for method, payload in writes.operations if method == "cache_head_result"]
+        if keys:
+            with self._lock:
+                for key in keys:
+                    self._recent.pop(key, None)
+
+    def evict(self, repo: Repository) -> int:
+        """Trim the table to ``max_bytes`` if entries were added since the last call."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+        if not dirty:
+            return 0
+        return repo.evict_head_results(self.max_bytes)
+
+    def _count(self, head_name: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(head_name, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._stats.items()}
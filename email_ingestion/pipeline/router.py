@@ -28,3 +28,10 @@ def route_by_extension(ext: str | None):
         if head.supported_extensions and ext in head.supported_extensions:
             return head
     return None
+
+
+def get_head(name: str):
+    for head in DEFAULT_HEADS:
+        if head.name == name:
+            return head
+    raise KeyError(f"Unknown head '{name}'")
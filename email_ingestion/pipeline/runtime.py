@@ -0,0 +1,115 @@
+"""Long-lived ingestion state shared across runs."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+import threading
+from typing import Callable
+
+from email_ingestion.config import AppConfig
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import Base, make_engine, make_session_factory
+from email_ingestion.db import models as _models  # noqa: F401 - ensure tables are registered
+from email_ingestion.heads.email_body import EmailBodyHead
+from email_ingestion.outlook.addresses import AddressResolver
+from email_ingestion.outlook.fetcher import OutlookSession
+from email_ingestion.outlook.mapi import ComThread
+from email_ingestion.pipeline.dedupe import KnownEmailIndex
+from email_ingestion.pipeline.head_pool import HeadExecutor, HeadLimits
+from email_ingestion.storage.cas import make_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionRuntime:
+    """Everything :func:`run_jobs` needs that is expensive to rebuild.
+
+    A one-shot run creates and closes its own runtime. The daemon keeps one
+    alive so the engine (and schema check), storage, head instances and head
+    worker processes, the known-email index, the Exchange address cache, last
+    checkpoints and, with
+    ``keep_com``, each Outlook source's COM thread with its namespace and
+    resolved folder survive from one poll to the next.
+    """
+
+    def __init__(self, config: AppConfig, keep_com: bool = False) -> None:
+        self.config = config
+        self.keep_com = keep_com
+        self.storage = make_storage(config)
+        self.storage.ensure_root()
+        self.engine = make_engine(config.db_url)
+        Base.metadata.create_all(self.engine, checkfirst=True)
+        self.session_factory = make_session_factory(engine=self.engine)
+        self.email_body_head = EmailBodyHead()
+        self.head_executor = HeadExecutor(
+            processes=config.head_processes,
+            pass_paths=config.head_pass_paths,
+            isolate=config.head_isolate,
+            default_limits=HeadLimits(config.head_timeout_seconds, config.head_memory_limit_mb),
+            head_limits={
+                name: HeadLimits(config.head_timeouts.get(name), config.head_memory_limits_mb.get(name))
+                for name in set(config.head_timeouts) | set(config.head_memory_limits_mb)
+            },
+        )
+        self.addresses = AddressResolver(
+            self.session_factory,
+            max_entries=config.address_cache_size,
+            ttl=timedelta(hours=config.address_cache_ttl_hours),
+        )
+        # Last committed checkpoint per key, so later runs skip the DB read.
+        self.checkpoints: dict[str, datetime | None] = {}
+        self.stop_event = threading.Event()
+        self._known_ids: KnownEmailIndex | None = None
+        self._known_ids_lock = threading.Lock()
+        self._com: dict[str, tuple[ComThread, OutlookSession]] = {}
+
+    @property
+    def stopping(self) -> bool:
+        return self.stop_event.is_set()
+
+    def known_ids(self, repo: Repository) -> KnownEmailIndex:
+        # Backfill partitions start runs concurrently; they must share one index.
+        with self._known_ids_lock:
+            if self._known_ids is None:
+                self._known_ids = KnownEmailIndex.load(repo, confirm=self.exists_check())
+            return self._known_ids
+
+    def exists_check(self) -> Callable[[str], bool]:
+        """Known-email check with its own session, safe to call from the fetch thread."""
+        session_factory = self.session_factory
+
+        def exists(email_id: str) -> bool:
+            with session_factory() as session:
+                return Repository(session).is_known(email_id)
+
+        return exists
+
+    def com_session(self, source_name: str) -> tuple[ComThread, OutlookSession] | None:
+        if not self.keep_com:
+            return None
+        if source_name not in self._com:
+            self._com[source_name] = (ComThread(name=f"ingest-com-{source_name}"), OutlookSession())
+        return self._com[source_name]
+
+    def reset_com(self, source_name: str) -> None:
+        """Re-resolve the namespace and folder next time, e.g. after Outlook restarted."""
+        entry = self._com.get(source_name)
+        if entry:
+            thread, session = entry
+            thread.call(session.reset)
+
+    def close(self) -> None:
+        self.head_executor.close()
+        for thread, _ in self._com.values():
+            thread.close()
+        self._com.clear()
+        self.storage.close()
+        self.engine.dispose()
+
+    def __enter__(self) -> "IngestionRuntime":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,268 @@
+"""Threaded fetch -> process -> write pipeline with bounded queues."""
+
+from __future__ import annotations
+
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Generic, Iterable, Sequence, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+_IDLE = object()
+_POLL_SECONDS = 0.2
+
+
+@dataclass
+class StageStats:
+    name: str
+    threads: int = 1
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+
+    def as_dict(self, wall_seconds: float) -> dict:
+        capacity = wall_seconds * self.threads
+        return {
+            "threads": self.threads,
+            "items": self.items,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "utilization": round(self.busy_seconds / capacity, 3) if capacity else 0.0,
+        }
+
+
+class _MeteredQueue:
+    """Bounded queue that samples its depth on every put."""
+
+    def __init__(self, name: str, maxsize: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def put(self, item, stop: threading.Event) -> bool:
+        """Block until there is room (backpressure) unless the pipeline is stopping."""
+        while not stop.is_set():
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+            except queue.Full:
+                continue
+            depth = self._queue.qsize()
+            with self._lock:
+                self.samples += 1
+                self.depth_total += depth
+                self.max_depth = max(self.max_depth, depth)
+            return True
+        return False
+
+    def put_nowait(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            pass
+
+    def get(self, stop: threading.Event, idle: bool = False):
+        while True:
+            try:
+                return self._queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+                if idle:
+                    return _IDLE
+
+    def drain(self) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def as_dict(self) -> dict:
+        return {
+            "capacity": self.maxsize,
+            "max_depth": self.max_depth,
+            "avg_depth": round(self.depth_total / self.samples, 2) if self.samples else 0.0,
+        }
+
+
+class StagedPipeline(Generic[T, R]):
+    """Run ``produce`` on a dedicated thread, ``process`` on a worker pool and
+    ``write`` on the calling thread.
+
+    ``produce`` may also be a sequence of producers; each gets its own thread
+    (and its own ``producer_context``) and they share the worker pool.
+
+    Queues between stages are bounded so a slow stage applies backpressure to
+    the one before it. If ``produce`` raises, items already fetched are still
+    processed and written before the error is re-raised from :meth:`run`; an
+    exception from ``write`` stops the pipeline immediately. ``process`` is
+    expected to capture per-item failures in its result.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 16,
+        producer_context: Callable[[], AbstractContextManager] | None = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.queue_size = max(queue_size, 1)
+        self.producer_context = producer_context or nullcontext
+        self.report: dict = {}
+        self._stop = threading.Event()
+
+    @property
+    def stopping(self) -> bool:
+        """True once the pipeline is shutting down; blocking producers should give up."""
+        return self._stop.is_set()
+
+    def run(
+        self,
+        produce: Callable[[], Iterable[T]] | Sequence[Callable[[], Iterable[T]]],
+        process: Callable[[T], R],
+        write: Callable[[R], None],
+        idle: Callable[[], None] | None = None,
+    ) -> dict:
+        """Run the pipeline to completion; ``idle`` is called on the writer thread
+        whenever no result arrived for a short while (e.g. to flush on a timer)."""
+        producers = list(produce) if isinstance(produce, (list, tuple)) else [produce]
+        stop = self._stop = threading.Event()
+        work_queue = _MeteredQueue("fetch->process", self.queue_size)
+        result_queue = _MeteredQueue("process->write", self.queue_size)
+        fetch_stats = StageStats("fetch", threads=len(producers))
+        process_stats = StageStats("process", threads=self.workers)
+        write_stats = StageStats("write")
+        stats_lock = threading.Lock()
+        failures: list[BaseException] = []
+        producers_left = [len(producers)]
+
+        def producer(source: Callable[[], Iterable[T]]) -> None:
+            try:
+                with self.producer_context():
+                    iterator = iter(source())
+                    while not stop.is_set():
+                        started = time.perf_counter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            break
+                        with stats_lock:
+                            fetch_stats.busy_seconds += time.perf_counter() - started
+                            fetch_stats.items += 1
+                        blocked = time.perf_counter()
+                        if not work_queue.put(item, stop):
+                            break
+                        with stats_lock:
+                            fetch_stats.blocked_seconds += time.perf_counter() - blocked
+            except BaseException as exc:  # surfaced from run() once in-flight items drain
+                logger.exception("Pipeline producer failed")
+                with stats_lock:
+                    fetch_stats.errors += 1
+                failures.append(exc)
+            finally:
+                with stats_lock:
+                    producers_left[0] -= 1
+                    last = producers_left[0] == 0
+                if last:
+                    for _ in range(self.workers):
+                        if not work_queue.put(_DONE, stop):
+                            break
+
+        def worker() -> None:
+            try:
+                while True:
+                    item = work_queue.get(stop)
+                    if item is _DONE:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        result = process(item)
+                    except Exception:
+                        logger.exception("Pipeline worker failed")
+                        with stats_lock:
+                            process_stats.errors += 1
+                        continue
+                    finally:
+                        with stats_lock:
+                            process_stats.busy_seconds += time.perf_counter() - started
+                    with stats_lock:
+                        process_stats.items += 1
+                    blocked = time.perf_counter()
+                    if not result_queue.put(result, stop):
+                        return
+                    with stats_lock:
+                        process_stats.blocked_seconds += time.perf_counter() - blocked
+            finally:
+                if stop.is_set():
+                    result_queue.put_nowait(_DONE)
+                else:
+                    result_queue.put(_DONE, stop)
+
+        threads = [
+            threading.Thread(target=producer, args=(source,), name=f"ingest-fetch-{i}", daemon=True)
+            for i, source in enumerate(producers)
+        ]
+        threads += [
+            threading.Thread(target=worker, name=f"ingest-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        wall_started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        finished_workers = 0
+        try:
+            while finished_workers < self.workers:
+                result = result_queue.get(stop, idle=idle is not None)
+                if result is _IDLE:
+                    idle()
+                    continue
+                if result is _DONE:
+                    finished_workers += 1
+                    continue
+                started = time.perf_counter()
+                try:
+                    write(result)
+                finally:
+                    write_stats.busy_seconds += time.perf_counter() - started
+                write_stats.items += 1
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            stop.set()
+            work_queue.drain()
+            result_queue.drain()
+            for thread in threads:
+                thread.join(timeout=5)
+            wall = time.perf_counter() - wall_started
+            self.report = {
+                "wall_seconds": round(wall, 3),
+                "stages": {
+                    stats.name: stats.as_dict(wall)
+                    for stats in (fetch_stats, process_stats, write_stats)
+                },
+                "queues": {q.name: q.as_dict() for q in (work_queue, result_queue)},
+            }
+            logger.info("Pipeline report: %s", self.report)
+        if failures:
+            raise failures[0]
+        return self.report
@@ -0,0 +1,161 @@
+"""Deferred repository writes produced by pipeline workers."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import time
+from typing import Callable
+
+from email_ingestion.db.repo import Repository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MessageWrites:
+    """Records the Repository calls for one message so a single writer can apply them.
+
+    Workers use it in place of a ``Repository``; only the DB writer stage touches
+    the session.
+    """
+
+    email_id: str | None = None
+    received_time: datetime | None = None
+    ok: bool = True
+    source: str | None = None
+    sequence: int | None = None
+    # Set when the message was recognized as a moved/copied existing email.
+    linked: bool = False
+    operations: list[tuple[str, dict]] = field(default_factory=list)
+
+    def upsert_email(self, payload: dict) -> str:
+        self.operations.append(("upsert_email", payload))
+        return payload["email_id"]
+
+    def upsert_attachment(self, payload: dict) -> str:
+        self.operations.append(("upsert_attachment", payload))
+        return payload["attachment_id"]
+
+    def add_artifact(self, payload: dict) -> None:
+        self.operations.append(("add_artifact", payload))
+
+    def add_processing_event(self, payload: dict) -> None:
+        self.operations.append(("add_processing_event", payload))
+
+    def cache_head_result(self, payload: dict) -> None:
+        self.operations.append(("cache_head_result", payload))
+
+    def touch_head_result(self, payload: dict) -> None:
+        self.operations.append(("touch_head_result", payload))
+
+    def add_identity(self, payload: dict) -> None:
+        self.operations.append(("add_identity", payload))
+
+    def link_alias(self, payload: dict) -> None:
+        self.operations.append(("link_alias", payload))
+
+
+class BatchedWriter:
+    """Unit of work for the DB writer stage.
+
+    Buffers :class:`MessageWrites` and flushes them with one executemany per
+    table and a single commit every ``max_messages`` messages or
+    ``max_seconds`` seconds. If a batch fails it is rolled back and replayed one
+    message per transaction, so only the offending message is lost.
+    ``on_flushed`` runs after every flush that wrote something, once the
+    per-message callbacks have fired.
+    """
+
+    def __init__(
+        self,
+        repo: Repository,
+        max_messages: int = 100,
+        max_seconds: float = 5.0,
+        on_committed: Callable[[MessageWrites], None] | None = None,
+        on_failed: Callable[[MessageWrites, Exception], None] | None = None,
+        on_flushed: Callable[[], None] | None = None,
+    ) -> None:
+        self.repo = repo
+        self.max_messages = max(max_messages, 1)
+        self.max_seconds = max_seconds
+        self.on_committed = on_committed
+        self.on_failed = on_failed
+        self.on_flushed = on_flushed
+        self.pending: list[MessageWrites] = []
+        self._last_flush = time.monotonic()
+        self.commits = 0
+
+    def add(self, writes: MessageWrites) -> None:
+        self.pending.append(writes)
+        if len(self.pending) >= self.max_messages:
+            self.flush()
+        else:
+            self.tick()
+
+    def tick(self) -> None:
+        """Flush if the oldest buffered message has waited ``max_seconds``."""
+        if self.pending and time.monotonic() - self._last_flush >= self.max_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self.pending = self.pending, []
+        self._last_flush = time.monotonic()
+        if not batch:
+            return
+        self._write_batch(batch)
+        if self.on_flushed:
+            self.on_flushed()
+
+    def _write_batch(self, batch: list[MessageWrites]) -> None:
+        session = self.repo.session
+        try:
+            self.repo.write_rows(_rows_by_table(batch))
+            session.commit()
+            self.commits += 1
+        except Exception:
+            session.rollback()
+            logger.warning("Batch of %s messages failed; retrying individually", len(batch), exc_info=True)
+            for writes in batch:
+                self._flush_one(writes)
+            return
+        if self.on_committed:
+            for writes in batch:
+                self.on_committed(writes)
+
+    def _flush_one(self, writes: MessageWrites) -> None:
+        session = self.repo.session
+        try:
+            self.repo.write_rows(_rows_by_table([writes]))
+            session.commit()
+            self.commits += 1
+        except Exception as exc:
+            session.rollback()
+            logger.exception("Failed to persist message %s", writes.email_id)
+            if self.on_failed:
+                self.on_failed(writes, exc)
+            return
+        if self.on_committed:
+            self.on_committed(writes)
+
+
+_TABLE_FOR_OPERATION = {
+    "upsert_email": "emails",
+    "upsert_attachment": "attachments",
+    "add_artifact": "extracted_artifacts",
+    "add_processing_event": "processing_events",
+    "cache_head_result": "head_result_cache",
+    "touch_head_result": "head_result_cache_touches",
+    "add_identity": "email_identities",
+    "link_alias": "email_aliases",
+}
+
+
+def _rows_by_table(batch: list[MessageWrites]) -> dict[str, list[dict]]:
+    rows: dict[str, list[dict]] = {}
+    for writes in batch:
+        for method, payload in writes.operations:
+            rows.setdefault(_TABLE_FOR_OPERATION[method], []).append(payload)
+    return rows
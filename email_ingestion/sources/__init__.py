@@ -0,0 +1 @@
+"""Message sources feeding the ingestion pipeline."""
@@ -0,0 +1,24 @@
+"""Message source interface."""
+
+from __future__ import annotations
+
+from typing import Iterator, Protocol
+
+from email_ingestion.outlook.fetcher import OutlookMessage
+
+
+SOURCE_KINDS = ("outlook", "files")
+
+
+class MessageSource(Protocol):
+    # Counters surfaced in the run report, e.g. ``skipped_known``.
+    stats: dict
+    # True when messages arrive in ascending ReceivedTime order, which lets the
+    # orchestrator advance the checkpoint mid-run.
+    ordered: bool
+    # False for sources that only see part of the folder (e.g. pushed new-item
+    # events); their runs never move the checkpoint.
+    checkpoints: bool
+
+    def iter_messages(self) -> Iterator[OutlookMessage]:
+        ...
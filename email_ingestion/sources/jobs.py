@@ -0,0 +1,84 @@
+"""Job files describing several sources ingested in one run."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+import json
+from pathlib import Path
+
+from email_ingestion.sources.base import SOURCE_KINDS
+from email_ingestion.util.time import parse_datetime
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """One mailbox folder or export tree, with its own checkpoint key.
+
+    ``max_in_flight`` caps how many of this source's messages may be queued or
+    processing at once so a busy folder cannot starve the others.
+    """
+
+    name: str
+    source: str = "outlook"
+    mailbox: str | None = None
+    folder: str | None = None
+    path: str | None = None
+    checkpoint_name: str | None = None
+    fetch_mode: str = "items"
+    since: datetime | None = None
+    until: datetime | None = None
+    limit: int | None = None
+    max_in_flight: int | None = None
+    # Fetch just these (entry_id, store_id) pairs instead of walking the folder.
+    entry_ids: tuple[tuple[str, str], ...] = ()
+
+    @property
+    def checkpoint_key(self) -> str:
+        return self.checkpoint_name or self.name
+
+    def validate(self) -> None:
+        if self.source not in SOURCE_KINDS:
+            raise ValueError(f"Source '{self.name}': unknown kind '{self.source}'. Expected one of {SOURCE_KINDS}")
+        if self.source == "outlook" and not (self.mailbox and self.folder):
+            raise ValueError(f"Source '{self.name}': outlook sources need mailbox and folder")
+        if self.source == "files" and not self.path:
+            raise ValueError(f"Source '{self.name}': files sources need a path")
+
+
+_SPEC_FIELDS = {f.name for f in fields(SourceSpec)}
+
+
+def load_job_file(path: str | Path) -> list[SourceSpec]:
+    """Read a JSON job file.
+
+    ``{"defaults": {...}, "sources": [{"name": ..., "mailbox": ..., "folder": ...}, ...]}``;
+    keys in ``defaults`` apply to every source that does not set them.
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        document = json.load(handle)
+    defaults = document.get("defaults") or {}
+    specs = []
+    names: set[str] = set()
+    checkpoints: set[str] = set()
+    for index, entry in enumerate(document.get("sources") or []):
+        values = {**defaults, **entry}
+        unknown = set(values) - _SPEC_FIELDS
+        if unknown:
+            raise ValueError(f"Job source #{index}: unknown keys {sorted(unknown)}")
+        values.setdefault("name", values.get("checkpoint_name") or f"{values.get('mailbox')}/{values.get('folder')}")
+        for key in ("since", "until"):
+            if isinstance(values.get(key), str):
+                values[key] = parse_datetime(values[key])
+        spec = SourceSpec(**values)
+        spec.validate()
+        if spec.name in names:
+            raise ValueError(f"Duplicate source name '{spec.name}' in job file")
+        if spec.checkpoint_key in checkpoints:
+            raise ValueError(f"Checkpoint '{spec.checkpoint_key}' is used by more than one source")
+        names.add(spec.name)
+        checkpoints.add(spec.checkpoint_key)
+        specs.append(spec)
+    if not specs:
+        raise ValueError("Job file lists no sources")
+    return specs
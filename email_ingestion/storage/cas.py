@@ -2,41 +2,236 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+import hashlib
 import os
+import re
+from typing import BinaryIO, Iterable, Iterator
+import uuid
 
+from email_ingestion.config import AppConfig
+from email_ingestion.storage.compression import Codec, decode, encode, encode_file, get_codec, is_encoded, read_blob
+from email_ingestion.storage.packs import PackStore
 from email_ingestion.util.hashing import sha256_bytes
 
 
+CHUNK_BYTES = 1024 * 1024
+
+# Durability policies: "none" leaves flushing to the OS, "file" fsyncs each
+# blob before it is renamed into place, "full" also fsyncs the directory so
+# the rename itself survives a power loss.
+FSYNC_POLICIES = ("none", "file", "full")
+
+# Blob file names: the sha256, with an extension in layouts written by older versions.
+BLOB_NAME = re.compile(r"^([0-9a-f]{64})(\..*)?$")
+_FANOUT = re.compile(r"^[0-9a-f]{2}$")
+
+
 @dataclass(frozen=True)
 class StoredFile:
     sha256: str
-    path: Path
+    # None for blobs kept in a pack file, which have no path of their own.
+    path: Path | None
     size_bytes: int
+    pack: PackStore | None = field(default=None, compare=False, repr=False)
+
+    def read_bytes(self) -> bytes:
+        if self.path is None:
+            return decode(self.pack.read(self.sha256))
+        return read_blob(self.path)
+
+
+def iter_fanout_dirs(root: Path) -> Iterator[Path]:
+    """Every ``<sha[:2]>/<sha[2:4]>`` leaf directory under ``root``."""
+    with os.scandir(root) as top:
+        first = sorted(entry.path for entry in top if entry.is_dir() and _FANOUT.match(entry.name))
+    for path in first:
+        with os.scandir(path) as second:
+            leaves = sorted(entry.path for entry in second if entry.is_dir() and _FANOUT.match(entry.name))
+        for leaf in leaves:
+            yield Path(leaf)
+
+
+def _chunks(source: BinaryIO | Iterable[bytes]) -> Iterable[bytes]:
+    if hasattr(source, "read"):
+        return iter(lambda: source.read(CHUNK_BYTES), b"")
+    return source
+
+
+def _touch(path: Path) -> None:
+    """Refresh a reused blob's mtime so garbage collection's grace period covers it until it is referenced."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _fsync_file(path: Path) -> None:
+    # Opened for writing only so fsync is allowed on Windows.
+    with path.open("r+b") as handle:
+        os.fsync(handle.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Windows cannot open directories; NTFS journals the rename itself.
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def make_storage(config: AppConfig) -> "ContentAddressedStorage":
+    """The CAS as ingestion writes it; every tool reading the store should open it this way."""
+    return ContentAddressedStorage(
+        config.storage_root,
+        fsync=config.cas_fsync,
+        pack_threshold=config.pack_threshold_bytes,
+        compression=config.cas_compression,
+    )
 
 
 class ContentAddressedStorage:
-    def __init__(self, root: str) -> None:
+    """Blobs stored once under their sha256, whatever name or extension they arrived with.
+
+    Every write lands in a temporary file on the storage volume and is
+    renamed into place only when complete, so a blob path that exists always
+    holds the full content. With ``pack_threshold`` set, blobs up to that size
+    are appended to pack files under ``packs/`` instead of getting a file each.
+    With ``compression`` set to a codec name, blobs that shrink enough are
+    stored compressed; every read returns the original bytes.
+    """
+
+    def __init__(
+        self, root: str, fsync: str = "file", pack_threshold: int = 0, compression: str | None = None
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {', '.join(FSYNC_POLICIES)}")
         self.root = Path(root)
+        self.fsync = fsync
+        self.pack_threshold = pack_threshold
+        self.codec: Codec | None = get_codec(compression) if compression and compression != "none" else None
+        self._packs: PackStore | None = None
+
+    @property
+    def packs(self) -> PackStore:
+        if self._packs is None:
+            self._packs = PackStore(self.root / "packs", fsync=self.fsync)
+        return self._packs
 
-    def _path_for(self, sha256: str, ext: str | None) -> Path:
-        safe_ext = ""
-        if ext:
-            ext = ext.lower()
-            if not ext.startswith("."):
-                ext = f".{ext}"
-            safe_ext = ext
-        return self.root / sha256[:2] / sha256[2:4] / f"{sha256}{safe_ext}"
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
 
-    def store_bytes(self, data: bytes, ext: str | None = None) -> StoredFile:
+    def store_bytes(self, data: bytes) -> StoredFile:
         digest = sha256_bytes(data)
-        path = self._path_for(digest, ext)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        if not path.exists():
-            path.write_bytes(data)
-        size = path.stat().st_size
-        return StoredFile(sha256=digest, path=path, size_bytes=size)
+        path = self.path_for(digest)
+        if self._is_complete(path, len(data)):
+            _touch(path)
+            return StoredFile(sha256=digest, path=path, size_bytes=len(data))
+        if self._packable(len(data)):
+            self.packs.put(digest, encode(data, self.codec) if self.codec else data)
+            return StoredFile(sha256=digest, path=None, size_bytes=len(data), pack=self.packs)
+        return self.store_stream((data,))
+
+    def store_stream(self, source: BinaryIO | Iterable[bytes]) -> StoredFile:
+        """Store a readable binary file or an iterable of chunks, hashing while it is copied."""
+        hasher = hashlib.sha256()
+        size = 0
+        staged = self.staging_path()
+        try:
+            with staged.open("wb") as handle:
+                for chunk in _chunks(source):
+                    hasher.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+            return self._commit(staged, hasher.hexdigest(), size)
+        except BaseException:
+            staged.unlink(missing_ok=True)
+            raise
+
+    def staging_path(self) -> Path:
+        """Return a fresh path on the storage volume for writers to fill before ``store_file``."""
+        staging = self.root / ".staging"
+        staging.mkdir(parents=True, exist_ok=True)
+        return staging / f"{uuid.uuid4().hex}.tmp"
+
+    def store_file(self, staged: Path) -> StoredFile:
+        """Move a fully written staging file into place without copying it."""
+        staged = Path(staged)
+        hasher = hashlib.sha256()
+        size = 0
+        with staged.open("rb") as handle:
+            for chunk in _chunks(handle):
+                hasher.update(chunk)
+                size += len(chunk)
+        return self._commit(staged, hasher.hexdigest(), size)
+
+    def read_bytes(self, sha256: str) -> bytes:
+        try:
+            return read_blob(self.path_for(sha256))
+        except FileNotFoundError:
+            return decode(self.packs.read(sha256))
 
     def ensure_root(self) -> None:
         os.makedirs(self.root, exist_ok=True)
+
+    def close(self) -> None:
+        if self._packs is not None:
+            self._packs.close()
+            self._packs = None
+
+    def _commit(self, staged: Path, digest: str, size: int) -> StoredFile:
+        path = self.path_for(digest)
+        if self._is_complete(path, size):
+            _touch(path)
+            staged.unlink()
+        elif self._packable(size):
+            data = staged.read_bytes()
+            self.packs.put(digest, encode(data, self.codec) if self.codec else data)
+            staged.unlink()
+            return StoredFile(sha256=digest, path=None, size_bytes=size, pack=self.packs)
+        else:
+            if self.codec is not None:
+                staged = self._compress(staged)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if self.fsync != "none":
+                    _fsync_file(staged)
+                # Also replaces blobs truncated by non-atomic writes of older versions.
+                os.replace(staged, path)
+            except BaseException:
+                staged.unlink(missing_ok=True)
+                raise
+            if self.fsync == "full":
+                _fsync_dir(path.parent)
+        return StoredFile(sha256=digest, path=path, size_bytes=size)
+
+    def _compress(self, staged: Path) -> Path:
+        """Swap ``staged`` for a compressed copy if the codec pays off on it."""
+        compressed = self.staging_path()
+        try:
+            with staged.open("rb") as source, compressed.open("wb") as target:
+                keep = encode_file(source, target, self.codec)
+        except BaseException:
+            compressed.unlink(missing_ok=True)
+            raise
+        if not keep:
+            compressed.unlink()
+            return staged
+        staged.unlink()
+        return compressed
+
+    def _packable(self, size: int) -> bool:
+        return 0 < size <= self.pack_threshold
+
+    @staticmethod
+    def _is_complete(path: Path, size: int) -> bool:
+        try:
+            # Compressed blobs differ in size but are only ever written whole.
+            return path.stat().st_size == size or is_encoded(path)
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,190 @@
+"""Per-blob compression for content-addressed storage.
+
+A compressed blob starts with :data:`MAGIC` followed by one byte naming the
+codec; anything else is raw content. Blobs whose raw bytes happen to start
+with :data:`MAGIC` are written with the ``stored`` codec so they stay
+unambiguous.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import lzma
+from pathlib import Path
+import tempfile
+from typing import BinaryIO, Callable
+import zlib
+
+
+MAGIC = b"\x89EIC"
+HEADER_BYTES = len(MAGIC) + 1
+CHUNK_BYTES = 1024 * 1024
+# Compressed output must be at most this share of the input to be kept.
+MIN_RATIO = 0.9
+# Bytes compressed up front to decide whether the rest is worth it.
+SAMPLE_BYTES = 64 * 1024
+MIN_SIZE = 512
+# Decoded blobs up to this size are kept in memory when opened as a stream.
+SPOOL_BYTES = 8 * 1024 * 1024
+
+# Leading bytes of formats that are already compressed.
+_COMPRESSED_MAGIC = (
+    b"PK\x03\x04",  # zip: docx, pptx, xlsx
+    b"\xff\xd8\xff",  # jpeg
+    b"\x89PNG",
+    b"GIF8",
+    b"\x1f\x8b",  # gzip
+    b"BZh",
+    b"\xfd7zXZ\x00",
+    b"7z\xbc\xaf\x27\x1c",
+    b"Rar!",
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"OggS",
+    b"ID3",
+    b"fLaC",
+    MAGIC,
+)
+
+
+class _Stored:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+@dataclass(frozen=True)
+class Codec:
+    """A streaming codec; ``compressor()`` objects need ``compress``/``flush``, ``decompressor()`` ones ``decompress``."""
+
+    name: str
+    code: int
+    compressor: Callable[[], object]
+    decompressor: Callable[[], object]
+
+
+_CODECS: dict[str, Codec] = {}
+_BY_CODE: dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    if not 0 <= codec.code <= 255 or _BY_CODE.get(codec.code, codec).name != codec.name:
+        raise ValueError(f"Codec code {codec.code} is invalid or taken")
+    _CODECS[codec.name] = codec
+    _BY_CODE[codec.code] = codec
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown compression codec {name!r}; expected one of {', '.join(_CODECS)}") from None
+
+
+register_codec(Codec("stored", 0, _Stored, _Stored))
+register_codec(Codec("zlib", 1, lambda: zlib.compressobj(6), zlib.decompressobj))
+register_codec(Codec("lzma", 2, lzma.LZMACompressor, lzma.LZMADecompressor))
+
+
+def is_precompressed(head: bytes) -> bool:
+    """True if ``head`` (the first bytes of a blob) belongs to an already-compressed format."""
+    if head.startswith(_COMPRESSED_MAGIC):
+        return True
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return True
+    # ISO media: mp4, mov, heic.
+    return head[4:8] == b"ftyp"
+
+
+def _header(codec: Codec) -> bytes:
+    return MAGIC + bytes([codec.code])
+
+
+def _codec_for(header: bytes) -> Codec | None:
+    if len(header) < HEADER_BYTES or not header.startswith(MAGIC):
+        return None
+    codec = _BY_CODE.get(header[len(MAGIC)])
+    if codec is None:
+        raise ValueError(f"Blob uses unknown compression codec {header[len(MAGIC)]}")
+    return codec
+
+
+def _worth_compressing(sample: bytes, codec: Codec) -> bool:
+    if len(sample) < MIN_SIZE or is_precompressed(sample):
+        return False
+    compressor = codec.compressor()
+    size = len(compressor.compress(sample)) + len(compressor.flush())
+    return size <= len(sample) * MIN_RATIO
+
+
+def encode(data: bytes, codec: Codec) -> bytes:
+    """``data`` compressed with ``codec`` if that pays off, otherwise as is."""
+    if _worth_compressing(data[:SAMPLE_BYTES], codec):
+        compressor = codec.compressor()
+        body = compressor.compress(data) + compressor.flush()
+        if len(body) + HEADER_BYTES <= len(data) * MIN_RATIO:
+            return _header(codec) + body
+    if data.startswith(MAGIC):
+        return _header(_CODECS["stored"]) + data
+    return data
+
+
+def encode_file(source: BinaryIO, target: BinaryIO, codec: Codec) -> bool:
+    """Write ``source`` compressed into ``target``; False (``target`` unusable) when it does not pay off."""
+    first = source.read(SAMPLE_BYTES)
+    if not _worth_compressing(first, codec):
+        if not first.startswith(MAGIC):
+            return False
+        codec = _CODECS["stored"]
+    target.write(_header(codec))
+    compressor = codec.compressor()
+    read = written = 0
+    chunk = first
+    while chunk:
+        read += len(chunk)
+        written += target.write(compressor.compress(chunk))
+        chunk = source.read(CHUNK_BYTES)
+    written += target.write(compressor.flush())
+    return codec.name == "stored" or written + HEADER_BYTES <= read * MIN_RATIO
+
+
+def decode(data: bytes) -> bytes:
+    codec = _codec_for(data[:HEADER_BYTES])
+    if codec is None:
+        return data
+    return codec.decompressor().decompress(data[HEADER_BYTES:])
+
+
+def is_encoded(path: str | Path) -> bool:
+    """True if the blob at ``path`` carries a compression header."""
+    with open(path, "rb") as handle:
+        return _codec_for(handle.read(HEADER_BYTES)) is not None
+
+
+def open_blob(path: str | Path) -> BinaryIO:
+    """Open a stored blob as a seekable stream of its original content."""
+    handle = open(path, "rb")
+    try:
+        codec = _codec_for(handle.read(HEADER_BYTES))
+        if codec is None:
+            handle.seek(0)
+            return handle
+        decoded = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        decompressor = codec.decompressor()
+        for chunk in iter(lambda: handle.read(CHUNK_BYTES), b""):
+            decoded.write(decompressor.decompress(chunk))
+        decoded.seek(0)
+        handle.close()
+        return decoded
+    except BaseException:
+        handle.close()
+        raise
+
+
+def read_blob(path: str | Path) -> bytes:
+    with open_blob(path) as handle:
+        return handle.read()
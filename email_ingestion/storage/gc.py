@@ -0,0 +1,122 @@
+"""Mark-and-sweep garbage collection for unreferenced CAS blobs."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Callable
+
+from email_ingestion.db.repo import Repository
+from email_ingestion.storage.cas import BLOB_NAME, ContentAddressedStorage, iter_fanout_dirs
+from email_ingestion.storage.packs import PackStore
+from email_ingestion.util.bloom import BloomFilter
+
+
+logger = logging.getLogger(__name__)
+
+GC_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+def mark_referenced(session_factory: Callable, memory_bytes: int = GC_MEMORY_BYTES) -> BloomFilter:
+    """Bloom filter of every ``attachments.sha256``, never larger than ``memory_bytes``.
+
+    False positives only keep an unreferenced blob alive; a referenced blob is
+    never reported.
+    """
+    with session_factory() as session:
+        repo = Repository(session)
+        referenced = BloomFilter(capacity=max(repo.count_attachments(), 1), error_rate=0.001, max_bytes=memory_bytes)
+        referenced.update(repo.iter_attachment_sha256s())
+    return referenced
+
+
+def _sweep_dir(directory: Path, referenced: BloomFilter, older_than: float, delete: bool) -> dict[str, int]:
+    stats = {"scanned": 0, "unreferenced": 0, "unreferenced_bytes": 0, "skipped_recent": 0}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = BLOB_NAME.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            stats["scanned"] += 1
+            if match.group(1) in referenced:
+                continue
+            info = entry.stat()
+            if info.st_mtime >= older_than:
+                stats["skipped_recent"] += 1
+                continue
+            stats["unreferenced"] += 1
+            stats["unreferenced_bytes"] += info.st_size
+            if delete:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+    return stats
+
+
+def collect_garbage(
+    storage: ContentAddressedStorage,
+    session_factory: Callable,
+    grace: timedelta = timedelta(hours=24),
+    delete: bool = False,
+    workers: int = 8,
+    memory_bytes: int = GC_MEMORY_BYTES,
+) -> dict:
+    """Report, or with ``delete`` remove, blobs no attachment row refers to.
+
+    Blobs (and packs) modified within ``grace`` are left alone: ingestion
+    stores a blob, or refreshes the mtime of one it reuses, before the
+    attachment row referring to it is committed. Loose blobs are swept by
+    ``workers`` threads across the fan-out directories; packed ones are only
+    dropped from the pack index, and ``compact-storage`` reclaims their bytes.
+    ``.staging`` is never touched, and without ``delete`` nothing under the
+    storage root is written.
+    """
+    older_than = time.time() - grace.total_seconds()
+    referenced = mark_referenced(session_factory, memory_bytes)
+    logger.info(
+        "Marked %s attachment references in %s bytes (false positive rate %.2g)",
+        referenced.count,
+        referenced.size_bytes,
+        referenced.expected_error_rate,
+    )
+    loose = {"scanned": 0, "unreferenced": 0, "unreferenced_bytes": 0, "skipped_recent": 0}
+    if storage.root.exists():
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            sweeps = pool.map(
+                lambda directory: _sweep_dir(directory, referenced, older_than, delete),
+                iter_fanout_dirs(storage.root),
+            )
+            for stats in sweeps:
+                for key, value in stats.items():
+                    loose[key] += value
+    packed = {"unreferenced": 0, "unreferenced_bytes": 0, "skipped_recent": 0}
+    if (storage.root / "packs" / "index.sqlite").exists():
+        # A report must leave the store untouched, so it reads the index read-only.
+        packs = storage.packs if delete else PackStore(storage.root / "packs", read_only=True)
+        try:
+            packed = packs.sweep(lambda sha256: sha256 in referenced, older_than, delete=delete)
+        finally:
+            if not delete:
+                packs.close()
+    logger.info(
+        "%s %s unreferenced blobs (%s bytes) and %s packed ones (%s bytes); %s recent ones kept",
+        "Deleted" if delete else "Found",
+        loose["unreferenced"],
+        loose["unreferenced_bytes"],
+        packed["unreferenced"],
+        packed["unreferenced_bytes"],
+        loose["skipped_recent"] + packed["skipped_recent"],
+    )
+    return {
+        "references": referenced.count,
+        "filter_bytes": referenced.size_bytes,
+        "false_positive_rate": round(referenced.expected_error_rate, 6),
+        "deleted": delete,
+        "loose": loose,
+        "packed": packed,
+    }
@@ -0,0 +1,96 @@
+"""Collapse extension-suffixed CAS blobs into the sha256-only layout."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+
+from email_ingestion.db.repo import Repository
+from email_ingestion.storage.cas import BLOB_NAME, ContentAddressedStorage, iter_fanout_dirs
+
+
+logger = logging.getLogger(__name__)
+
+
+def _migrate_dir(directory: Path, dry_run: bool) -> dict[str, int]:
+    stats = {"moved": 0, "duplicates": 0, "bytes_reclaimed": 0}
+    with os.scandir(directory) as entries:
+        sizes = {entry.name: entry.stat().st_size for entry in entries if entry.is_file()}
+    for name, size in sorted(sizes.items()):
+        match = BLOB_NAME.match(name)
+        if not match or not match.group(2):
+            continue
+        sha256 = match.group(1)
+        if sizes.get(sha256, -1) >= size:
+            # Same sha256, so the copies hold the same content unless one was
+            # truncated by an interrupted write; the larger one is kept.
+            stats["duplicates"] += 1
+            stats["bytes_reclaimed"] += size
+            if not dry_run:
+                (directory / name).unlink()
+        else:
+            stats["moved"] += 1
+            sizes[sha256] = size
+            if not dry_run:
+                os.replace(directory / name, directory / sha256)
+    return stats
+
+
+def migrate_blob_layout(
+    storage: ContentAddressedStorage,
+    session_factory: Callable | None = None,
+    workers: int = 8,
+    dry_run: bool = False,
+    batch_size: int = 10000,
+) -> dict[str, int]:
+    """Rename ``<sha><ext>`` blobs to ``<sha>`` and drop the redundant copies.
+
+    Fan-out directories are processed by ``workers`` threads. With a
+    ``session_factory``, ``attachments.saved_path`` is then rewritten to the
+    new paths in batches of ``batch_size``. Safe to re-run.
+    """
+    totals = {"directories": 0, "moved": 0, "duplicates": 0, "bytes_reclaimed": 0, "paths_updated": 0}
+    if not storage.root.exists():
+        return totals
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for stats in pool.map(lambda directory: _migrate_dir(directory, dry_run), iter_fanout_dirs(storage.root)):
+            totals["directories"] += 1
+            for key, value in stats.items():
+                totals[key] += value
+    logger.info(
+        "Blob layout: %s moved, %s duplicates removed (%s bytes) in %s directories",
+        totals["moved"],
+        totals["duplicates"],
+        totals["bytes_reclaimed"],
+        totals["directories"],
+    )
+    if session_factory is not None:
+        totals["paths_updated"] = _rewrite_saved_paths(storage, session_factory, dry_run, batch_size)
+    return totals
+
+
+def _rewrite_saved_paths(
+    storage: ContentAddressedStorage, session_factory: Callable, dry_run: bool, batch_size: int
+) -> int:
+    updated = 0
+    after = ""
+    with session_factory() as session:
+        repo = Repository(session)
+        while True:
+            rows = repo.attachment_paths_after(after, batch_size)
+            if not rows:
+                break
+            after = rows[-1][0]
+            paths = {
+                attachment_id: str(storage.path_for(sha256))
+                for attachment_id, sha256, saved_path in rows
+                if saved_path is not None and saved_path != str(storage.path_for(sha256))
+            }
+            updated += len(paths)
+            if not dry_run:
+                repo.set_saved_paths(paths)
+                session.commit()
+    return updated
@@ -0,0 +1,238 @@
+"""Append-only pack files for small content-addressed blobs."""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from typing import BinaryIO, Callable, Iterable
+
+
+logger = logging.getLogger(__name__)
+
+PACK_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS packs (pack_id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    " sha256 TEXT PRIMARY KEY, pack_id INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_blobs_pack ON blobs (pack_id, offset)",
+)
+
+
+class PackStore:
+    """Small blobs appended to pack files, located through a SQLite index.
+
+    The index (``index.sqlite``: sha256 -> pack, offset, length) is only
+    written after the bytes are in the pack, so a crash leaves at most dead
+    bytes behind, which :meth:`compact` reclaims. Each store instance appends
+    to packs it allocated itself, so several processes can write at once.
+    Reads go through a memory map per pack. With ``read_only`` an existing
+    index is opened without writing anything under ``root``, e.g. for reports.
+    """
+
+    def __init__(
+        self, root: Path, max_pack_bytes: int = PACK_MAX_BYTES, fsync: str = "file", read_only: bool = False
+    ) -> None:
+        self.root = Path(root)
+        self.max_pack_bytes = max_pack_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        index = self.root / "index.sqlite"
+        if read_only:
+            # A read-only connection still creates the WAL files unless a writer
+            # already has them open; with no writer the index cannot change.
+            mode = "ro" if index.with_name("index.sqlite-wal").exists() else "ro&immutable=1"
+            self._db = sqlite3.connect(f"{index.resolve().as_uri()}?mode={mode}", uri=True, check_same_thread=False)
+        else:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(index, check_same_thread=False, timeout=60)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+            self._db.commit()
+        self._writer: tuple[int, BinaryIO] | None = None
+        self._maps: dict[int, mmap.mmap] = {}
+
+    def pack_path(self, pack_id: int) -> Path:
+        return self.root / f"{pack_id:08d}.pack"
+
+    def locate(self, sha256: str) -> tuple[int, int, int] | None:
+        """``(pack_id, offset, length)`` of a packed blob."""
+        with self._lock:
+            return self._locate(sha256)
+
+    def __contains__(self, sha256: str) -> bool:
+        return self.locate(sha256) is not None
+
+    def put(self, sha256: str, data: bytes) -> None:
+        """Append ``data`` unless a blob with ``sha256`` is already packed."""
+        with self._lock:
+            entry = self._locate(sha256)
+            if entry is not None:
+                # Keeps the pack inside garbage collection's grace period.
+                try:
+                    os.utime(self.pack_path(entry[0]))
+                except OSError:
+                    pass
+                return
+            pack_id, offset = self._append(data)
+            self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)", (sha256, pack_id, offset, len(data)))
+            self._db.commit()
+
+    def read(self, sha256: str) -> bytes:
+        with self._lock:
+            entry = self._locate(sha256)
+            if entry is None:
+                raise KeyError(sha256)
+            return self._read(*entry)
+
+    def delete(self, sha256s: Iterable[str]) -> None:
+        """Drop blobs from the index; their bytes stay in the pack until :meth:`compact`."""
+        with self._lock:
+            self._db.executemany("DELETE FROM blobs WHERE sha256 = ?", [(sha256,) for sha256 in sha256s])
+            self._db.commit()
+
+    def sweep(self, keep: Callable[[str], bool], older_than: float, delete: bool = False) -> dict[str, int]:
+        """Find (and with ``delete``, unindex) blobs that ``keep`` rejects.
+
+        Only packs last modified before the ``older_than`` timestamp are
+        considered. The index is read in batches of sha256 order, so memory
+        stays flat however many blobs are packed.
+        """
+        stats = {"unreferenced": 0, "unreferenced_bytes": 0, "skipped_recent": 0}
+        with self._lock:
+            recent = set()
+            for (pack_id,) in self._db.execute("SELECT pack_id FROM packs").fetchall():
+                path = self.pack_path(pack_id)
+                if not path.exists() or path.stat().st_mtime >= older_than:
+                    recent.add(pack_id)
+            after = ""
+            while True:
+                rows = self._db.execute(
+                    "SELECT sha256, pack_id, length FROM blobs WHERE sha256 > ? ORDER BY sha256 LIMIT 10000", (after,)
+                ).fetchall()
+                if not rows:
+                    break
+                after = rows[-1][0]
+                doomed = []
+                for sha256, pack_id, length in rows:
+                    if keep(sha256):
+                        continue
+                    if pack_id in recent:
+                        stats["skipped_recent"] += 1
+                        continue
+                    doomed.append((sha256,))
+                    stats["unreferenced"] += 1
+                    stats["unreferenced_bytes"] += length
+                if delete and doomed:
+                    self._db.executemany("DELETE FROM blobs WHERE sha256 = ?", doomed)
+                    self._db.commit()
+        return stats
+
+    def compact(self, min_dead_ratio: float = 0.2) -> dict[str, int]:
+        """Rewrite packs whose dead bytes reach ``min_dead_ratio`` of the file.
+
+        Live blobs are copied into fresh packs and the old files removed. A
+        pack whose file has gone missing is dropped from the index along with
+        its blobs. Run it while no other process is writing to the store.
+        """
+        stats = {"packs_rewritten": 0, "blobs_moved": 0, "bytes_reclaimed": 0}
+        with self._lock:
+            self._seal()
+            live = dict(self._db.execute("SELECT pack_id, COALESCE(SUM(length), 0) FROM blobs GROUP BY pack_id"))
+            for (pack_id,) in self._db.execute("SELECT pack_id FROM packs ORDER BY pack_id").fetchall():
+                path = self.pack_path(pack_id)
+                if not path.exists():
+                    lost = self._db.execute("DELETE FROM blobs WHERE pack_id = ?", (pack_id,)).rowcount
+                    self._db.execute("DELETE FROM packs WHERE pack_id = ?", (pack_id,))
+                    self._db.commit()
+                    self._unmap(pack_id)
+                    if lost:
+                        logger.warning("Pack %s is missing; dropped its %s blobs from the index", path, lost)
+                    continue
+                size = path.stat().st_size
+                if size and (size - live.get(pack_id, 0)) / size < min_dead_ratio:
+                    continue
+                entries = self._db.execute(
+                    "SELECT sha256, offset, length FROM blobs WHERE pack_id = ? ORDER BY offset", (pack_id,)
+                ).fetchall()
+                for sha256, offset, length in entries:
+                    data = self._read(pack_id, offset, length)
+                    new_pack, new_offset = self._append(data)
+                    self._db.execute(
+                        "UPDATE blobs SET pack_id = ?, offset = ? WHERE sha256 = ?", (new_pack, new_offset, sha256)
+                    )
+                self._flush()
+                self._db.execute("DELETE FROM packs WHERE pack_id = ?", (pack_id,))
+                self._db.commit()
+                self._unmap(pack_id)
+                path.unlink(missing_ok=True)
+                stats["packs_rewritten"] += 1
+                stats["blobs_moved"] += len(entries)
+                stats["bytes_reclaimed"] += size - live.get(pack_id, 0)
+            self._seal()
+        logger.info(
+            "Compacted %s packs: %s blobs moved, %s bytes reclaimed",
+            stats["packs_rewritten"],
+            stats["blobs_moved"],
+            stats["bytes_reclaimed"],
+        )
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._seal()
+            for pack_id in list(self._maps):
+                self._unmap(pack_id)
+            self._db.close()
+
+    def _locate(self, sha256: str) -> tuple[int, int, int] | None:
+        return self._db.execute("SELECT pack_id, offset, length FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+
+    def _append(self, data: bytes) -> tuple[int, int]:
+        if self._writer is not None and self._writer[1].tell() + len(data) > self.max_pack_bytes:
+            self._seal()
+        if self._writer is None:
+            cursor = self._db.execute("INSERT INTO packs (created_at) VALUES (datetime('now'))")
+            self._db.commit()
+            self._writer = (cursor.lastrowid, self.pack_path(cursor.lastrowid).open("ab"))
+        pack_id, handle = self._writer
+        offset = handle.tell()
+        handle.write(data)
+        self._flush()
+        return pack_id, offset
+
+    def _flush(self) -> None:
+        if self._writer is None:
+            return
+        handle = self._writer[1]
+        handle.flush()
+        if self.fsync != "none":
+            os.fsync(handle.fileno())
+
+    def _seal(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer[1].close()
+            self._writer = None
+
+    def _read(self, pack_id: int, offset: int, length: int) -> bytes:
+        if not length:
+            return b""
+        mapped = self._maps.get(pack_id)
+        if mapped is None or len(mapped) < offset + length:
+            # The pack has grown since it was mapped.
+            self._unmap(pack_id)
+            with self.pack_path(pack_id).open("rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[pack_id] = mapped
+        return mapped[offset : offset + length]
+
+    def _unmap(self, pack_id: int) -> None:
+        mapped = self._maps.pop(pack_id, None)
+        if mapped is not None:
+            mapped.close()
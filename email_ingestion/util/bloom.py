@@ -0,0 +1,58 @@
+"""Compact probabilistic set membership."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    """Bloom filter over string keys with a fixed bit budget.
+
+    ``key in bloom`` never returns a false negative; a positive answer must be
+    confirmed against the authoritative store when correctness matters. With
+    ``max_bytes`` the bit array never exceeds that size; the error rate then
+    rises above ``error_rate`` once ``capacity`` needs more bits than that.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01, max_bytes: int | None = None) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        if max_bytes is not None:
+            bits = min(bits, max_bytes * 8)
+        self.num_bits = max(bits, 8)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def expected_error_rate(self) -> float:
+        """False positive rate at the current ``count``."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
@@ -0,0 +1,9 @@
+"""Filename helpers."""
+
+from __future__ import annotations
+
+
+def safe_extension(filename: str | None) -> str | None:
+    if not filename or "." not in filename:
+        return None
+    return filename.rsplit(".", 1)[-1].lower()
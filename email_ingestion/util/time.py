@@ -12,3 +12,25 @@ def parse_datetime(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
     return parser.parse(value)
+
+
+def as_wall_clock(value: datetime | None) -> datetime | None:
+    """Naive local wall time, so Outlook timestamps and user input compare consistently.
+
+    pywin32 labels COM dates as UTC even though Outlook hands back local time,
+    and checkpoints written from them carry the same label, so a zero offset
+    is dropped as is. Any other offset is real: the value is converted to
+    local time first, so ``--since 2026-02-01T09:00+02:00`` means the same
+    instant on every machine.
+    """
+    if value is None:
+        return None
+    offset = value.utcoffset()
+    if offset:
+        value = value.astimezone()
+    return value.replace(tzinfo=None)
+
+
+def is_later(value: datetime, than: datetime | None) -> bool:
+    """``value > than`` on wall clocks; anything is later than ``None``."""
+    return than is None or as_wall_clock(value) > as_wall_clock(than)
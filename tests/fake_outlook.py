@@ -0,0 +1,262 @@
+"""In-memory stand-ins for the Outlook COM objects used by the fetcher."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import operator
+import re
+import threading
+
+
+_RESTRICT_CLAUSE = re.compile(r"\[(\w+)\]\s*(>=|<=|>|<|=)\s*'([^']*)'")
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "=": operator.eq,
+}
+
+
+class FakeItem:
+    def __init__(self, entry_id: str, received: datetime, **props) -> None:
+        self.EntryID = entry_id
+        self.StoreID = props.pop("StoreID", "store")
+        self.ReceivedTime = received
+        self.SentOn = props.pop("SentOn", received)
+        self.MessageClass = props.pop("MessageClass", "IPM.Note")
+        self.Subject = props.pop("Subject", f"subject {entry_id}")
+        self.SenderName = props.pop("SenderName", "Sender")
+        self.SenderEmailAddress = props.pop("SenderEmailAddress", "sender@example.com")
+        self.To = props.pop("To", "to@example.com")
+        self.CC = props.pop("CC", None)
+        self.BCC = props.pop("BCC", None)
+        self.ConversationID = props.pop("ConversationID", None)
+        self.Body = props.pop("Body", f"body {entry_id}")
+        self.HTMLBody = props.pop("HTMLBody", None)
+        self.Size = props.pop("Size", 1024)
+        self.Attachments = props.pop("Attachments", [])
+        # MAPI properties readable through PropertyAccessor, keyed by proptag URL.
+        self.mapi_props = props.pop("mapi_props", {})
+        self.PropertyAccessor = FakeItemProperties(self.mapi_props)
+        for key, value in props.items():
+            setattr(self, key, value)
+
+
+class FakeItemProperties:
+    def __init__(self, props: dict) -> None:
+        self._props = props
+
+    def GetProperty(self, name: str):
+        if name not in self._props:
+            raise RuntimeError(f"property {name} unavailable")
+        return self._props[name]
+
+
+ATTACH_DATA_BIN_PROP = "http://schemas.microsoft.com/mapi/proptag/0x37010102"
+
+
+class FakePropertyAccessor:
+    def __init__(self, attachment: "FakeAttachment") -> None:
+        self._attachment = attachment
+
+    def GetProperty(self, name: str):
+        self._attachment.calls.append(("GetProperty", name))
+        if name == ATTACH_DATA_BIN_PROP and self._attachment.allow_property_read:
+            return self._attachment.data
+        raise RuntimeError(f"property {name} unavailable")
+
+
+class FakeAttachment:
+    def __init__(self, filename: str, data: bytes, allow_property_read: bool = True) -> None:
+        self.FileName = filename
+        self.data = data
+        self.Size = len(data)
+        self.allow_property_read = allow_property_read
+        self.calls: list = []
+        self.PropertyAccessor = FakePropertyAccessor(self)
+
+    def SaveAsFile(self, path: str) -> None:
+        self.calls.append(("SaveAsFile", path))
+        with open(path, "wb") as handle:
+            handle.write(self.data)
+
+
+class FakeItems:
+    def __init__(self, items: list[FakeItem], log: list | None = None) -> None:
+        self._items = list(items)
+        self.log = log if log is not None else []
+        self._cursor = 0
+
+    def Sort(self, prop: str, descending: bool = False) -> None:
+        name = prop.strip("[]")
+        self._items.sort(key=lambda item: getattr(item, name), reverse=bool(descending))
+        self.log.append(("Sort", prop, descending))
+
+    def Restrict(self, restriction: str) -> "FakeItems":
+        self.log.append(("Restrict", restriction))
+        clauses = _RESTRICT_CLAUSE.findall(restriction)
+        matched = []
+        for item in self._items:
+            keep = True
+            for prop, op, raw in clauses:
+                bound = datetime.strptime(raw, "%m/%d/%Y %I:%M %p")
+                value = getattr(item, prop).replace(tzinfo=None)
+                if not _OPERATORS[op](value, bound):
+                    keep = False
+                    break
+            if keep:
+                matched.append(item)
+        return FakeItems(matched, self.log)
+
+    @property
+    def Count(self) -> int:
+        return len(self._items)
+
+    def GetFirst(self):
+        self._cursor = 0
+        return self.GetNext()
+
+    def GetNext(self):
+        if self._cursor >= len(self._items):
+            return None
+        item = self._items[self._cursor]
+        self._cursor += 1
+        return item
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class FakeColumns:
+    def __init__(self) -> None:
+        self.names: list[str] = []
+
+    def RemoveAll(self) -> None:
+        self.names = []
+
+    def Add(self, name: str) -> None:
+        self.names.append(name)
+
+
+class FakeRow:
+    def __init__(self, item: FakeItem, columns: list[str]) -> None:
+        self._item = item
+        self._columns = columns
+
+    def Item(self, name: str):
+        if name not in self._columns:
+            raise KeyError(name)
+        if name.startswith("http://"):
+            return self._item.PropertyAccessor.GetProperty(name)
+        return getattr(self._item, name)
+
+    __call__ = Item
+
+
+class FakeTable:
+    def __init__(self, items: FakeItems) -> None:
+        self._items = items
+        self.Columns = FakeColumns()
+        self._cursor = 0
+        self.rows_read = 0
+
+    def Sort(self, prop: str, descending: bool = False) -> None:
+        self._items.Sort(prop, descending)
+        self._cursor = 0
+
+    @property
+    def EndOfTable(self) -> bool:
+        return self._cursor >= self._items.Count
+
+    def GetNextRow(self) -> FakeRow | None:
+        if self.EndOfTable:
+            return None
+        item = list(self._items)[self._cursor]
+        self._cursor += 1
+        self.rows_read += 1
+        return FakeRow(item, self.Columns.names)
+
+
+class FakeFolder:
+    def __init__(self, items: list[FakeItem], store_id: str = "store") -> None:
+        self.log: list = []
+        self._items = items
+        self.StoreID = store_id
+
+    @property
+    def Items(self) -> FakeItems:
+        return FakeItems(self._items, self.log)
+
+    def GetTable(self, restriction: str = "", table_contents: int = 0) -> FakeTable:
+        self.log.append(("GetTable", restriction))
+        items = self.Items
+        if restriction:
+            items = items.Restrict(restriction)
+        return FakeTable(items)
+
+
+class FakeNamespace:
+    def __init__(self, folder: FakeFolder) -> None:
+        self.folder = folder
+        self.items_loaded: list[str] = []
+
+    def GetItemFromID(self, entry_id: str, store_id: str | None = None) -> FakeItem:
+        self.items_loaded.append(entry_id)
+        for item in self.folder._items:
+            if item.EntryID == entry_id:
+                return item
+        raise LookupError(entry_id)
+
+
+def install_fake_folder(monkeypatch, folder: FakeFolder) -> FakeNamespace:
+    """Route OutlookFetcher's namespace/folder lookup to ``folder``."""
+    from email_ingestion.outlook import fetcher as fetcher_module
+
+    namespace = FakeNamespace(folder)
+    monkeypatch.setattr(fetcher_module, "get_namespace", lambda: namespace)
+    monkeypatch.setattr(
+        fetcher_module,
+        "resolve_shared_folder",
+        lambda ns, mailbox, folder_path: ns.folder,
+    )
+    return namespace
+
+
+class FakeItemEvents:
+    """Stand-in for OutlookItemAddEvents; tests call :meth:`fire` to push an item."""
+
+    def __init__(self) -> None:
+        self.callback = None
+        self.started = threading.Event()
+        self.stopped = False
+
+    def start(self, callback) -> None:
+        self.callback = callback
+        self.started.set()
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def fire(self, item: FakeItem) -> None:
+        self.callback(item.EntryID, item.StoreID)
+
+
+class FakeRecipient:
+    """Exchange recipient whose Address is an X.500 DN; ``smtp`` is only reachable via PropertyAccessor."""
+
+    def __init__(self, address: str, smtp: str | None, type_: int = 1, lookups: list | None = None) -> None:
+        self.Address = address
+        self.Type = type_
+        self._smtp = smtp
+        self._lookups = lookups if lookups is not None else []
+
+    @property
+    def PropertyAccessor(self) -> "FakeRecipient":
+        return self
+
+    def GetProperty(self, name: str):
+        self._lookups.append(self.Address)
+        if self._smtp is None:
+            raise RuntimeError(f"property {name} unavailable")
+        return self._smtp
@@ -0,0 +1,47 @@
+"""Shared builders for test configs and sample messages."""
+
+from __future__ import annotations
+
+from email.message import EmailMessage
+
+from email_ingestion.config import AppConfig
+
+
+def make_config(tmp_path) -> AppConfig:
+    return AppConfig(
+        db_url=f"sqlite:///{tmp_path / 'ingest.db'}",
+        storage_root=str(tmp_path / "storage"),
+        log_file="",
+    )
+
+
+ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+DTSTART:20260203T100000Z
+DTEND:20260203T110000Z
+LOCATION:Room 1
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def make_eml(index: int, attachment: bytes | None = None) -> bytes:
+    message = EmailMessage()
+    message["From"] = "Alice <alice@example.com>"
+    message["To"] = "bob@example.com, Carol <carol@example.com>"
+    message["Subject"] = f"report {index}"
+    message["Date"] = f"Mon, 0{index + 1} Feb 2026 09:00:00 +0000"
+    message.set_content(f"From the desk of alice\nsee https://example.com/{index}\n")
+    message.add_alternative(f"<p>report {index}</p>", subtype="html")
+    if attachment is not None:
+        message.add_attachment(attachment, maintype="text", subtype="plain", filename="notes.txt")
+    return bytes(message)
+
+
+def make_mbox(messages: list[bytes]) -> bytes:
+    chunks = []
+    for raw in messages:
+        body = b"\n".join(b">" + line if line.startswith(b"From ") else line for line in raw.split(b"\n"))
+        chunks.append(b"From alice@example.com Mon Feb  2 09:00:00 2026\n" + body + b"\n")
+    return b"".join(chunks)
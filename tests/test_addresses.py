@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from email_ingestion.db.models import Email, IngestionRun
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import make_session_factory
+from email_ingestion.outlook.addresses import PR_SENDER_SMTP_ADDRESS, AddressResolver
+from email_ingestion.outlook.fetcher import OutlookFetcher
+from email_ingestion.pipeline.orchestrator import make_email_id, run_jobs
+from email_ingestion.pipeline.runtime import IngestionRuntime
+from email_ingestion.sources.jobs import SourceSpec
+
+from fake_outlook import FakeFolder, FakeItem, FakeRecipient, install_fake_folder
+from helpers import make_config
+
+
+ALICE_DN = "/o=Contoso/ou=Exchange Administrative Group/cn=Recipients/cn=alice"
+BOB_DN = "/o=Contoso/ou=Exchange Administrative Group/cn=Recipients/cn=bob"
+
+
+def test_resolver_checks_memory_then_table_then_exchange(tmp_path):
+    config = make_config(tmp_path)
+    with IngestionRuntime(config) as runtime:
+        calls = []
+
+        def lookup():
+            calls.append(1)
+            return "alice@contoso.com"
+
+        resolver = AddressResolver(runtime.session_factory, max_entries=10)
+        assert resolver.resolve("bob@contoso.com", lookup) == "bob@contoso.com"
+        assert resolver.resolve(ALICE_DN, lookup) == "alice@contoso.com"
+        assert resolver.resolve(ALICE_DN.upper(), lookup) == "alice@contoso.com"
+        assert len(calls) == 1
+        with runtime.session_factory() as session:
+            repo = Repository(session)
+            resolver.flush(repo)
+            session.commit()
+
+        fresh = AddressResolver(runtime.session_factory)
+        assert fresh.resolve(ALICE_DN, lookup) == "alice@contoso.com"
+        assert len(calls) == 1
+        assert fresh.stats()["db_hits"] == 1
+
+        expired = AddressResolver(runtime.session_factory, ttl=timedelta(0))
+        assert expired.resolve(ALICE_DN, lookup) == "alice@contoso.com"
+        assert len(calls) == 2
+        assert resolver.stats() == {
+            "memory_hits": 1,
+            "db_hits": 0,
+            "lookups": 1,
+            "failures": 0,
+            "negative_hits": 0,
+            "hit_rate": 0.5,
+        }
+
+
+def test_fetcher_resolves_exchange_sender_and_recipients(tmp_path, monkeypatch):
+    lookups = []
+    base = datetime(2026, 2, 1, 9, 0)
+    items = [
+        FakeItem(
+            f"e{i}",
+            base + timedelta(minutes=i),
+            SenderEmailAddress=ALICE_DN,
+            To="Bob",
+            CC=None,
+            Recipients=[
+                FakeRecipient(BOB_DN, "bob@contoso.com", 1, lookups),
+                FakeRecipient(ALICE_DN, "alice@contoso.com", 2, lookups),
+            ],
+            mapi_props={PR_SENDER_SMTP_ADDRESS: "alice@contoso.com"},
+        )
+        for i in range(3)
+    ]
+    install_fake_folder(monkeypatch, FakeFolder(items))
+    config = make_config(tmp_path)
+
+    spec = SourceSpec(name="inbox", mailbox="mbx", folder="Inbox")
+    result = run_jobs(config, [spec], use_checkpoint=False)
+
+    assert result["processed"] == 3
+    # Only Bob needs a recipient lookup: Alice's DN was already resolved as the sender.
+    assert lookups == [BOB_DN]
+    with make_session_factory(config.db_url)() as session:
+        email = session.get(Email, make_email_id("e0", "store"))
+        stats = session.execute(select(IngestionRun.stats)).scalar_one()
+    assert email.sender_email == "alice@contoso.com"
+    assert email.to_recipients == ["bob@contoso.com"]
+    assert email.cc_recipients == ["alice@contoso.com"]
+    assert stats["addresses"]["lookups"] == 2
+    assert stats["addresses"]["memory_hits"] == 7
+
+
+def test_failed_lookup_keeps_the_dn_and_is_retried_later(tmp_path):
+    config = make_config(tmp_path)
+    with IngestionRuntime(config) as runtime:
+        calls = []
+
+        def lookup():
+            calls.append(1)
+            raise RuntimeError("GAL unavailable")
+
+        resolver = AddressResolver(runtime.session_factory)
+        assert resolver.resolve(ALICE_DN, lookup) == ALICE_DN
+        assert resolver.resolve(ALICE_DN, lookup) == ALICE_DN
+        assert len(calls) == 1
+        assert resolver.stats()["negative_hits"] == 1
+        assert resolver.stats()["memory_hits"] == 0
+        assert resolver.stats()["hit_rate"] == 0.0
+        with runtime.session_factory() as session:
+            resolver.flush(Repository(session))
+            session.commit()
+            assert Repository(session).get_address(ALICE_DN.lower()) is None
+
+        retrying = AddressResolver(runtime.session_factory, failure_ttl=timedelta(0))
+        assert retrying.resolve(ALICE_DN, lookup) == ALICE_DN
+        assert retrying.resolve(ALICE_DN, lambda: "alice@contoso.com") == "alice@contoso.com"
+        assert len(calls) == 2
+        assert retrying.stats()["failures"] == 1
+
+
+def test_fetcher_keeps_unresolved_sender_and_recipients(tmp_path, monkeypatch):
+    item = FakeItem(
+        "e1",
+        datetime(2026, 2, 1, 9, 0),
+        SenderEmailAddress=ALICE_DN,
+        Recipients=[FakeRecipient(BOB_DN, None, 1), FakeRecipient("carol@contoso.com", None, 2)],
+    )
+    install_fake_folder(monkeypatch, FakeFolder([item]))
+    with IngestionRuntime(make_config(tmp_path)) as runtime:
+        resolver = AddressResolver(runtime.session_factory)
+        (message,) = OutlookFetcher("mbx", "Inbox", addresses=resolver).iter_messages()
+
+    assert message.sender_email == ALICE_DN
+    assert message.to == BOB_DN
+    assert message.cc == "carol@contoso.com"
+    assert resolver.stats()["failures"] == 2
+
+
+def test_meeting_resources_are_attendees_not_bcc(tmp_path, monkeypatch):
+    room = "/o=Contoso/ou=Exchange Administrative Group/cn=Recipients/cn=room-4a"
+    item = FakeItem(
+        "m1",
+        datetime(2026, 2, 1, 9, 0),
+        MessageClass="IPM.Schedule.Meeting.Request",
+        SenderEmailAddress="alice@contoso.com",
+        Recipients=[
+            FakeRecipient(BOB_DN, "bob@contoso.com", 1),
+            FakeRecipient(room, "room-4a@contoso.com", 3),
+        ],
+    )
+    install_fake_folder(monkeypatch, FakeFolder([item]))
+    with IngestionRuntime(make_config(tmp_path)) as runtime:
+        (message,) = OutlookFetcher("mbx", "Inbox", addresses=AddressResolver(runtime.session_factory)).iter_messages()
+
+    assert message.to == "bob@contoso.com"
+    assert message.bcc is None
+    assert message.meeting_recipients == ["bob@contoso.com", "room-4a@contoso.com"]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import threading
+
+import pytest
+
+from email_ingestion.db.models import BackfillPartition
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import make_session_factory
+from email_ingestion.pipeline import backfill as backfill_module
+from email_ingestion.pipeline.backfill import plan_partitions, run_backfill
+from email_ingestion.pipeline.orchestrator import run_ingestion
+from email_ingestion.sources.jobs import SourceSpec
+
+from fake_outlook import FakeFolder, FakeItem, install_fake_folder
+from helpers import make_config
+
+
+START = datetime(2026, 1, 1)
+UNTIL = datetime(2026, 4, 1)
+
+
+def test_plan_partitions_covers_range_newest_first():
+    ranges = plan_partitions(START, datetime(2026, 3, 5), days=30)
+    assert ranges[0] == (datetime(2026, 3, 2), datetime(2026, 3, 5))
+    assert ranges[-1] == (START, datetime(2026, 1, 31))
+    assert all(newer[0] == older[1] for newer, older in zip(ranges, ranges[1:]))
+
+
+def test_interrupted_backfill_resumes_unfinished_partitions_then_hands_off(tmp_path, monkeypatch):
+    # One item every five days, plus one that arrives after the backfill range.
+    items = [FakeItem(f"e{day:03d}", START + timedelta(days=day, hours=9)) for day in range(0, 90, 5)]
+    folder = FakeFolder(items + [FakeItem("late", UNTIL + timedelta(hours=2))])
+    install_fake_folder(monkeypatch, folder)
+    config = make_config(tmp_path)
+    spec = SourceSpec(name=config.checkpoint_name, mailbox="mbx", folder="Inbox")
+
+    calls = []
+    original = backfill_module.run_jobs
+
+    def flaky(config, specs, **kwargs):
+        calls.append([s.name for s in specs])
+        if len(calls) == 2:
+            raise RuntimeError("Outlook went away")
+        return original(config, specs, **kwargs)
+
+    monkeypatch.setattr(backfill_module, "run_jobs", flaky)
+    with pytest.raises(RuntimeError):
+        run_backfill(config, spec, START, UNTIL, partition_days=30, parallel=1)
+
+    with make_session_factory(config.db_url)() as session:
+        partitions = session.query(BackfillPartition).order_by(BackfillPartition.range_start).all()
+        # No new partition starts once one has raised.
+        assert [p.state for p in partitions] == ["pending", "failed", "done"]
+        assert Repository(session).get_checkpoint(config.checkpoint_name) is None
+
+    result = run_backfill(config, spec, START, UNTIL, partition_days=30, parallel=2)
+
+    assert calls[2] == calls[1]
+    assert len(calls) == 4
+    assert result["completed"] == result["partitions"] == 3
+    assert result["processed"] == len(items)
+    assert result["checkpoint"] == UNTIL.isoformat()
+
+    incremental = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=True)
+    assert incremental["processed"] == 1
+
+
+def test_next_partition_starts_while_a_slow_one_is_still_running(tmp_path, monkeypatch):
+    items = [FakeItem(f"e{day:03d}", START + timedelta(days=day, hours=9)) for day in range(0, 90, 5)]
+    install_fake_folder(monkeypatch, FakeFolder(items))
+    config = make_config(tmp_path)
+    spec = SourceSpec(name=config.checkpoint_name, mailbox="mbx", folder="Inbox")
+    oldest_started = threading.Event()
+    original = backfill_module.run_jobs
+
+    def run_jobs(config, specs, **kwargs):
+        (partition,) = specs
+        if partition.since == START:
+            oldest_started.set()
+        elif partition.until > datetime(2026, 3, 2):
+            # The newest partition only finishes once the oldest has started beside it.
+            assert oldest_started.wait(timeout=10)
+        return original(config, specs, **kwargs)
+
+    monkeypatch.setattr(backfill_module, "run_jobs", run_jobs)
+    result = run_backfill(config, spec, START, UNTIL, partition_days=30, parallel=2)
+
+    assert result["completed"] == result["partitions"] == 3
+    assert result["processed"] == len(items)
@@ -0,0 +1,74 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from email_ingestion.db.models import IngestionRun
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import make_engine, make_session_factory
+from email_ingestion.outlook.fetcher import OutlookFetcher
+from email_ingestion.pipeline.orchestrator import run_ingestion
+from email_ingestion.pipeline.progress import ProgressTracker
+
+from fake_outlook import FakeFolder, FakeItem, install_fake_folder
+from helpers import make_config
+
+
+def test_low_watermark_waits_for_contiguous_prefix():
+    base = datetime(2026, 2, 1, 9, 0)
+    tracker = ProgressTracker()
+    first, second, third = (tracker.register(base + timedelta(minutes=i)) for i in range(3))
+
+    tracker.complete(third)
+    assert tracker.low_watermark is None
+    assert tracker.high_watermark == base + timedelta(minutes=2)
+
+    tracker.complete(first)
+    assert tracker.low_watermark == base
+    tracker.complete(second)
+    assert tracker.low_watermark == base + timedelta(minutes=2)
+    assert tracker.in_flight == 0
+
+
+class _Crash(BaseException):
+    """Stands in for the process dying mid-run, which leaves the run row unfinished."""
+
+
+def test_interrupted_run_resumes_from_durable_watermark(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    folder = FakeFolder([FakeItem(f"e{i}", base + timedelta(minutes=i)) for i in range(10)])
+    install_fake_folder(monkeypatch, folder)
+    config = replace(make_config(tmp_path), pipeline_workers=1, db_batch_messages=2)
+    original = OutlookFetcher._should_skip
+
+    def crash_at_e6(self, entry_id, store_id):
+        if entry_id == "e6":
+            raise _Crash()
+        return original(self, entry_id, store_id)
+
+    monkeypatch.setattr(OutlookFetcher, "_should_skip", crash_at_e6)
+    with pytest.raises(_Crash):
+        run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=True)
+
+    session_factory = make_session_factory(engine=make_engine(config.db_url))
+    with session_factory() as session:
+        repo = Repository(session)
+        assert repo.get_checkpoint(config.checkpoint_name) == (base + timedelta(minutes=5)).isoformat()
+        crashed = session.execute(select(IngestionRun)).scalar_one()
+        assert crashed.finished_at is None
+        assert crashed.stats["state"] == "running"
+        source_stats = crashed.stats["sources"][config.checkpoint_name]
+        assert source_stats["resume_from"] == (base + timedelta(minutes=5)).isoformat()
+
+    monkeypatch.setattr(OutlookFetcher, "_should_skip", original)
+    resumed = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=True)
+    assert resumed["processed"] == 4
+    assert resumed["skipped_known"] == 1  # the boundary item is refetched but already stored
+    assert resumed["checkpoint"] == (base + timedelta(minutes=9)).isoformat()
+
+    with session_factory() as session:
+        session.expire_all()
+        crashed = session.get(IngestionRun, crashed.run_id)
+        assert crashed.stats["state"] == "interrupted"
+        assert crashed.stats["sources"][config.checkpoint_name]["resumed_by"]
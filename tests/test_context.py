@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from email_ingestion.db.models import ExtractedArtifact, IngestionRun
+from email_ingestion.db.session import make_engine, make_session_factory
+from email_ingestion.normalize.context import MessageContext, ParseCounter
+from email_ingestion.pipeline.orchestrator import run_ingestion
+
+from fake_outlook import FakeAttachment, FakeFolder, FakeItem, install_fake_folder
+from helpers import ICS, make_config
+
+
+def test_context_memoizes_each_parse():
+    counter = ParseCounter()
+    context = MessageContext("plain", '<p>Hello <a href="https://example.com">x</a></p>', counter)
+    assert context.normalized_text == context.normalized_text
+    assert context.links == ["https://example.com"]
+    assert context.links is context.links
+    reads = []
+    context.calendar("a1", lambda: reads.append(1) or ICS)
+    context.calendar("a1", lambda: reads.append(1) or ICS)
+    assert len(reads) == 1
+    assert counter.as_dict() == {"html_to_text": 1, "extract_links": 1, "parse_ics": 1}
+
+
+def test_run_parses_each_message_once(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    items = [
+        FakeItem(f"e{i}", base + timedelta(minutes=i), HTMLBody=f"<p>see https://example.com/{i}</p>")
+        for i in range(3)
+    ]
+    items[0].Attachments = [FakeAttachment("invite.ics", ICS)]
+    install_fake_folder(monkeypatch, FakeFolder(items))
+    config = make_config(tmp_path)
+
+    result = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+    assert result["processed"] == 3
+
+    session_factory = make_session_factory(engine=make_engine(config.db_url))
+    with session_factory() as session:
+        stats = session.execute(select(IngestionRun.stats)).scalar_one()
+        calendars = session.execute(
+            select(ExtractedArtifact).where(ExtractedArtifact.head_name == "calendar_invite")
+        ).scalars().all()
+    assert stats["messages_fetched"] == 3
+    assert stats["parses"] == {"html_to_text": 3, "extract_links": 3, "parse_ics": 1}
+    assert calendars[0].payload["location"] == "Room 1"
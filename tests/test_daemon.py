@@ -0,0 +1,64 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+import threading
+import time
+
+from email_ingestion.outlook import fetcher as fetcher_module
+from email_ingestion.outlook.mapi import ComThread
+from email_ingestion.pipeline.daemon import AdaptiveInterval, IngestionDaemon
+from email_ingestion.sources.jobs import SourceSpec
+
+from fake_outlook import FakeFolder, FakeItem, install_fake_folder
+from helpers import make_config
+
+
+def test_adaptive_interval_shrinks_when_busy_and_backs_off_when_idle():
+    interval = AdaptiveInterval(60, minimum=15, maximum=240)
+    assert interval.update(5) == 30
+    assert interval.update(5) == 15
+    assert interval.update(5) == 15
+    assert [interval.update(0) for _ in range(4)] == [30, 60, 120, 240]
+    assert interval.update(0) == 240
+
+
+def test_com_thread_runs_generators_on_one_thread():
+    com = ComThread()
+    try:
+        seen = list(com.iterate(lambda: (threading.current_thread().name for _ in range(3))))
+        assert seen == ["ingest-com"] * 3
+        assert com.call(lambda: threading.current_thread().name) == "ingest-com"
+    finally:
+        com.close()
+
+
+def test_daemon_keeps_outlook_session_warm_and_stops_cleanly(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    folder = FakeFolder([FakeItem(f"e{i}", base + timedelta(minutes=i)) for i in range(3)])
+    namespace = install_fake_folder(monkeypatch, folder)
+    lookups = {"namespace": 0, "folder": 0}
+
+    def get_namespace():
+        lookups["namespace"] += 1
+        return namespace
+
+    def resolve(ns, mailbox, folder_path):
+        lookups["folder"] += 1
+        return ns.folder
+
+    monkeypatch.setattr(fetcher_module, "get_namespace", get_namespace)
+    monkeypatch.setattr(fetcher_module, "resolve_shared_folder", resolve)
+    config = replace(make_config(tmp_path), poll_min_seconds=0.01, poll_max_seconds=0.05)
+    spec = SourceSpec(name="inbox", mailbox="mbx", folder="Inbox")
+    daemon = IngestionDaemon(config, [spec], poll_seconds=0.01)
+
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while daemon.iterations < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    daemon.stop()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert daemon.iterations >= 3
+    assert lookups == {"namespace": 1, "folder": 1}
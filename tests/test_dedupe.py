@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from email_ingestion.outlook.fetcher import OutlookFetcher
+from email_ingestion.pipeline.dedupe import KnownEmailIndex
+from email_ingestion.pipeline.orchestrator import run_ingestion
+from email_ingestion.util.bloom import BloomFilter
+
+from fake_outlook import FakeFolder, FakeItem, install_fake_folder
+from helpers import make_config
+
+
+def test_rerun_skips_known_messages_before_conversion(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    folder = FakeFolder([FakeItem(f"e{i}", base + timedelta(minutes=i)) for i in range(5)])
+    install_fake_folder(monkeypatch, folder)
+    converted = []
+    original = OutlookFetcher._convert_item
+
+    def counting(self, item):
+        converted.append(item.EntryID)
+        return original(self, item)
+
+    monkeypatch.setattr(OutlookFetcher, "_convert_item", counting)
+    config = make_config(tmp_path)
+
+    first = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+    assert first["processed"] == 5
+    assert len(converted) == 5
+
+    second = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+    assert second["processed"] == 0
+    assert second["skipped_known"] == 5
+    assert len(converted) == 5
+
+    forced = run_ingestion(
+        config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False, reprocess=True
+    )
+    assert forced["processed"] == 5
+    assert len(converted) == 10
+
+
+def test_bloom_backed_index_confirms_positives():
+    bloom = BloomFilter(capacity=100)
+    bloom.update(["a", "b"])
+    confirmed = []
+
+    def confirm(email_id):
+        confirmed.append(email_id)
+        return email_id == "a"
+
+    index = KnownEmailIndex(bloom=bloom, confirm=confirm)
+    assert "a" in index
+    assert "b" not in index
+    assert "zzz" not in index
+    index.add("c")
+    assert "c" in index
+
+
+def test_bloom_memory_budget_caps_the_bit_array():
+    bloom = BloomFilter(capacity=1_000_000, error_rate=0.001, max_bytes=4096)
+    assert bloom.size_bytes == 4096
+    bloom.update(str(i) for i in range(1000))
+    assert all(str(i) in bloom for i in range(1000))
+    assert bloom.expected_error_rate > 0.001
@@ -31,3 +31,28 @@ def test_docx_head_extracts_text():
     )
     assert result.artifacts
     assert "Hello Docx" in (result.artifacts[0].text or "")
+
+
+def test_docx_head_reads_from_path(tmp_path):
+    try:
+        from docx import Document
+    except Exception:
+        return
+    doc = Document()
+    doc.add_paragraph("Spooled Docx")
+    path = tmp_path / "spooled.docx"
+    doc.save(str(path))
+    result = DocxHead().process(
+        HeadInput(
+            email_id="email",
+            subject="subject",
+            body_text=None,
+            body_html=None,
+            is_calendar=False,
+            attachment_id="att",
+            attachment_name="spooled.docx",
+            attachment_ext="docx",
+            attachment_path=str(path),
+        )
+    )
+    assert "Spooled Docx" in (result.artifacts[0].text or "")
@@ -0,0 +1,85 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+import threading
+import time
+
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import make_session_factory
+from email_ingestion.pipeline.daemon import IngestionDaemon
+from email_ingestion.sources.jobs import SourceSpec
+
+from fake_outlook import FakeFolder, FakeItem, FakeItemEvents, install_fake_folder
+from helpers import make_config
+
+
+def _wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _email_count(config) -> int:
+    with make_session_factory(config.db_url)() as session:
+        return Repository(session).count_emails()
+
+
+def _start(config, events, reconcile_seconds):
+    spec = SourceSpec(name="inbox", mailbox="mbx", folder="Inbox")
+    daemon = IngestionDaemon(
+        config, [spec], poll_seconds=60, events={"inbox": events}, reconcile_seconds=reconcile_seconds
+    )
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+    return daemon, thread
+
+
+def test_pushed_item_is_ingested_without_waiting_for_a_poll(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    folder = FakeFolder([FakeItem(f"e{i}", base + timedelta(minutes=i)) for i in range(2)])
+    namespace = install_fake_folder(monkeypatch, folder)
+    config = replace(make_config(tmp_path), db_batch_seconds=0.01)
+    events = FakeItemEvents()
+    daemon, thread = _start(config, events, reconcile_seconds=3600)
+    try:
+        assert _wait_for(lambda: daemon.iterations == 1 and events.started.is_set())
+        new_item = FakeItem("e-new", base + timedelta(hours=1))
+        folder._items.append(new_item)
+        events.fire(new_item)
+        assert _wait_for(lambda: len(daemon.event_latencies) == 1)
+    finally:
+        daemon.stop()
+        thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert events.stopped
+    assert daemon.iterations == 1
+    assert daemon.event_latencies[0] < 5
+    assert "e-new" in namespace.items_loaded
+    assert _email_count(config) == 3
+
+
+def test_reconcile_poll_recovers_missed_events(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    folder = FakeFolder([FakeItem("e0", base)])
+    install_fake_folder(monkeypatch, folder)
+    config = make_config(tmp_path)
+    events = FakeItemEvents()
+    daemon, thread = _start(config, events, reconcile_seconds=0.2)
+    try:
+        assert _wait_for(lambda: daemon.iterations >= 1)
+        # Delivered while nothing was listening: no event fires.
+        folder._items.append(FakeItem("e-missed", base + timedelta(minutes=5)))
+        pushed = FakeItem("e-pushed", base + timedelta(minutes=6))
+        folder._items.append(pushed)
+        events.fire(pushed)
+        assert _wait_for(lambda: _email_count(config) == 3)
+        iterations = daemon.iterations
+        assert _wait_for(lambda: daemon.iterations > iterations)
+    finally:
+        daemon.stop()
+        thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert _email_count(config) == 3
+    assert daemon.events_received == 1
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta, timezone
+import sys
+import time
+
+import pytest
+
+from email_ingestion.outlook.fetcher import OutlookFetcher, PROPERTY_READ_MAX_BYTES
+from email_ingestion.outlook.mapi import received_time_filter
+from email_ingestion.storage.cas import ContentAddressedStorage
+
+from fake_outlook import FakeAttachment, FakeFolder, FakeItem, FakeItems, install_fake_folder
+
+
+BASE = datetime(2026, 2, 1, 9, 0)
+
+
+def _folder(count: int) -> FakeFolder:
+    items = [FakeItem(f"e{i}", BASE + timedelta(minutes=i)) for i in range(count)]
+    return FakeFolder(items)
+
+
+def _count_conversions(monkeypatch) -> list:
+    converted = []
+    original = OutlookFetcher._convert_item
+
+    def counting(self, item):
+        converted.append(item.EntryID)
+        return original(self, item)
+
+    monkeypatch.setattr(OutlookFetcher, "_convert_item", counting)
+    return converted
+
+
+def test_received_time_filter_uses_local_minute_format():
+    assert received_time_filter(datetime(2026, 2, 1, 13, 5, 42)) == "[ReceivedTime] >= '02/01/2026 01:05 PM'"
+    assert received_time_filter(None) is None
+
+
+def test_since_is_pushed_into_restrict(monkeypatch):
+    folder = _folder(200)
+    install_fake_folder(monkeypatch, folder)
+    converted = _count_conversions(monkeypatch)
+
+    since = BASE + timedelta(minutes=195, seconds=30)
+    messages = list(OutlookFetcher("mbx", "Inbox", since=since).iter_messages())
+
+    assert [m.entry_id for m in messages] == ["e199", "e198", "e197", "e196"]
+    assert converted == ["e199", "e198", "e197", "e196"]
+    assert ("Restrict", "[ReceivedTime] >= '02/01/2026 12:15 PM'") in folder.log
+
+
+def test_stops_at_first_item_older_than_since_without_restrict(monkeypatch):
+    folder = _folder(200)
+    install_fake_folder(monkeypatch, folder)
+    converted = _count_conversions(monkeypatch)
+
+    def broken_restrict(self, restriction):
+        raise RuntimeError("restrict unsupported")
+
+    monkeypatch.setattr(FakeItems, "Restrict", broken_restrict)
+    since = BASE + timedelta(minutes=190)
+    messages = list(OutlookFetcher("mbx", "Inbox", since=since).iter_messages())
+
+    assert len(messages) == 10
+    assert len(converted) == 10
+
+
+def test_table_mode_defers_bodies_until_requested(monkeypatch):
+    folder = _folder(50)
+    namespace = install_fake_folder(monkeypatch, folder)
+    converted = _count_conversions(monkeypatch)
+
+    since = BASE + timedelta(minutes=45)
+    fetcher = OutlookFetcher("mbx", "Inbox", since=since, fetch_mode="table")
+    messages = list(fetcher.iter_messages())
+
+    assert [m.entry_id for m in messages] == ["e49", "e48", "e47", "e46", "e45"]
+    assert converted == []
+    assert namespace.items_loaded == []
+    assert messages[0].subject == "subject e49"
+    assert messages[0].store_id == "store"
+    assert messages[0].body_text is None and not messages[0].details_loaded
+
+    messages[0].load_details()
+    messages[0].load_details()
+    assert messages[0].body_text == "body e49"
+    assert namespace.items_loaded == ["e49"]
+
+
+def test_attachments_read_via_property_or_saved_into_storage(tmp_path, monkeypatch):
+    small = FakeAttachment("logo.png", b"x" * 100)
+    large = FakeAttachment("deck.PDF", b"y" * (PROPERTY_READ_MAX_BYTES + 1))
+    blocked = FakeAttachment("note.txt", b"z" * 10, allow_property_read=False)
+    folder = FakeFolder([FakeItem("e0", BASE, Attachments=[small, large, blocked])])
+    install_fake_folder(monkeypatch, folder)
+    storage = ContentAddressedStorage(str(tmp_path))
+
+    message = next(OutlookFetcher("mbx", "Inbox", storage=storage).iter_messages())
+    by_name = {att.filename: att for att in message.attachments}
+
+    assert by_name["logo.png"].data == b"x" * 100
+    assert by_name["logo.png"].stored is None
+    assert not any(call[0] == "SaveAsFile" for call in small.calls)
+
+    stored = by_name["deck.PDF"].stored
+    assert by_name["deck.PDF"].data is None
+    assert stored.path.name == stored.sha256
+    assert stored.size_bytes == large.Size
+    assert by_name["deck.PDF"].read_bytes() == large.data
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+    assert by_name["note.txt"].stored.path.read_bytes() == b"z" * 10
+
+
+def test_attachments_beyond_memory_budget_are_spooled_to_storage(tmp_path, monkeypatch):
+    attachments = [FakeAttachment(f"a{i}.bin", bytes([i]) * 40_000) for i in range(3)]
+    folder = FakeFolder([FakeItem("e0", BASE, Attachments=attachments)])
+    install_fake_folder(monkeypatch, folder)
+    storage = ContentAddressedStorage(str(tmp_path))
+
+    fetcher = OutlookFetcher("mbx", "Inbox", storage=storage, memory_budget=64_000)
+    message = next(fetcher.iter_messages())
+
+    assert [att.data is not None for att in message.attachments] == [True, False, False]
+    assert message.attachments[2].read_bytes() == bytes([2]) * 40_000
+
+
+def test_received_time_filter_with_upper_bound_rounds_outward():
+    assert received_time_filter(None, datetime(2026, 2, 1, 13, 5, 42)) == "[ReceivedTime] < '02/01/2026 01:06 PM'"
+    assert received_time_filter(BASE, BASE) == (
+        "[ReceivedTime] >= '02/01/2026 09:00 AM' AND [ReceivedTime] < '02/01/2026 09:01 AM'"
+    )
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="time.tzset is POSIX only")
+def test_aware_since_is_converted_to_local_time(monkeypatch):
+    monkeypatch.setenv("TZ", "CET-1")
+    time.tzset()
+    try:
+        since = datetime(2026, 2, 1, 13, 5, tzinfo=timezone(timedelta(hours=2)))
+        assert received_time_filter(since) == "[ReceivedTime] >= '02/01/2026 12:05 PM'"
+        # pywin32 labels local COM dates as UTC; that label is not an offset.
+        labelled = datetime(2026, 2, 1, 13, 5, tzinfo=timezone.utc)
+        assert received_time_filter(labelled) == "[ReceivedTime] >= '02/01/2026 01:05 PM'"
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_items_are_walked_in_windows_without_repeats(monkeypatch):
+    # Several items share a received time so windows end mid-timestamp.
+    items = [FakeItem(f"e{i:02d}", BASE + timedelta(minutes=i // 3)) for i in range(20)]
+    folder = FakeFolder(list(reversed(items)))
+    install_fake_folder(monkeypatch, folder)
+
+    fetcher = OutlookFetcher("mbx", "Inbox", ascending=True, window_items=4)
+    messages = list(fetcher.iter_messages())
+    assert sorted(m.entry_id for m in messages) == [f"e{i:02d}" for i in range(20)]
+    assert [m.received_time for m in messages] == sorted(m.received_time for m in messages)
+    assert sum(1 for entry in folder.log if entry[0] == "Restrict") == 5
+
+    fetcher = OutlookFetcher("mbx", "Inbox", limit=7, window_items=2)
+    newest = [m.entry_id for m in fetcher.iter_messages()]
+    assert len(newest) == len(set(newest)) == 7
+    assert {entry_id[:2] for entry_id in newest} == {"e1"}
+    assert ("Restrict", "[ReceivedTime] < '02/01/2026 09:07 AM'") in folder.log
+
+
+def test_namespace_is_recycled_during_long_scans(monkeypatch):
+    from email_ingestion.outlook import fetcher as fetcher_module
+
+    folder = _folder(10)
+    namespace = install_fake_folder(monkeypatch, folder)
+    opened = []
+
+    def get_namespace():
+        opened.append(1)
+        return namespace
+
+    monkeypatch.setattr(fetcher_module, "get_namespace", get_namespace)
+    fetcher = OutlookFetcher("mbx", "Inbox", ascending=True, window_items=2, recycle_items=4)
+    fetcher.trace.every = 3
+
+    assert len(list(fetcher.iter_messages())) == 10
+    assert fetcher.stats["namespace_recycles"] == 2
+    assert len(opened) == 3
+    assert len(fetcher.stats["item_latency_ms"]) == 3
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from sqlalchemy import select
+
+from email_ingestion.db.models import Attachment
+from email_ingestion.db.session import make_session_factory
+from email_ingestion.pipeline.orchestrator import run_ingestion
+from email_ingestion.sources.files import FileMessageSource, iter_mbox, message_from_eml, walk_files
+
+from helpers import make_config, make_eml, make_mbox
+
+
+def test_message_from_eml_maps_fields():
+    message = message_from_eml(make_eml(0, attachment=b"hello"))
+    assert message.subject == "report 0"
+    assert message.sender_email == "alice@example.com"
+    assert message.to == "bob@example.com; carol@example.com"
+    assert "https://example.com/0" in message.body_text
+    assert message.body_html.strip() == "<p>report 0</p>"
+    assert [(a.filename, a.data) for a in message.attachments] == [("notes.txt", b"hello")]
+    assert message.source_system == "file"
+
+
+def test_iter_mbox_streams_and_unescapes(tmp_path):
+    raws = [make_eml(0), make_eml(1)]
+    path = tmp_path / "export.mbox"
+    path.write_bytes(make_mbox(raws))
+    messages = [message_from_eml(raw) for raw in iter_mbox(path)]
+    assert [m.subject for m in messages] == ["report 0", "report 1"]
+    assert messages[1].body_text.startswith("From the desk")
+
+
+def test_walk_files_finds_nested_exports(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "one.eml").write_bytes(b"")
+    (tmp_path / "a" / "b" / "two.EML").write_bytes(b"")
+    (tmp_path / "a" / "b" / "skip.txt").write_bytes(b"")
+    found = sorted(p.name for p in walk_files(tmp_path, {".eml"}, workers=2))
+    assert found == ["one.eml", "two.EML"]
+
+
+def test_run_ingestion_from_files_and_rerun_skips(tmp_path):
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    (exports / "single.eml").write_bytes(make_eml(0, attachment=b"hello"))
+    (exports / "bulk.mbox").write_bytes(make_mbox([make_eml(1), make_eml(2)]))
+    config = make_config(tmp_path)
+
+    first = run_ingestion(
+        config, None, None, since=None, limit=None, use_checkpoint=False, source="files", source_path=str(exports)
+    )
+    assert first["processed"] == 3
+    with make_session_factory(config.db_url)() as session:
+        saved = session.execute(select(Attachment.saved_path)).scalar_one()
+    assert Path(saved).read_bytes() == b"hello"
+
+    again = run_ingestion(
+        config, None, None, since=None, limit=None, use_checkpoint=False, source="files", source_path=str(exports)
+    )
+    assert again["processed"] == 0
+    assert again["skipped_known"] == 3
+
+
+def test_file_source_applies_since(tmp_path):
+    (tmp_path / "bulk.mbox").write_bytes(make_mbox([make_eml(i) for i in range(3)]))
+    old = message_from_eml(make_eml(1))
+    source = FileMessageSource(tmp_path, since=old.received_time)
+    assert [m.subject for m in source.iter_messages()] == ["report 1", "report 2"]
+
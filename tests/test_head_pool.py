@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+
+import pytest
+
+from email_ingestion.heads.base import HeadInput, HeadResult
+from email_ingestion.heads.docx import DocxHead
+from email_ingestion.heads.image import ImageHead
+from email_ingestion.pipeline.head_pool import (
+    CircuitBreaker,
+    CircuitOpen,
+    HeadExecutor,
+    HeadLimits,
+    HeadMemoryExceeded,
+    HeadTimeout,
+)
+
+
+def _input(**kwargs) -> HeadInput:
+    return HeadInput(email_id="email", subject=None, body_text=None, body_html=None, is_calendar=False, **kwargs)
+
+
+def test_cpu_bound_heads_run_in_worker_processes(tmp_path):
+    doc = pytest.importorskip("docx").Document()
+    doc.add_paragraph("Pooled Docx")
+    path = tmp_path / "pooled.docx"
+    doc.save(str(path))
+
+    with HeadExecutor(processes=2, pass_paths=True) as executor:
+        result = executor.run(
+            DocxHead(),
+            _input(attachment_ext="docx", attachment_bytes=path.read_bytes(), attachment_path=str(path)),
+        )
+        inline = executor.run(ImageHead(), _input(attachment_name="logo.png"))
+
+    assert "Pooled Docx" in (result.artifacts[0].text or "")
+    assert result.metrics["worker_pid"] != os.getpid()
+    assert "worker_pid" not in (inline.metrics or {})
+
+
+class QuickHead:
+    name = "quick"
+    supported_extensions = {"quick"}
+    cpu_bound = True
+
+    def process(self, head_input):
+        return HeadResult(metrics={"pid": os.getpid()})
+
+
+class SlowHead:
+    name = "slow"
+    supported_extensions = {"slow"}
+    cpu_bound = True
+
+    def process(self, head_input):
+        import time
+
+        time.sleep(30)
+
+
+class HungryHead:
+    name = "hungry"
+    supported_extensions = {"hungry"}
+    cpu_bound = True
+
+    def process(self, head_input):
+        blob = bytearray(1024 * 1024 * 1024)
+        return HeadResult(metrics={"size": len(blob)})
+
+
+class FailingHead:
+    name = "failing"
+    supported_extensions = {"bad"}
+    cpu_bound = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, head_input):
+        self.calls += 1
+        raise ValueError("malformed")
+
+
+def test_timeout_kills_worker_and_pool_recovers():
+    limits = {"slow": HeadLimits(timeout_seconds=0.5)}
+    with HeadExecutor(processes=1, head_limits=limits) as executor:
+        started = time.monotonic()
+        with pytest.raises(HeadTimeout):
+            executor.run(SlowHead(), _input(attachment_ext="slow", attachment_bytes=b"x"))
+        assert time.monotonic() - started < 10
+        result = executor.run(ImageHead(), _input(attachment_name="logo.png"))
+    assert result.artifacts
+
+
+def test_isolation_enforces_limits_without_a_process_pool():
+    with HeadExecutor(default_limits=HeadLimits(timeout_seconds=0.5), isolate=True) as executor:
+        started = time.monotonic()
+        with pytest.raises(HeadTimeout):
+            executor.run(SlowHead(), _input(attachment_ext="slow", attachment_bytes=b"x"))
+        assert time.monotonic() - started < 10
+        inline = executor.run(ImageHead(), _input(attachment_name="logo.png"))
+    assert "worker_pid" not in (inline.metrics or {})
+
+
+def test_heads_run_inline_by_default_without_a_process_pool():
+    with HeadExecutor(default_limits=HeadLimits(timeout_seconds=0.5)) as executor:
+        result = executor.run(QuickHead(), _input(attachment_ext="quick", attachment_bytes=b"x"))
+    assert result.metrics["pid"] == os.getpid()
+    assert "worker_pid" not in result.metrics
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="RLIMIT_AS is POSIX only")
+def test_memory_ceiling_is_reported_as_budget_breach():
+    limits = HeadLimits(timeout_seconds=30, memory_limit_mb=256)
+    with HeadExecutor(processes=1, default_limits=limits) as executor:
+        with pytest.raises(HeadMemoryExceeded) as excinfo:
+            executor.run(HungryHead(), _input(attachment_ext="hungry", attachment_bytes=b"x"))
+    assert excinfo.value.status == "skipped"
+
+
+def test_circuit_breaker_backs_off_after_repeated_failures():
+    head = FailingHead()
+    executor = HeadExecutor(breaker=CircuitBreaker(threshold=2, cooldown_seconds=60))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            executor.run(head, _input(attachment_ext="bad", attachment_bytes=b"x" * 100))
+    with pytest.raises(CircuitOpen):
+        executor.run(head, _input(attachment_ext="bad", attachment_bytes=b"y" * 100))
+    assert head.calls == 2
+    # A very different input size is a different class of input.
+    with pytest.raises(ValueError):
+        executor.run(head, _input(attachment_ext="bad", attachment_bytes=b"z" * 10_000_000))
+
+
+def test_half_open_circuit_lets_a_single_probe_through(monkeypatch):
+    breaker = CircuitBreaker(threshold=1, cooldown_seconds=10)
+    key = ("pdf", "pdf", 3)
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker.record_failure(key)
+    assert not breaker.allow(key)
+
+    now[0] += 11
+    assert breaker.allow(key)
+    assert not breaker.allow(key)
+    breaker.record_failure(key)
+    assert not breaker.allow(key)
+
+    now[0] += 21
+    assert breaker.allow(key)
+    assert not breaker.allow(key)
+    breaker.record_success(key)
+    assert breaker.allow(key) and breaker.allow(key)
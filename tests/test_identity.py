@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from email_ingestion.db.models import Email, EmailAlias, ExtractedArtifact
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import make_session_factory
+from email_ingestion.outlook.fetcher import INTERNET_MESSAGE_ID_PROP, TRANSPORT_HEADERS_PROP
+from email_ingestion.pipeline.identity import message_id_from_headers
+from email_ingestion.pipeline.orchestrator import make_email_id, run_ingestion
+
+from fake_outlook import FakeAttachment, FakeFolder, FakeItem, install_fake_folder
+from helpers import make_config, make_eml
+
+
+HEADERS = "Received: from mx\r\nMessage-ID:\r\n <abc@example.com>\r\nSubject: report\r\n"
+
+
+def _item(entry_id: str, attachment: FakeAttachment) -> FakeItem:
+    return FakeItem(
+        entry_id,
+        datetime(2026, 2, 1, 9, 0),
+        Attachments=[attachment],
+        mapi_props={INTERNET_MESSAGE_ID_PROP: "<abc@example.com>", TRANSPORT_HEADERS_PROP: HEADERS},
+    )
+
+
+def _count(config, model) -> int:
+    with make_session_factory(config.db_url)() as session:
+        return session.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def test_message_id_is_read_from_folded_headers():
+    assert message_id_from_headers(HEADERS) == "abc@example.com"
+    assert message_id_from_headers("Subject: x\r\n") is None
+
+
+def test_moved_item_is_linked_without_reading_or_processing_it(tmp_path, monkeypatch):
+    original = FakeAttachment("notes.txt", b"hello")
+    folder = FakeFolder([_item("e1", original)])
+    install_fake_folder(monkeypatch, folder)
+    config = make_config(tmp_path)
+
+    first = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+    assert first["processed"] == 1
+    artifacts = _count(config, ExtractedArtifact)
+
+    # Moving the item gives it a new EntryID.
+    moved = FakeAttachment("notes.txt", b"hello")
+    folder._items[:] = [_item("e1-moved", moved)]
+    second = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+
+    assert second["processed"] == 0
+    assert second["linked"] == 1
+    assert moved.calls == []
+    assert _count(config, ExtractedArtifact) == artifacts
+    with make_session_factory(config.db_url)() as session:
+        repo = Repository(session)
+        assert repo.count_emails() == 1
+        alias = session.get(EmailAlias, make_email_id("e1-moved", "store"))
+        assert alias.email_id == make_email_id("e1", "store")
+        assert alias.matched_by == "message_id"
+        assert session.get(Email, alias.email_id).raw_headers == HEADERS
+
+    third = run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+    assert third["skipped_known"] == 1
+    assert third["linked"] == 0
+
+
+def test_re_exported_message_is_linked_by_content_fingerprint(tmp_path):
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    raw = make_eml(0, attachment=b"hello")
+    (exports / "a.eml").write_bytes(raw)
+    config = make_config(tmp_path)
+    first = run_ingestion(
+        config, None, None, since=None, limit=None, use_checkpoint=False, source="files", source_path=str(exports)
+    )
+    assert first["processed"] == 1
+
+    # Same message exported again through another relay: different bytes, no Message-ID.
+    (exports / "b.eml").write_bytes(b"Received: from relay; Mon, 02 Feb 2026 09:00:05 +0000\n" + raw)
+    second = run_ingestion(
+        config, None, None, since=None, limit=None, use_checkpoint=False, source="files", source_path=str(exports)
+    )
+    assert second["processed"] == 0
+    assert second["linked"] == 1
+    with make_session_factory(config.db_url)() as session:
+        assert session.execute(select(EmailAlias.matched_by)).scalar_one() == "fingerprint"
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+import json
+
+import pytest
+from sqlalchemy import select
+
+from email_ingestion.db.models import IngestionRun
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import make_engine, make_session_factory
+from email_ingestion.outlook import fetcher as fetcher_module
+from email_ingestion.pipeline.orchestrator import run_jobs
+from email_ingestion.sources.jobs import SourceSpec, load_job_file
+
+from fake_outlook import FakeFolder, FakeItem, install_fake_folder
+from helpers import make_config, make_eml, make_mbox
+
+
+def test_job_runs_sources_concurrently_with_separate_checkpoints(tmp_path):
+    for name, offset in (("a", 0), ("b", 3)):
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / "bulk.mbox").write_bytes(make_mbox([make_eml(offset + i) for i in range(3)]))
+    job = tmp_path / "job.json"
+    job.write_text(
+        json.dumps(
+            {
+                "defaults": {"source": "files", "max_in_flight": 1},
+                "sources": [
+                    {"name": "a", "path": str(tmp_path / "a")},
+                    {"name": "b", "path": str(tmp_path / "b"), "checkpoint_name": "b_checkpoint"},
+                ],
+            }
+        )
+    )
+    specs = load_job_file(job)
+    assert [spec.checkpoint_key for spec in specs] == ["a", "b_checkpoint"]
+
+    config = make_config(tmp_path)
+    result = run_jobs(config, specs, use_checkpoint=True)
+    assert result["processed"] == 6
+    assert {name: summary["processed"] for name, summary in result["sources"].items()} == {"a": 3, "b": 3}
+
+    session_factory = make_session_factory(engine=make_engine(config.db_url))
+    with session_factory() as session:
+        repo = Repository(session)
+        assert repo.get_checkpoint("a") == result["sources"]["a"]["checkpoint"]
+        assert repo.get_checkpoint("b_checkpoint") == result["sources"]["b"]["checkpoint"]
+        assert repo.get_checkpoint("a") < repo.get_checkpoint("b_checkpoint")
+
+
+def test_failing_source_does_not_cost_the_others_their_checkpoint(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    install_fake_folder(monkeypatch, FakeFolder([FakeItem(f"e{i}", base + timedelta(minutes=i)) for i in range(5)]))
+    resolve = fetcher_module.resolve_shared_folder
+
+    def resolve_or_fail(namespace, mailbox, folder_path):
+        if mailbox == "bad":
+            raise ValueError("Mailbox 'bad' not found")
+        return resolve(namespace, mailbox, folder_path)
+
+    monkeypatch.setattr(fetcher_module, "resolve_shared_folder", resolve_or_fail)
+    specs = [
+        SourceSpec(name="good", mailbox="mbx", folder="Inbox"),
+        SourceSpec(name="broken", mailbox="bad", folder="Inbox"),
+    ]
+    config = make_config(tmp_path)
+
+    result = run_jobs(config, specs, use_checkpoint=True)
+
+    assert result["processed"] == 5
+    assert result["sources"]["good"]["error"] is None
+    assert result["sources"]["broken"]["error"] == "ValueError: Mailbox 'bad' not found"
+    with make_session_factory(config.db_url)() as session:
+        assert Repository(session).get_checkpoint("good") == (base + timedelta(minutes=4)).isoformat()
+        assert Repository(session).get_checkpoint("broken") is None
+        finished_at, stats = session.execute(select(IngestionRun.finished_at, IngestionRun.stats)).one()
+    assert finished_at is not None
+    assert stats["state"] == "completed_with_errors"
+    assert stats["sources"]["good"]["state"] == "completed"
+    assert stats["sources"]["broken"]["state"] == "failed"
+    assert stats["sources"]["broken"]["error"] == "ValueError: Mailbox 'bad' not found"
+
+
+def test_job_file_rejects_shared_checkpoints(tmp_path):
+    job = tmp_path / "job.json"
+    job.write_text(
+        json.dumps(
+            {
+                "defaults": {"mailbox": "Shared", "checkpoint_name": "same"},
+                "sources": [{"name": "x", "folder": "Inbox"}, {"name": "y", "folder": "Inbox/Sub"}],
+            }
+        )
+    )
+    with pytest.raises(ValueError, match="more than one source"):
+        load_job_file(job)
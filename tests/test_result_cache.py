@@ -0,0 +1,106 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from email_ingestion.db.models import ExtractedArtifact, HeadResultCacheEntry, IngestionRun
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import Base, make_engine, make_session_factory
+from email_ingestion.heads.base import Artifact, HeadResult
+from email_ingestion.pipeline.orchestrator import run_ingestion
+from email_ingestion.pipeline.result_cache import HeadResultCache
+from email_ingestion.pipeline.writes import MessageWrites
+
+from fake_outlook import FakeAttachment, FakeFolder, FakeItem, install_fake_folder
+from helpers import ICS, make_config
+
+
+def test_repeated_attachment_reuses_cached_head_result(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    items = [FakeItem(f"e{i}", base + timedelta(minutes=i)) for i in range(2)]
+    for item in items:
+        item.Attachments = [FakeAttachment("invite.ics", ICS)]
+    install_fake_folder(monkeypatch, FakeFolder(items))
+    config = replace(make_config(tmp_path), pipeline_workers=1)
+
+    run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+
+    session_factory = make_session_factory(engine=make_engine(config.db_url))
+    with session_factory() as session:
+        stats = session.execute(select(IngestionRun.stats)).scalar_one()
+        artifacts = session.execute(
+            select(ExtractedArtifact).where(ExtractedArtifact.head_name == "calendar_invite")
+        ).scalars().all()
+        entries = session.execute(select(HeadResultCacheEntry)).scalars().all()
+    assert stats["head_cache"] == {"calendar_invite": {"hits": 1, "misses": 1}}
+    assert len({artifact.attachment_id for artifact in artifacts}) == 2
+    assert [entry.head_name for entry in entries] == ["calendar_invite"]
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = make_session_factory(engine=engine)
+    base = datetime(2026, 2, 1)
+    with session_factory() as session:
+        repo = Repository(session)
+        for i in range(4):
+            repo.cache_head_result(
+                {
+                    "cache_key": f"pdf:1:{i}",
+                    "head_name": "pdf",
+                    "head_version": "1",
+                    "sha256": str(i),
+                    "artifacts": [],
+                    "size_bytes": 100,
+                    "last_used_at": base + timedelta(minutes=i),
+                }
+            )
+        repo.touch_head_result({"cache_key": "pdf:1:0", "last_used_at": base + timedelta(hours=1)})
+        assert repo.evict_head_results(250) == 2
+        remaining = session.execute(select(HeadResultCacheEntry.cache_key)).scalars().all()
+        assert sorted(remaining) == ["pdf:1:0", "pdf:1:3"]
+
+
+def test_per_attachment_head_output_is_not_shared_between_identical_blobs(tmp_path, monkeypatch):
+    base = datetime(2026, 2, 1, 9, 0)
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+    items = [
+        FakeItem("e0", base, Attachments=[FakeAttachment("logo_a.png", png)]),
+        FakeItem("e1", base + timedelta(minutes=1), Attachments=[FakeAttachment("other_b.png", png)]),
+    ]
+    install_fake_folder(monkeypatch, FakeFolder(items))
+    config = replace(make_config(tmp_path), pipeline_workers=1)
+
+    run_ingestion(config, "mbx", "Inbox", since=None, limit=None, use_checkpoint=False)
+
+    session_factory = make_session_factory(engine=make_engine(config.db_url))
+    with session_factory() as session:
+        artifacts = session.execute(select(ExtractedArtifact).where(ExtractedArtifact.head_name == "image")).scalars()
+        filenames = sorted(artifact.artifact_metadata["filename"] for artifact in artifacts)
+        assert session.execute(select(HeadResultCacheEntry)).first() is None
+    assert filenames == ["logo_a.png", "other_b.png"]
+
+
+class _PdfHead:
+    name = "pdf"
+    version = "1"
+    cacheable = True
+
+
+def test_flush_only_forgets_entries_of_committed_messages(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = make_session_factory(engine=engine)
+    cache = HeadResultCache(session_factory, max_bytes=1 << 20)
+    flushed, in_flight = MessageWrites(), MessageWrites()
+    cache.store(_PdfHead, "a" * 64, HeadResult(artifacts=[Artifact("text", text="a")]), flushed)
+    cache.store(_PdfHead, "b" * 64, HeadResult(artifacts=[Artifact("text", text="b")]), in_flight)
+
+    # Only the first message reached the writer; the flush callbacks run as in the orchestrator.
+    cache.settle(flushed)
+    with session_factory() as session:
+        cache.evict(Repository(session))
+
+    assert cache.lookup(_PdfHead, "b" * 64, MessageWrites()).artifacts[0].text == "b"
+    assert cache.lookup(_PdfHead, "a" * 64, MessageWrites()) is None
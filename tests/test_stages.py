@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from email_ingestion.pipeline.stages import StagedPipeline
+
+
+def test_pipeline_processes_every_item_and_reports_stages():
+    written = []
+    pipeline = StagedPipeline(workers=3, queue_size=2)
+
+    def process(item):
+        time.sleep(0.001)
+        return item * 2
+
+    report = pipeline.run(lambda: range(50), process, written.append)
+
+    assert sorted(written) == [i * 2 for i in range(50)]
+    assert report["stages"]["fetch"]["items"] == 50
+    assert report["stages"]["write"]["items"] == 50
+    assert report["stages"]["process"]["threads"] == 3
+    assert report["queues"]["fetch->process"]["max_depth"] <= 2
+
+
+def test_slow_writer_applies_backpressure_to_fetch():
+    fetched = []
+    gate = threading.Event()
+
+    def produce():
+        for i in range(20):
+            fetched.append(i)
+            yield i
+
+    def write(result):
+        gate.wait(timeout=5)
+
+    pipeline = StagedPipeline(workers=1, queue_size=2)
+    runner = threading.Thread(target=pipeline.run, args=(produce, lambda x: x, write))
+    runner.start()
+    time.sleep(0.3)
+    # writer holds one item, plus two bounded queues and one item in each stage
+    assert len(fetched) <= 7
+    gate.set()
+    runner.join(timeout=5)
+    assert len(fetched) == 20
+
+
+def test_producer_failure_drains_fetched_items_then_raises():
+    written = []
+
+    def produce():
+        yield 1
+        yield 2
+        raise RuntimeError("outlook went away")
+
+    with pytest.raises(RuntimeError, match="outlook went away"):
+        StagedPipeline(workers=2, queue_size=4).run(produce, lambda x: x, written.append)
+    assert sorted(written) == [1, 2]
@@ -0,0 +1,249 @@
+from dataclasses import replace
+from datetime import timedelta
+import hashlib
+import io
+import os
+import time
+
+import pytest
+
+from email_ingestion.db.models import Attachment, Base, Email
+from email_ingestion.db.session import make_engine, make_session_factory
+from email_ingestion.heads.base import HeadInput
+from email_ingestion.storage.cas import ContentAddressedStorage, make_storage
+from email_ingestion.storage.compression import MAGIC
+from email_ingestion.storage.gc import collect_garbage
+from email_ingestion.storage.migrate import migrate_blob_layout
+
+from helpers import make_config
+
+
+def test_store_stream_hashes_while_copying_and_renames_into_place(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), fsync="full")
+    data = b"0123456789" * 300_000
+
+    stored = storage.store_stream(io.BytesIO(data))
+
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.size_bytes == len(data)
+    assert stored.path.read_bytes() == data
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+    again = storage.store_stream(iter([data[:5], data[5:]]))
+    assert again == stored
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+
+def test_failed_stream_leaves_no_blob_or_staging_file(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), fsync="none")
+
+    def chunks():
+        yield b"partial"
+        raise OSError("Outlook went away")
+
+    with pytest.raises(OSError):
+        storage.store_stream(chunks())
+
+    assert [path.name for path in tmp_path.iterdir()] == [".staging"]
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+
+def test_truncated_blob_from_an_earlier_crash_is_replaced(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path))
+    data = b"complete attachment"
+    stored = storage.store_bytes(data)
+    stored.path.write_bytes(data[:4])
+
+    assert storage.store_bytes(data).path.read_bytes() == data
+
+
+def test_unknown_fsync_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ContentAddressedStorage(str(tmp_path), fsync="always")
+
+
+def test_same_bytes_under_different_names_are_stored_once(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path))
+    first = storage.store_bytes(b"signature logo")
+    staged = storage.staging_path()
+    staged.write_bytes(b"signature logo")
+
+    assert storage.store_file(staged) == first
+    assert first.path.name == first.sha256
+
+
+def test_migration_collapses_suffixed_blobs_and_rewrites_saved_paths(tmp_path):
+    root = tmp_path / "cas"
+    storage = ContentAddressedStorage(str(root))
+    data = b"quarterly report"
+    sha = hashlib.sha256(data).hexdigest()
+    fanout = root / sha[:2] / sha[2:4]
+    fanout.mkdir(parents=True)
+    for name in (f"{sha}.pdf", f"{sha}.pdf.pdf"):
+        (fanout / name).write_bytes(data)
+    other = hashlib.sha256(b"logo").hexdigest()
+    (root / other[:2] / other[2:4]).mkdir(parents=True, exist_ok=True)
+    (root / other[:2] / other[2:4] / other).write_bytes(b"logo")
+
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    session_factory = make_session_factory(engine=engine)
+    with session_factory() as session:
+        session.add(Email(email_id="e1", outlook_entry_id="e1", outlook_store_id="s"))
+        session.add(Attachment(attachment_id="a1", email_id="e1", sha256=sha, saved_path=str(fanout / f"{sha}.pdf")))
+        session.commit()
+
+    report = migrate_blob_layout(storage, session_factory, workers=2, dry_run=True)
+    assert (report["moved"], report["duplicates"], report["paths_updated"]) == (1, 1, 1)
+    assert len(list(fanout.iterdir())) == 2
+
+    result = migrate_blob_layout(storage, session_factory, workers=2)
+
+    assert result == report
+    assert [path.name for path in fanout.iterdir()] == [sha]
+    assert (fanout / sha).read_bytes() == data
+    with session_factory() as session:
+        assert session.get(Attachment, "a1").saved_path == str(storage.path_for(sha))
+    assert migrate_blob_layout(storage, session_factory)["moved"] == 0
+
+
+def test_small_blobs_are_packed_and_read_back(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), pack_threshold=1024)
+    logo = storage.store_bytes(b"tiny logo")
+    staged = storage.staging_path()
+    staged.write_bytes(b"BEGIN:VCALENDAR")
+    invite = storage.store_file(staged)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [".staging", "packs"]
+    large = storage.store_bytes(b"x" * 2048)
+
+    assert logo.path is None and invite.path is None
+    assert logo.read_bytes() == b"tiny logo"
+    assert storage.read_bytes(invite.sha256) == b"BEGIN:VCALENDAR"
+    assert large.path.read_bytes() == b"x" * 2048
+    assert storage.store_bytes(b"tiny logo") == logo
+    assert not staged.exists()
+    storage.close()
+
+    reopened = ContentAddressedStorage(str(tmp_path), pack_threshold=1024)
+    assert reopened.read_bytes(logo.sha256) == b"tiny logo"
+    assert [path.suffix for path in (tmp_path / "packs").glob("*.pack")] == [".pack"]
+    reopened.close()
+
+
+def test_compaction_drops_dead_entries(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), pack_threshold=1024)
+    kept = storage.store_bytes(b"k" * 100)
+    dropped = storage.store_bytes(b"d" * 300)
+    packs = storage.packs
+    packs.delete([dropped.sha256])
+    (old_pack,) = (tmp_path / "packs").glob("*.pack")
+
+    stats = packs.compact(min_dead_ratio=0.5)
+
+    assert stats == {"packs_rewritten": 1, "blobs_moved": 1, "bytes_reclaimed": 300}
+    assert not old_pack.exists()
+    assert [path.stat().st_size for path in (tmp_path / "packs").glob("*.pack")] == [100]
+    assert storage.read_bytes(kept.sha256) == b"k" * 100
+    assert dropped.sha256 not in packs
+    assert packs.compact(min_dead_ratio=0.5)["packs_rewritten"] == 0
+    storage.close()
+
+
+def test_compaction_drops_packs_whose_file_is_missing(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), pack_threshold=1024)
+    lost = storage.store_bytes(b"lost invite")
+    storage.close()
+    (tmp_path / "packs" / "00000001.pack").unlink()
+    storage = ContentAddressedStorage(str(tmp_path), pack_threshold=1024)
+    kept = storage.store_bytes(b"kept logo")
+
+    assert storage.packs.compact(min_dead_ratio=0.5)["packs_rewritten"] == 0
+    assert lost.sha256 not in storage.packs
+    assert storage.read_bytes(kept.sha256) == b"kept logo"
+    storage.close()
+
+
+def test_compressible_blobs_are_stored_compressed_and_read_transparently(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), compression="lzma", pack_threshold=1024)
+    ics = b"BEGIN:VCALENDAR\r\nSUMMARY:Weekly sync\r\nEND:VCALENDAR\r\n" * 2000
+    docx = b"PK\x03\x04" + bytes(range(256)) * 40
+    small_ics = b"BEGIN:VCALENDAR\r\n" * 40
+
+    stored = storage.store_stream(io.BytesIO(ics))
+    kept_raw = storage.store_bytes(docx)
+    packed = storage.store_bytes(small_ics)
+
+    assert stored.size_bytes == len(ics)
+    assert stored.path.stat().st_size < len(ics) // 10
+    assert stored.read_bytes() == ics
+    assert storage.read_bytes(stored.sha256) == ics
+    assert HeadInput("e1", None, None, None, False, attachment_path=str(stored.path)).read_attachment() == ics
+    assert kept_raw.path.read_bytes() == docx
+    assert len(storage.packs.read(packed.sha256)) < len(small_ics)
+    assert packed.read_bytes() == small_ics
+    assert storage.store_bytes(ics) == stored
+    storage.close()
+
+
+def test_incompressible_and_magic_prefixed_blobs_round_trip(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path), compression="zlib")
+    noise = os.urandom(200_000)
+    tricky = MAGIC + b"\x01" + b"not really compressed"
+
+    assert storage.store_bytes(noise).path.read_bytes() == noise
+    assert storage.read_bytes(storage.store_bytes(tricky).sha256) == tricky
+
+
+def test_make_storage_opens_the_store_as_configured(tmp_path):
+    config = replace(make_config(tmp_path), pack_threshold_bytes=1024, cas_compression="zlib")
+    storage = make_storage(config)
+    packed = storage.store_bytes(b"BEGIN:VCALENDAR\r\n" * 40)
+
+    assert packed.path is None
+    assert len(storage.packs.read(packed.sha256)) < packed.size_bytes
+    storage.close()
+
+
+def test_unknown_codec_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ContentAddressedStorage(str(tmp_path), compression="brotli")
+
+
+def test_gc_removes_only_old_unreferenced_blobs(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path / "cas"), pack_threshold=64)
+    referenced = storage.store_bytes(b"r" * 500)
+    orphan = storage.store_bytes(b"o" * 500)
+    fresh_orphan = storage.store_bytes(b"f" * 500)
+    packed = storage.store_bytes(b"small referenced")
+    packed_orphan = storage.store_bytes(b"small orphan")
+    day_ago = time.time() - 86400
+    for path in (referenced.path, orphan.path, *(tmp_path / "cas" / "packs").glob("*.pack")):
+        os.utime(path, (day_ago, day_ago))
+
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    session_factory = make_session_factory(engine=engine)
+    with session_factory() as session:
+        session.add(Email(email_id="e1", outlook_entry_id="e1", outlook_store_id="s"))
+        for name, stored in (("a1", referenced), ("a2", packed)):
+            session.add(Attachment(attachment_id=name, email_id="e1", sha256=stored.sha256))
+        session.commit()
+
+    storage.close()
+    snapshot = {path: path.stat().st_mtime_ns for path in (tmp_path / "cas").rglob("*")}
+    report = collect_garbage(storage, session_factory, grace=timedelta(hours=1), workers=2)
+    assert {path: path.stat().st_mtime_ns for path in (tmp_path / "cas").rglob("*")} == snapshot
+    assert report["references"] == 2
+    assert report["loose"]["unreferenced"] == 1
+    assert report["loose"]["skipped_recent"] == 1
+    assert report["packed"]["unreferenced"] == 1
+    assert orphan.path.exists()
+
+    collect_garbage(storage, session_factory, grace=timedelta(hours=1), delete=True, memory_bytes=1024)
+
+    assert not orphan.path.exists()
+    assert fresh_orphan.path.exists()
+    assert referenced.read_bytes() == b"r" * 500
+    assert storage.read_bytes(packed.sha256) == b"small referenced"
+    assert packed_orphan.sha256 not in storage.packs
+    storage.close()
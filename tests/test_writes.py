@@ -0,0 +1,53 @@
+from sqlalchemy import select
+
+from email_ingestion.db import models as _models  # noqa: F401 - ensure tables are registered
+from email_ingestion.db.models import Email, ExtractedArtifact
+from email_ingestion.db.repo import Repository
+from email_ingestion.db.session import Base, make_engine, make_session_factory
+from email_ingestion.pipeline.writes import BatchedWriter, MessageWrites
+
+
+def _writes(email_id: str, **extra) -> MessageWrites:
+    writes = MessageWrites(email_id=email_id)
+    writes.upsert_email({"email_id": email_id, "subject": email_id, **extra})
+    writes.add_artifact({"artifact_id": f"art-{email_id}", "email_id": email_id, "artifact_type": "text"})
+    return writes
+
+
+def test_batched_writer_commits_in_batches_and_isolates_failures(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    committed, failed = [], []
+    with make_session_factory(engine=engine)() as session:
+        writer = BatchedWriter(
+            Repository(session),
+            max_messages=3,
+            max_seconds=3600,
+            on_committed=lambda w: committed.append(w.email_id),
+            on_failed=lambda w, exc: failed.append(w.email_id),
+        )
+        writer.add(_writes("a"))
+        writer.add(_writes("b"))
+        assert committed == []
+        writer.add(_writes("bad", not_a_column="x"))
+        writer.add(_writes("c"))
+        writer.flush()
+
+        assert committed == ["a", "b", "c"]
+        assert failed == ["bad"]
+        emails = session.execute(select(Email.email_id).order_by(Email.email_id)).scalars().all()
+        assert emails == ["a", "b", "c"]
+        assert len(session.execute(select(ExtractedArtifact)).all()) == 3
+
+
+def test_upsert_keeps_columns_missing_from_payload(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    with make_session_factory(engine=engine)() as session:
+        repo = Repository(session)
+        repo.upsert_email({"email_id": "a", "subject": "first", "raw_headers": "X-Test: 1"})
+        repo.upsert_email({"email_id": "a", "subject": "second"})
+        email = session.execute(select(Email)).scalar_one()
+        session.refresh(email)
+        assert email.subject == "second"
+        assert email.raw_headers == "X-Test: 1"